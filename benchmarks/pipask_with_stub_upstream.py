@@ -0,0 +1,62 @@
+"""
+Run pipask with requests to the upstream services redirected to a stub server.
+
+Usage: python pipask_with_stub_upstream.py <stub server URL> <stats file> <pipask arguments>...
+
+The original host is kept in the Host header so that the stub server can tell the upstream services apart.
+When pipask exits, its peak RSS (in bytes) is written as JSON to the stats file.
+"""
+
+import atexit
+import json
+import sys
+import urllib.parse
+from pathlib import Path
+
+import httpx
+import requests.adapters
+
+from stub_upstream import UPSTREAM_HOSTS
+
+
+def _redirect_upstream_requests(stub_url: str) -> None:
+    stub = urllib.parse.urlsplit(stub_url)
+
+    original_handle_async_request = httpx.AsyncHTTPTransport.handle_async_request
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.url.host in UPSTREAM_HOSTS:
+            # The Host header was already set from the original URL
+            request.url = request.url.copy_with(scheme=stub.scheme, host=stub.hostname, port=stub.port)
+        return await original_handle_async_request(self, request)
+
+    original_send = requests.adapters.HTTPAdapter.send
+
+    def send(self, request, *args, **kwargs):
+        url = urllib.parse.urlsplit(request.url)
+        if url.hostname in UPSTREAM_HOSTS:
+            request.headers["Host"] = url.netloc
+            request.url = urllib.parse.urlunsplit(url._replace(scheme=stub.scheme, netloc=stub.netloc))
+        return original_send(self, request, *args, **kwargs)
+
+    httpx.AsyncHTTPTransport.handle_async_request = handle_async_request  # type: ignore[method-assign]
+    requests.adapters.HTTPAdapter.send = send  # type: ignore[method-assign]
+
+
+def _write_stats(stats_file: Path) -> None:
+    import resource
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss_bytes = max_rss if sys.platform == "darwin" else max_rss * 1024  # kilobytes on Linux
+    stats_file.write_text(json.dumps({"peak_rss_bytes": peak_rss_bytes}), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    stub_url, stats_file, *pipask_args = sys.argv[1:]
+    _redirect_upstream_requests(stub_url)
+    if sys.platform != "win32":
+        atexit.register(_write_stats, Path(stats_file))
+
+    from pipask.main import main
+
+    main(pipask_args)
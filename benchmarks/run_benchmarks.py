@@ -0,0 +1,226 @@
+"""
+End-to-end benchmarks of `pipask install --dry-run` against a local stand-in for PyPI and the other upstream services.
+
+For each dependency graph size, pipask is run twice with a fresh cache directory: once with a cold cache
+and once with the cache populated by the first run. The results are written to a JSON file and can be
+compared with the results of a previous run:
+
+    python benchmarks/run_benchmarks.py --sizes 10,100 --output new.json --baseline benchmarks/results/baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+from stub_upstream import StubUpstreamServer, generate_dependency_graph
+
+_BENCHMARKS_DIR = Path(__file__).resolve().parent
+_DEFAULT_SIZES = [10, 100, 1000]
+_IMPORT_TIME_RUNS = 5
+_COMPARED_METRICS = [
+    "wall_time_s",
+    "resolve_time_s",
+    "check_time_s",
+    "pip_handoff_time_s",
+    "http_requests",
+    "upstream_requests",
+    "peak_rss_mb",
+]
+
+
+@dataclass
+class BenchmarkResult:
+    size: int
+    cache: str
+    exit_code: int
+    wall_time_s: float
+    resolve_time_s: float | None
+    check_time_s: float | None
+    pip_handoff_time_s: float | None
+    http_requests: int
+    upstream_requests: int
+    peak_rss_mb: float | None
+
+
+def measure_import_time() -> float:
+    """Best of several runs of importing pipask.main in a fresh interpreter, in seconds."""
+    script = "import time; start = time.perf_counter(); import pipask.main; print(time.perf_counter() - start)"
+    timings = [
+        float(subprocess.run([sys.executable, "-c", script], check=True, capture_output=True, text=True).stdout)
+        for _ in range(_IMPORT_TIME_RUNS)
+    ]
+    return min(timings)
+
+
+def run_pipask(stub: StubUpstreamServer, root_package: str, cache_dir: Path, work_dir: Path) -> BenchmarkResult:
+    trace_file = work_dir / "trace.json"
+    stats_file = work_dir / "stats.json"
+    trace_file.unlink(missing_ok=True)
+    stats_file.unlink(missing_ok=True)
+    command = [
+        sys.executable,
+        str(_BENCHMARKS_DIR / "pipask_with_stub_upstream.py"),
+        stub.url,
+        str(stats_file),
+        "install",
+        "--dry-run",
+        "--index-url",
+        f"{stub.url}/simple",
+        "--trusted-host",  # Otherwise pip doesn't cache responses from a plain HTTP index
+        "127.0.0.1",
+        "--cache-dir",
+        str(cache_dir),
+        "--pipask-report=json",
+        "--pipask-trace",
+        str(trace_file),
+        root_package,
+    ]
+    env = {**os.environ, "PIPASK_NO_DAEMON": "1"}
+
+    stub.reset_request_counts()
+    start = time.perf_counter()
+    result = subprocess.run(command, capture_output=True, text=True, env=env)
+    wall_time = time.perf_counter() - start
+    if result.returncode != 0:
+        print(result.stderr, file=sys.stderr)
+
+    spans = _read_spans(trace_file)
+    stats = json.loads(stats_file.read_text()) if stats_file.exists() else {}
+    return BenchmarkResult(
+        size=0,
+        cache="",
+        exit_code=result.returncode,
+        wall_time_s=round(wall_time, 3),
+        resolve_time_s=_total_duration(spans, "Resolve dependencies"),
+        check_time_s=_total_duration(spans, "Run checks"),
+        pip_handoff_time_s=_total_duration(spans, "pip subprocess"),
+        http_requests=sum(1 for span in spans if span["cat"] == "http"),
+        upstream_requests=sum(stub.request_counts.values()),
+        peak_rss_mb=round(stats["peak_rss_bytes"] / 1024 / 1024, 1) if "peak_rss_bytes" in stats else None,
+    )
+
+
+def _read_spans(trace_file: Path) -> list[dict]:
+    if not trace_file.exists():
+        return []
+    return [event for event in json.loads(trace_file.read_text())["traceEvents"] if event["ph"] == "X"]
+
+
+def _total_duration(spans: list[dict], name: str) -> float | None:
+    durations = [span["dur"] for span in spans if span["name"] == name]
+    return round(sum(durations) / 1e6, 3) if durations else None
+
+
+def run_benchmarks(sizes: list[int], repeat: int) -> list[BenchmarkResult]:
+    results = []
+    for size in sizes:
+        packages = generate_dependency_graph(size)
+        with StubUpstreamServer(packages) as stub:
+            for _ in range(repeat):
+                with tempfile.TemporaryDirectory(prefix="pipask-benchmark-") as tmp:
+                    cache_dir = Path(tmp) / "cache"
+                    for cache in ["cold", "warm"]:
+                        result = run_pipask(stub, packages[0].name, cache_dir, Path(tmp))
+                        result.size, result.cache = size, cache
+                        print(_format_result(result), file=sys.stderr)
+                        results.append(result)
+    return _aggregate(results) if repeat > 1 else results
+
+
+def _aggregate(results: list[BenchmarkResult]) -> list[BenchmarkResult]:
+    """Median of repeated runs for each size and cache state."""
+    groups: dict[tuple[int, str], list[BenchmarkResult]] = {}
+    for result in results:
+        groups.setdefault((result.size, result.cache), []).append(result)
+    aggregated = []
+    for (size, cache), group in groups.items():
+        values = {}
+        for metric in _COMPARED_METRICS:
+            measured = [getattr(r, metric) for r in group if getattr(r, metric) is not None]
+            values[metric] = statistics.median(measured) if measured else None
+        exit_code = max(r.exit_code for r in group)
+        aggregated.append(BenchmarkResult(size=size, cache=cache, exit_code=exit_code, **values))
+    return aggregated
+
+
+def _format_result(result: BenchmarkResult) -> str:
+    return (
+        f"{result.size:>5} packages, {result.cache} cache: {result.wall_time_s:.2f}s total, "
+        f"resolve {result.resolve_time_s}s, checks {result.check_time_s}s, "
+        f"{result.http_requests} HTTP requests by pipask, {result.upstream_requests} upstream requests in total, "
+        f"peak RSS {result.peak_rss_mb} MB, exit code {result.exit_code}"
+    )
+
+
+def compare_with_baseline(results: dict, baseline: dict) -> str:
+    baseline_by_key = {(r["size"], r["cache"]): r for r in baseline["results"]}
+    lines = [f"Import time: {_format_change(baseline['import_time_s'], results['import_time_s'])}"]
+    for result in results["results"]:
+        baseline_result = baseline_by_key.get((result["size"], result["cache"]))
+        if baseline_result is None:
+            continue
+        lines.append(f"{result['size']} packages, {result['cache']} cache:")
+        for metric in _COMPARED_METRICS:
+            lines.append(f"  {metric}: {_format_change(baseline_result.get(metric), result.get(metric))}")
+    return "\n".join(lines)
+
+
+def _format_change(old: float | None, new: float | None) -> str:
+    if old is None or new is None:
+        return f"{old} -> {new}"
+    change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+    return f"{old} -> {new} ({change})"
+
+
+def _get_git_commit() -> str | None:
+    result = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, cwd=_BENCHMARKS_DIR)
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--sizes",
+        type=lambda value: [int(size) for size in value.split(",")],
+        default=_DEFAULT_SIZES,
+        help="Comma-separated numbers of packages in the dependency graph (default: 10,100,1000).",
+    )
+    parser.add_argument("--repeat", type=int, default=1, help="Number of runs to take the median of (default: 1).")
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="File to write the results to (default: benchmarks/results/<timestamp>.json).",
+    )
+    parser.add_argument("--baseline", type=Path, default=None, help="Results of a previous run to compare with.")
+    args = parser.parse_args()
+
+    created = datetime.now(timezone.utc)
+    results = {
+        "created": created.isoformat(),
+        "git_commit": _get_git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "import_time_s": round(measure_import_time(), 3),
+        "results": [asdict(r) for r in run_benchmarks(args.sizes, args.repeat)],
+    }
+    output = args.output or _BENCHMARKS_DIR / "results" / f"{created:%Y%m%dT%H%M%SZ}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    print(f"Results written to {output}", file=sys.stderr)
+
+    if args.baseline is not None:
+        print(compare_with_baseline(results, json.loads(args.baseline.read_text())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""
+Local stand-in for the upstream services pipask talks to, serving a synthetic dependency graph.
+
+A single HTTP server answers for all upstream hosts and dispatches on the Host header:
+- PyPI simple index (HTML and JSON), JSON API, integrity API and distribution files
+- OSV, pypistats and GitHub APIs with benign responses
+
+Requests made directly to the server (e.g., with `--index-url http://127.0.0.1:<port>/simple`) are served as PyPI.
+"""
+
+import hashlib
+import io
+import json
+import re
+import threading
+import zipfile
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import cached_property
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PYPI_HOST = "pypi.org"
+FILES_HOST = "files.pythonhosted.org"
+UPSTREAM_HOSTS = {PYPI_HOST, FILES_HOST, "api.osv.dev", "pypistats.org", "api.github.com", "gitlab.com"}
+
+_UPLOAD_TIME = "2024-01-15T12:00:00.000000Z"
+_SIMPLE_JSON_CONTENT_TYPE = "application/vnd.pypi.simple.v1+json"
+
+
+@dataclass
+class SyntheticPackage:
+    name: str
+    version: str
+    dependencies: list[str] = field(default_factory=list)
+
+    @property
+    def wheel_filename(self) -> str:
+        return f"{self.name.replace('-', '_')}-{self.version}-py3-none-any.whl"
+
+    @cached_property
+    def metadata(self) -> bytes:
+        lines = [
+            "Metadata-Version: 2.1",
+            f"Name: {self.name}",
+            f"Version: {self.version}",
+            "Summary: Synthetic package for pipask benchmarks",
+            "License: MIT",
+            "Classifier: License :: OSI Approved :: MIT License",
+            f"Project-URL: Source, {self.repository_url}",
+            *[f"Requires-Dist: {dependency}" for dependency in self.dependencies],
+        ]
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+    @cached_property
+    def wheel(self) -> bytes:
+        dist_info = f"{self.name.replace('-', '_')}-{self.version}.dist-info"
+        files = {
+            f"{self.name.replace('-', '_')}.py": b"",
+            f"{dist_info}/METADATA": self.metadata,
+            f"{dist_info}/WHEEL": b"Wheel-Version: 1.0\nGenerator: pipask-benchmarks\nRoot-Is-Purelib: true\nTag: py3-none-any\n",
+        }
+        record = "".join(
+            f"{path},sha256={hashlib.sha256(content).hexdigest()},{len(content)}\n" for path, content in files.items()
+        )
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as wheel:
+            for path, content in files.items():
+                wheel.writestr(path, content)
+            wheel.writestr(f"{dist_info}/RECORD", record + f"{dist_info}/RECORD,,\n")
+        return buffer.getvalue()
+
+    @property
+    def repository_url(self) -> str:
+        return f"https://github.com/pipask-benchmarks/{self.name}"
+
+    @property
+    def file_path(self) -> str:
+        digest = hashlib.sha256(self.wheel).hexdigest()
+        return f"/packages/{digest[:2]}/{digest[2:4]}/{digest[4:]}/{self.wheel_filename}"
+
+
+def generate_dependency_graph(size: int) -> list[SyntheticPackage]:
+    """
+    Generate `size` packages where the first one (transitively) depends on all others.
+
+    Each package depends on its children in a binary tree plus one shared package further down,
+    so that the resolver sees the same requirement from multiple parents, like in real dependency graphs.
+    """
+    names = [f"bench-pkg-{i:04d}" for i in range(size)]
+    packages = []
+    for i, name in enumerate(names):
+        dependency_indexes = {child for child in (2 * i + 1, 2 * i + 2) if child < size}
+        if (shared := (7 * i + 3) % size) > i:
+            dependency_indexes.add(shared)
+        dependencies = [f"{names[d]}>=1.0" for d in sorted(dependency_indexes)]
+        packages.append(SyntheticPackage(name=name, version="1.0.0", dependencies=dependencies))
+    return packages
+
+
+class StubUpstreamServer:
+    """Threaded HTTP server serving the synthetic packages; counts requests per upstream host."""
+
+    def __init__(self, packages: list[SyntheticPackage]):
+        self.packages_by_name = {p.name: p for p in packages}
+        self.packages_by_path = {p.file_path: p for p in packages}
+        self.request_counts: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count_request(self, host: str) -> None:
+        with self._lock:
+            self.request_counts[host] += 1
+
+    def reset_request_counts(self) -> None:
+        with self._lock:
+            self.request_counts.clear()
+
+    def __enter__(self) -> "StubUpstreamServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def _make_handler(stub: StubUpstreamServer) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self) -> None:
+            self._dispatch()
+
+        def do_POST(self) -> None:
+            self.rfile.read(int(self.headers.get("Content-Length", "0")))
+            self._dispatch()
+
+        def log_message(self, format: str, *args) -> None:
+            pass  # Keep the benchmark output readable
+
+        def _dispatch(self) -> None:
+            host = (self.headers.get("Host") or "").split(":")[0]
+            host = host if host in UPSTREAM_HOSTS else PYPI_HOST
+            stub.count_request(host)
+            handler = _HOST_HANDLERS.get(host, _handle_pypi)
+            status, content_type, body = handler(stub, self.command, self.path, self.headers.get("Accept", ""))
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "max-age=600, public")  # Like PyPI
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+
+_Response = tuple[int, str, bytes]
+_NOT_FOUND: _Response = (HTTPStatus.NOT_FOUND, "application/json", b'{"message": "Not Found"}')
+
+
+def _json(data: object, content_type: str = "application/json") -> _Response:
+    return HTTPStatus.OK, content_type, json.dumps(data).encode("utf-8")
+
+
+def _file_info(stub_package: SyntheticPackage) -> dict:
+    return {
+        "filename": stub_package.wheel_filename,
+        "url": f"https://{FILES_HOST}{stub_package.file_path}",
+        "upload_time_iso_8601": _UPLOAD_TIME,
+        "yanked": False,
+        "digests": {"sha256": hashlib.sha256(stub_package.wheel).hexdigest()},
+    }
+
+
+def _project_info(stub_package: SyntheticPackage) -> dict:
+    return {
+        "name": stub_package.name,
+        "version": stub_package.version,
+        "license": "MIT",
+        "classifiers": ["License :: OSI Approved :: MIT License"],
+        "project_urls": {"Source": stub_package.repository_url},
+        "requires_dist": stub_package.dependencies,
+        "summary": "Synthetic package for pipask benchmarks",
+    }
+
+
+def _handle_pypi(stub: StubUpstreamServer, method: str, path: str, accept: str) -> _Response:
+    path = path.split("?")[0]
+    if (match := re.fullmatch(r"/simple/([^/]+)/?", path)) is not None:
+        stub_package = stub.packages_by_name.get(match.group(1))
+        return _simple_page(stub_package, accept) if stub_package is not None else _NOT_FOUND
+    if (match := re.fullmatch(r"/pypi/([^/]+)/json", path)) is not None:
+        stub_package = stub.packages_by_name.get(match.group(1))
+        if stub_package is None:
+            return _NOT_FOUND
+        return _json(
+            {"info": _project_info(stub_package), "releases": {stub_package.version: [_file_info(stub_package)]}}
+        )
+    if (match := re.fullmatch(r"/pypi/([^/]+)/([^/]+)/json", path)) is not None:
+        stub_package = stub.packages_by_name.get(match.group(1))
+        if stub_package is None or stub_package.version != match.group(2):
+            return _NOT_FOUND
+        return _json({"info": _project_info(stub_package), "urls": [_file_info(stub_package)], "vulnerabilities": []})
+    if path.startswith("/packages/"):
+        return _handle_files(stub, method, path, accept)
+    return _NOT_FOUND  # Including the integrity API, as if no attestations were published
+
+
+def _simple_page(stub_package: SyntheticPackage, accept: str) -> _Response:
+    wheel_hash = hashlib.sha256(stub_package.wheel).hexdigest()
+    metadata_hash = hashlib.sha256(stub_package.metadata).hexdigest()
+    if _SIMPLE_JSON_CONTENT_TYPE in accept:
+        return _json(
+            {
+                "meta": {"api-version": "1.1"},
+                "name": stub_package.name,
+                "versions": [stub_package.version],
+                "files": [
+                    {
+                        "filename": stub_package.wheel_filename,
+                        "url": stub_package.file_path,
+                        "hashes": {"sha256": wheel_hash},
+                        "core-metadata": {"sha256": metadata_hash},
+                        "upload-time": _UPLOAD_TIME,
+                    }
+                ],
+            },
+            content_type=_SIMPLE_JSON_CONTENT_TYPE,
+        )
+    html = (
+        "<!DOCTYPE html><html><body>"
+        f'<a href="{stub_package.file_path}#sha256={wheel_hash}" data-core-metadata="sha256={metadata_hash}">'
+        f"{stub_package.wheel_filename}</a></body></html>"
+    )
+    return HTTPStatus.OK, "text/html", html.encode("utf-8")
+
+
+def _handle_files(stub: StubUpstreamServer, method: str, path: str, accept: str) -> _Response:
+    path = path.split("?")[0]
+    if path.endswith(".metadata") and (stub_package := stub.packages_by_path.get(path.removesuffix(".metadata"))):
+        return HTTPStatus.OK, "application/octet-stream", stub_package.metadata
+    if (stub_package := stub.packages_by_path.get(path)) is not None:
+        return HTTPStatus.OK, "application/octet-stream", stub_package.wheel
+    return _NOT_FOUND
+
+
+def _handle_osv(stub: StubUpstreamServer, method: str, path: str, accept: str) -> _Response:
+    if method == "POST" and path == "/v1/querybatch":
+        return _json({"results": []})
+    return _NOT_FOUND
+
+
+def _handle_pypistats(stub: StubUpstreamServer, method: str, path: str, accept: str) -> _Response:
+    if (match := re.fullmatch(r"/api/packages/([^/]+)/recent", path)) is None:
+        return _NOT_FOUND
+    data = {"last_day": 10_000, "last_week": 70_000, "last_month": 300_000}
+    return _json({"data": data, "package": match.group(1), "type": "recent_downloads"})
+
+
+def _handle_github(stub: StubUpstreamServer, method: str, path: str, accept: str) -> _Response:
+    if re.fullmatch(r"/repos/[^/]+/[^/]+", path) is None:
+        return _NOT_FOUND
+    return _json({"stargazers_count": 5_000})
+
+
+_HOST_HANDLERS = {
+    PYPI_HOST: _handle_pypi,
+    FILES_HOST: _handle_files,
+    "api.osv.dev": _handle_osv,
+    "pypistats.org": _handle_pypistats,
+    "api.github.com": _handle_github,
+}
@@ -18,8 +18,13 @@ from packaging.version import Version
 from pipask._vendor.pip._internal.cli.spinners import open_spinner
 from pipask._vendor.pip._internal.locations import get_platlib, get_purelib, get_scheme
 from pipask._vendor.pip._internal.metadata import get_default_environment, get_environment
-from pipask._vendor.pip._internal.utils.subprocess import call_subprocess
+from pipask._vendor.pip._internal.utils.subprocess import (
+    call_subprocess,
+    get_thread_environ,
+    set_thread_environ,
+)
 from pipask._vendor.pip._internal.utils.temp_dir import TempDirectory, tempdir_kinds
+from pipask.infra.parallel_builds import is_capturing_build_output
 from pipask.infra.sys_values import get_pip_sys_values
 
 if TYPE_CHECKING:
@@ -135,8 +140,13 @@ class BuildEnvironment:
             )
 
     def __enter__(self) -> None:
+        # MODIFIED for pipask: concurrent builds must not change os.environ shared by all threads,
+        #     their build environment is set only for subprocesses started by the building thread
+        self._isolate_thread = is_capturing_build_output()
+        self._save_thread_env = get_thread_environ()
+        current_env = {**os.environ, **self._save_thread_env}
         self._save_env = {
-            name: os.environ.get(name, None)
+            name: current_env.get(name, None)
             for name in ("PATH", "PYTHONNOUSERSITE", "PYTHONPATH")
         }
 
@@ -147,13 +157,15 @@ class BuildEnvironment:
 
         pythonpath = [self._site_dir]
 
-        os.environ.update(
-            {
-                "PATH": os.pathsep.join(path),
-                "PYTHONNOUSERSITE": "1",
-                "PYTHONPATH": os.pathsep.join(pythonpath),
-            }
-        )
+        build_env = {
+            "PATH": os.pathsep.join(path),
+            "PYTHONNOUSERSITE": "1",
+            "PYTHONPATH": os.pathsep.join(pythonpath),
+        }
+        if self._isolate_thread:  # MODIFIED for pipask
+            set_thread_environ({**self._save_thread_env, **build_env})
+        else:
+            os.environ.update(build_env)
 
     def __exit__(
         self,
@@ -161,6 +173,9 @@ class BuildEnvironment:
         exc_val: Optional[BaseException],
         exc_tb: Optional[TracebackType],
     ) -> None:
+        if self._isolate_thread:  # MODIFIED for pipask
+            set_thread_environ(self._save_thread_env)
+            return
         for varname, old_value in self._save_env.items():
             if old_value is None:
                 os.environ.pop(varname, None)
@@ -7,6 +7,7 @@ from typing import IO, Generator, Optional
 
 from pipask._vendor.pip._internal.utils.compat import WINDOWS
 from pipask._vendor.pip._internal.utils.logging import get_indentation
+from pipask.infra.parallel_builds import is_capturing_build_output
 
 logger = logging.getLogger(__name__)
 
@@ -119,7 +120,8 @@ def open_spinner(message: str) -> Generator[SpinnerInterface, None, None]:
     # i.e. it's only displayed if we're at level INFO or better.
     # Non-interactive spinner goes through the logging system, so it is always
     # in sync with logging configuration.
-    if sys.stdout.isatty() and logger.getEffectiveLevel() <= logging.INFO:
+    # MODIFIED for pipask: concurrent builds would overwrite each other's interactive spinners
+    if sys.stdout.isatty() and logger.getEffectiveLevel() <= logging.INFO and not is_capturing_build_output():
         spinner: SpinnerInterface = InteractiveSpinner(message)
     else:
         spinner = NonInteractiveSpinner(message)
@@ -31,18 +31,20 @@ def _should_use_importlib_metadata() -> bool:
 
     By default, pip uses ``importlib.metadata`` on Python 3.11+, and
     ``pkg_resourcess`` otherwise. This can be overridden by a couple of ways:
+    (MODIFIED for pipask: ``importlib.metadata`` is used on Python 3.10 as well, since importing
+    ``pkg_resources`` scans the whole environment.)
 
     * If environment variable ``_PIP_USE_IMPORTLIB_METADATA`` is set, it
       dictates whether ``importlib.metadata`` is used, regardless of Python
       version.
-    * On Python 3.11+, Python distributors can patch ``importlib.metadata``
+    * On Python 3.10+, Python distributors can patch ``importlib.metadata``
       to add a global constant ``_PIP_USE_IMPORTLIB_METADATA = False``. This
       makes pip use ``pkg_resources`` (unless the user set the aforementioned
       environment variable to *True*).
     """
     with contextlib.suppress(KeyError, ValueError):
         return bool(strtobool(os.environ["_PIP_USE_IMPORTLIB_METADATA"]))
-    if sys.version_info < (3, 11):
+    if sys.version_info < (3, 10):  # MODIFIED for pipask
         return False
     import importlib.metadata
 
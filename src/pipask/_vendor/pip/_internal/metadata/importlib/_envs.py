@@ -6,7 +6,8 @@ import pathlib
 import sys
 import zipfile
 import zipimport
-from typing import Iterator, List, Optional, Sequence, Set, Tuple
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
 
 from packaging.utils import NormalizedName, canonicalize_name
 
@@ -32,6 +33,23 @@ def _looks_like_wheel(location: str) -> bool:
     return zipfile.is_zipfile(location)
 
 
+# MODIFIED for pipask
+def _zip_may_contain_eggs(location: str) -> bool:
+    """Whether pkg_resources.find_eggs_in_zip() can find anything in the archive, without importing pkg_resources."""
+    if location.endswith(".whl"):
+        return False
+    try:
+        with zipfile.ZipFile(location) as zf:
+            names = zf.namelist()
+    except (OSError, zipfile.BadZipFile):
+        return True  # Let pkg_resources decide
+    for name in names:
+        top_level = name.split("/", 1)[0].lower()
+        if top_level == "egg-info" or top_level.endswith((".egg", ".egg-info", ".dist-info")):
+            return True
+    return False
+
+
 class _DistributionFinder:
     """Finder to locate distributions.
 
@@ -109,18 +127,26 @@ class _DistributionFinder:
                 yield Distribution(dist, info_location, path)
 
     def _find_eggs_in_dir(self, location: str) -> Iterator[BaseDistribution]:
+        # MODIFIED for pipask: pkg_resources (slow to import) is imported only once an egg is found
+        with os.scandir(location) as it:
+            egg_paths = [entry.path for entry in it if entry.name.endswith(".egg")]
+        if not egg_paths:
+            return
+
         from pipask._vendor.pip._vendor.pkg_resources import find_distributions
 
         from pipask._vendor.pip._internal.metadata import pkg_resources as legacy
 
-        with os.scandir(location) as it:
-            for entry in it:
-                if not entry.name.endswith(".egg"):
-                    continue
-                for dist in find_distributions(entry.path):
-                    yield legacy.Distribution(dist)
+        for egg_path in egg_paths:
+            for dist in find_distributions(egg_path):
+                yield legacy.Distribution(dist)
 
     def _find_eggs_in_zip(self, location: str) -> Iterator[BaseDistribution]:
+        # MODIFIED for pipask: pkg_resources (slow to import) is imported only if the archive
+        # can contain distributions (e.g., not for the zipped standard library)
+        if not _zip_may_contain_eggs(location):
+            return
+
         from pipask._vendor.pip._vendor.pkg_resources import find_eggs_in_zip
 
         from pipask._vendor.pip._internal.metadata import pkg_resources as legacy
@@ -157,6 +183,35 @@ def _emit_egg_deprecation(location: Optional[str]) -> None:
     )
 
 
+# MODIFIED for pipask: Installed distributions indexed by name, shared by all Environment instances with the same paths.
+# The index is rebuilt when any of the paths is modified (e.g., a distribution is installed into a build environment).
+_IndexSignature = Tuple[Optional[int], ...]
+_MAX_INDEXED_ENVIRONMENTS = 16
+
+
+class _DistributionIndex:
+    def __init__(self, signature: _IndexSignature, distributions: List[BaseDistribution]) -> None:
+        self.signature = signature
+        self.distributions = distributions
+        self.by_name: Dict[NormalizedName, BaseDistribution] = {}
+        for dist in distributions:
+            # The first one wins, same as when iterating over the paths in order
+            self.by_name.setdefault(dist.canonical_name, dist)
+
+
+_distribution_indexes: "OrderedDict[Tuple[str, ...], _DistributionIndex]" = OrderedDict()
+
+
+def _get_paths_signature(paths: Sequence[str]) -> _IndexSignature:
+    signature = []
+    for path in paths:
+        try:
+            signature.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+
 class Environment(BaseEnvironment):
     def __init__(self, paths: Sequence[str]) -> None:
         self._paths = paths
@@ -181,10 +236,21 @@ class Environment(BaseEnvironment):
             # This must go last because that's how pkg_resources tie-breaks.
             yield from finder.find_linked(location)
 
+    # MODIFIED for pipask: Use the shared index instead of scanning all paths for every lookup
+    def _get_index(self) -> _DistributionIndex:
+        key = tuple(self._paths)
+        signature = _get_paths_signature(self._paths)
+        index = _distribution_indexes.get(key)
+        if index is None or index.signature != signature:
+            index = _DistributionIndex(signature, list(super().iter_all_distributions()))
+            _distribution_indexes[key] = index
+            if len(_distribution_indexes) > _MAX_INDEXED_ENVIRONMENTS:
+                _distribution_indexes.popitem(last=False)
+        _distribution_indexes.move_to_end(key)
+        return index
+
+    def iter_all_distributions(self) -> Iterator[BaseDistribution]:
+        return iter(self._get_index().distributions)
+
     def get_distribution(self, name: str) -> Optional[BaseDistribution]:
-        matches = (
-            distribution
-            for distribution in self.iter_all_distributions()
-            if distribution.canonical_name == canonicalize_name(name)
-        )
-        return next(matches, None)
+        return self._get_index().by_name.get(canonicalize_name(name))
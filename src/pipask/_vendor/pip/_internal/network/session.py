@@ -49,6 +49,9 @@ from pipask._vendor.pip._internal.utils.compat import has_tls
 from pipask._vendor.pip._internal.utils.glibc import libc_ver
 from pipask._vendor.pip._internal.utils.misc import build_url_from_netloc, parse_netloc
 from pipask._vendor.pip._internal.utils.urls import url_to_path
+from pipask.infra.cassette import wrap_requests_adapter
+from pipask.metrics import record_requests_response
+from pipask.tracing import trace_requests_response
 
 if TYPE_CHECKING:
     from ssl import SSLContext
@@ -334,6 +337,8 @@ class PipSession(requests.Session):
             HTTPS.
         """
         super().__init__(*args, **kwargs)
+        self.hooks["response"].append(trace_requests_response)  # MODIFIED for pipask
+        self.hooks["response"].append(record_requests_response)  # MODIFIED for pipask
 
         # Namespace the attribute with "pip_" just in case to prevent
         # possible conflicts with the base class.
@@ -399,6 +404,10 @@ class PipSession(requests.Session):
         for host in trusted_hosts:
             self.add_trusted_host(host, suppress_logging=True)
 
+    def mount(self, prefix: str, adapter: BaseAdapter) -> None:  # MODIFIED for pipask
+        # Record or replay HTTP exchanges if requested (all adapters, including those for trusted hosts, are mounted here)
+        super().mount(prefix, wrap_requests_adapter(adapter))
+
     def update_index_urls(self, new_index_urls: List[str]) -> None:
         """
         :param new_index_urls: New index urls to update the authentication
@@ -2,6 +2,7 @@ import contextlib
 import hashlib
 import logging
 import os
+import threading
 from types import TracebackType
 from typing import Dict, Generator, Optional, Set, Type, Union
 
@@ -67,6 +68,8 @@ class BuildTracker:
     def __init__(self, root: str) -> None:
         self._root = root
         self._entries: Dict[TrackerId, InstallRequirement] = {}
+        # MODIFIED for pipask: requirements may be tracked by concurrent builds
+        self._lock = threading.Lock()
         logger.debug("Created build tracker: %s", self._root)
 
     def __enter__(self) -> "BuildTracker":
@@ -88,6 +91,10 @@ class BuildTracker:
     def add(self, req: InstallRequirement, key: TrackerId) -> None:
         """Add an InstallRequirement to build tracking."""
 
+        with self._lock:  # MODIFIED for pipask
+            self._add(req, key)
+
+    def _add(self, req: InstallRequirement, key: TrackerId) -> None:
         # Get the file to write information about this requirement.
         entry_path = self._entry_path(key)
 
@@ -116,8 +123,9 @@ class BuildTracker:
         """Remove an InstallRequirement from build tracking."""
 
         # Delete the created file and the corresponding entry.
-        os.unlink(self._entry_path(key))
-        del self._entries[key]
+        with self._lock:  # MODIFIED for pipask
+            os.unlink(self._entry_path(key))
+            del self._entries[key]
 
         logger.debug("Removed %s from build tracker %r", req, self._root)
 
@@ -7,6 +7,7 @@
 import mimetypes
 import os
 import shutil
+import threading
 from pathlib import Path
 from typing import Dict, Iterable, List, Optional
 
@@ -273,6 +274,15 @@ class RequirementPreparer:
         # Previous "header" printed for a link-based InstallRequirement
         self._previous_requirement_header = ("", "")
 
+        # MODIFIED for pipask: metadata of source distributions may be prepared concurrently
+        #     (see Factory._prepare_root_link_candidates()); everything except the build itself,
+        #     which mostly waits for subprocesses, is serialized, because it uses the shared state above,
+        #     the session (which may prompt for credentials) and the download directory;
+        #     the build itself uses the build tracker (locked), the build environment (set per thread,
+        #     see BuildEnvironment.__enter__()), the finder (only read) and the global temp dir manager
+        #     (only appended to, which is atomic)
+        self._lock = threading.Lock()
+
     def _log_preparing_link(self, req: InstallRequirement) -> None:
         """Provide context for the requirement being prepared."""
         if req.link.is_file and not req.is_wheel_from_cache:
@@ -495,6 +505,19 @@ class RequirementPreparer:
         self, req: InstallRequirement, parallel_builds: bool = False
     ) -> BaseDistribution:
         """Prepare a requirement to be obtained from req.link."""
+        assert req.link
+        with self._lock:  # MODIFIED for pipask
+            metadata_dist = self._prepare_linked_requirement_without_build(req)
+        if metadata_dist is not None:
+            return metadata_dist
+        # None of the optimizations worked, fully prepare the requirement
+        with indent_log():
+            return self._prepare_linked_requirement(req, parallel_builds)
+
+    # MODIFIED for pipask: split from prepare_linked_requirement() to be run under the lock
+    def _prepare_linked_requirement_without_build(
+        self, req: InstallRequirement
+    ) -> Optional[BaseDistribution]:
         assert req.link
         self._log_preparing_link(req)
         with indent_log():
@@ -529,9 +552,7 @@ class RequirementPreparer:
                     # req.needs_more_preparation = True
                     req.metadata_distribution = metadata_dist
                     return metadata_dist
-
-            # None of the optimizations worked, fully prepare the requirement
-            return self._prepare_linked_requirement(req, parallel_builds)
+        return None
 
     def prepare_linked_requirements_more(
         self, reqs: Iterable[InstallRequirement], parallel_builds: bool = False
@@ -566,6 +587,23 @@ class RequirementPreparer:
     def _prepare_linked_requirement(
         self, req: InstallRequirement, parallel_builds: bool
     ) -> BaseDistribution:
+        with self._lock:  # MODIFIED for pipask
+            self._download_linked_requirement(req, parallel_builds)
+
+        dist = _get_prepared_distribution(
+            req,
+            self.build_tracker,
+            self.finder,
+            self.build_isolation,
+            self.check_build_deps,
+            self._session # MODIFIED for pipask: added argument
+        )
+        return dist
+
+    # MODIFIED for pipask: split from _prepare_linked_requirement() to be run under the lock
+    def _download_linked_requirement(
+        self, req: InstallRequirement, parallel_builds: bool
+    ) -> None:
         assert req.link
         link = req.link
 
@@ -646,16 +684,6 @@ class RequirementPreparer:
         if local_file:
             req.local_file_path = local_file.path
 
-        dist = _get_prepared_distribution(
-            req,
-            self.build_tracker,
-            self.finder,
-            self.build_isolation,
-            self.check_build_deps,
-            self._session # MODIFIED for pipask: added argument
-        )
-        return dist
-
     def save_linked_requirement(self, req: InstallRequirement) -> None:
         assert self.download_dir is not None
         assert req.link is not None
@@ -698,8 +726,9 @@ class RequirementPreparer:
                     "requiring hashes, because there is no single file to "
                     "hash."
                 )
-            req.ensure_has_source_dir(self.src_dir)
-            req.update_editable()
+            with self._lock:  # MODIFIED for pipask
+                req.ensure_has_source_dir(self.src_dir)
+                req.update_editable()
             assert req.source_dir
             req.download_info = direct_url_for_editable(req.unpacked_source_directory)
 
@@ -49,6 +49,8 @@ from pipask._vendor.pip._internal.utils.compatibility_tags import get_supported
 from pipask._vendor.pip._internal.utils.hashes import Hashes
 from pipask._vendor.pip._internal.utils.packaging import get_requirement
 from pipask._vendor.pip._internal.utils.virtualenv import running_under_virtualenv
+from pipask.code_execution_guard import PackageCodeExecutionGuard
+from pipask.infra.parallel_builds import prepare_concurrently
 
 from .base import Candidate, CandidateVersion, Constraint, Requirement
 from .candidates import (
@@ -516,6 +518,7 @@ class Factory:
         self, root_ireqs: List[InstallRequirement]
     ) -> CollectedRootRequirements:
         collected = CollectedRootRequirements([], {}, {})
+        self._prepare_root_link_candidates(root_ireqs)  # MODIFIED for pipask
         for i, ireq in enumerate(root_ireqs):
             if ireq.constraint:
                 # Ensure we only accept valid constraints
@@ -554,6 +557,45 @@ class Factory:
         collected.requirements.sort(key=lambda r: r.name != r.project_name)
         return collected
 
+    # MODIFIED for pipask: A new method
+    def _prepare_root_link_candidates(self, root_ireqs: List[InstallRequirement]) -> None:
+        """Prepare candidates of requirements with (non-wheel) links concurrently.
+
+        Metadata of source distributions is prepared one by one until the user allows
+        3rd party code execution (the first build asks), and the rest concurrently.
+        The candidates are cached, so collect_root_requirements() reuses them.
+
+        Source distributions found on the index are not prepared this way: resolvelib
+        pins one candidate at a time, and which version of which project is needed next
+        depends on the metadata of the candidates pinned so far (and on backtracking).
+        Preparing them ahead would build (i.e., run code of) candidates that may never
+        be selected.
+
+        Concurrent calls only touch the caches below under distinct links (each link is
+        prepared once), which is safe for dicts; the shared state of the preparer
+        (and its session) is serialized by the preparer itself, except for the builds.
+        """
+        ireqs_by_link: Dict[Link, InstallRequirement] = {}
+        for ireq in root_ireqs:
+            if ireq.constraint or not ireq.link or ireq.link.is_wheel:
+                continue
+            if ireq.match_markers() and ireq.link not in ireqs_by_link:
+                ireqs_by_link[ireq.link] = ireq
+
+        def prepare(ireq: InstallRequirement) -> None:
+            assert ireq.link is not None
+            self._make_base_candidate_from_link(
+                ireq.link,
+                template=install_req_drop_extras(ireq) if ireq.extras else ireq,
+                name=canonicalize_name(ireq.name) if ireq.name else None,
+                version=None,
+            )
+
+        pending = list(ireqs_by_link.values())
+        while pending and not PackageCodeExecutionGuard.is_execution_allowed():
+            prepare(pending.pop(0))
+        prepare_concurrently(pending, prepare)
+
     def make_requirement_from_candidate(
         self, candidate: Candidate
     ) -> ExplicitRequirement:
@@ -22,6 +22,7 @@ from pipask._vendor.pip._internal.resolution.resolvelib.reporter import (
     PipReporter,
 )
 from pipask._vendor.pip._internal.utils.packaging import get_requirement
+from pipask.tracing import TracingReporter, is_tracing_enabled
 
 from .base import Candidate, Requirement
 from .factory import Factory
@@ -85,6 +86,8 @@ class Resolver(BaseResolver):
             reporter: BaseReporter = PipDebuggingReporter()
         else:
             reporter = PipReporter()
+        if is_tracing_enabled():  # MODIFIED for pipask
+            reporter = TracingReporter(reporter)
         resolver: RLResolver[Requirement, Candidate, str] = RLResolver(
             provider,
             reporter,
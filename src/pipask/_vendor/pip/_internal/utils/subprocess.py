@@ -2,10 +2,12 @@ import logging
 import os
 import shlex
 import subprocess
+import threading
 from typing import (
     TYPE_CHECKING,
     Any,
     Callable,
+    Dict,
     Iterable,
     List,
     Mapping,
@@ -28,6 +30,19 @@ if TYPE_CHECKING:
 
 CommandArgs = List[Union[str, HiddenText]]
 
+# MODIFIED for pipask: environment variables of subprocesses started by the current thread only;
+#     concurrent builds (see pipask.infra.parallel_builds) set their build environment here,
+#     because os.environ is shared by all threads
+_thread_environ = threading.local()
+
+
+def get_thread_environ() -> Dict[str, str]:
+    return getattr(_thread_environ, "overrides", {})
+
+
+def set_thread_environ(overrides: Dict[str, str]) -> None:
+    _thread_environ.overrides = overrides
+
 
 def make_command(*args: Union[str, HiddenText, CommandArgs]) -> CommandArgs:
     """
@@ -133,6 +148,7 @@ def call_subprocess(
 
     log_subprocess("Running command %s", command_desc)
     env = os.environ.copy()
+    env.update(get_thread_environ())  # MODIFIED for pipask
     if extra_environ:
         env.update(extra_environ)
     for name in unset_environ:
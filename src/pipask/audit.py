@@ -0,0 +1,232 @@
+import asyncio
+import hashlib
+import logging
+import os
+from contextlib import aclosing
+from datetime import datetime, timezone
+from optparse import OptionParser, Values
+from pathlib import Path
+
+from pydantic import BaseModel, Field, ValidationError
+from rich.console import Console
+
+from pipask._vendor.pip._internal.locations import USER_CACHE_DIR
+from pipask.checks.types import CheckResult, CheckResultType, PackageCheckResults
+from pipask.checks.vulnerabilities import ReleaseVulnerabilityChecker
+from pipask.cli_helpers import CheckTask, SimpleTaskProgress
+from pipask.exception import PipaskException
+from pipask.infra.cache import get_pipask_cache_dir
+from pipask.infra.installed_distributions import InstalledDistribution, get_installed_distributions
+from pipask.infra.pypi import PypiClient
+from pipask.infra.sys_values import get_pip_sys_values
+from pipask.infra.vulnerability_details import OsvVulnerabilityDetailsService
+from pipask.report import FAILED_CHECKS_EXIT_CODE, print_audit_report
+from pipask.utils import create_httpx_client
+
+logger = logging.getLogger(__name__)
+
+
+class _AuditedDistribution(BaseModel):
+    version: str
+    fingerprint: str
+    results: list[CheckResult]
+
+
+class AuditState(BaseModel):
+    """Results of the last audit of an environment, used to only re-check what changed since then."""
+
+    last_run: datetime | None = None
+    distributions: dict[str, _AuditedDistribution] = Field(default_factory=dict)
+
+
+def parse_audit_arguments(args: list[str]) -> Values:
+    parser = OptionParser(prog="pipask audit", usage="%prog --installed [options]")
+    parser.add_option(
+        "--installed", action="store_true", default=False, help="Audit distributions installed in the environment."
+    )
+    parser.add_option(
+        "--full", action="store_true", default=False, help="Re-check all distributions, not only the changed ones."
+    )
+    parser.add_option(
+        "--cache-dir", dest="cache_dir", default=USER_CACHE_DIR, metavar="dir", help="Store the cache data in <dir>."
+    )
+    parser.add_option(
+        "--no-cache-dir", dest="cache_dir", action="store_false", help="Disable the cache (audits everything)."
+    )
+    parser.add_option(
+        "--proxy",
+        dest="proxy",
+        default="",
+        help="Specify a proxy in the form scheme://[user:passwd@]proxy.server:port.",
+    )
+    options, remaining_args = parser.parse_args(args)
+    if remaining_args:
+        parser.error(f"unexpected arguments: {' '.join(remaining_args)}")
+    if not options.installed:
+        parser.error("only auditing of installed distributions is supported, use --installed")
+    return options
+
+
+def run_audit(args: list[str], console: Console) -> None:
+    options = parse_audit_arguments(args)
+    cache_dir = get_pipask_cache_dir(options)
+    state_file = _get_state_file(cache_dir) if cache_dir is not None else None
+    previous_state = load_audit_state(state_file) if state_file is not None and not options.full else AuditState()
+
+    with SimpleTaskProgress(console=console) as progress:
+        installed_task = progress.add_task("Listing installed distributions")
+        installed_distributions = get_installed_distributions()
+        installed_task.update(True)
+        check_results, new_state = asyncio.run(
+            audit_installed_distributions(installed_distributions, previous_state, options, progress)
+        )
+
+    if state_file is not None:
+        save_audit_state(state_file, new_state)
+    checked_names = {r.name for r in check_results}
+    all_results = check_results + _results_from_state(new_state, exclude=checked_names)
+    print_audit_report(sorted(all_results, key=lambda r: r.name), len(check_results), console)
+    if any(result.result_type is CheckResultType.FAILURE for p in all_results for result in p.results):
+        raise SystemExit(FAILED_CHECKS_EXIT_CODE)
+
+
+def find_distributions_to_check(
+    installed_distributions: list[InstalledDistribution], previous_state: AuditState
+) -> list[InstalledDistribution]:
+    """Return distributions that are new or have changed since the last audit."""
+    to_check = []
+    for dist in installed_distributions:
+        previous = previous_state.distributions.get(dist.name)
+        if previous is None or previous.version != dist.version or previous.fingerprint != dist.fingerprint:
+            to_check.append(dist)
+    return to_check
+
+
+async def audit_installed_distributions(
+    installed_distributions: list[InstalledDistribution],
+    previous_state: AuditState,
+    options: Values,
+    progress: SimpleTaskProgress,
+) -> tuple[list[PackageCheckResults], AuditState]:
+    """
+    Check vulnerabilities of the distributions that changed since the last audit,
+    and of the unchanged ones that have vulnerability data published after the last audit.
+
+    :return: check results for distributions that were checked, and the state to persist for the next run
+    """
+    audit_start = datetime.now(timezone.utc)
+    async with (
+        aclosing(create_httpx_client(options)) as httpx_client,
+        aclosing(PypiClient(httpx_client)) as pypi_client,
+        aclosing(OsvVulnerabilityDetailsService(httpx_client)) as vulnerability_details_service,
+    ):
+        to_check = find_distributions_to_check(installed_distributions, previous_state)
+        changed_releases = {(d.name, d.version) for d in to_check}
+        unchanged = [d for d in installed_distributions if (d.name, d.version) not in changed_releases]
+        if previous_state.last_run is not None and len(unchanged):
+            updated_releases = await vulnerability_details_service.get_vulnerabilities_modified_after(
+                [(d.name, d.version) for d in unchanged], previous_state.last_run
+            )
+            to_check += [d for d in unchanged if (d.name, d.version) in updated_releases]
+
+        checker = ReleaseVulnerabilityChecker(vulnerability_details_service)
+        progress_task = progress.add_task(checker.description, total=len(to_check))
+        check_results = await asyncio.gather(
+            *[_check_distribution(dist, pypi_client, checker, progress_task) for dist in to_check],
+            return_exceptions=True,
+        )
+
+    new_state = AuditState(last_run=audit_start)
+    results_by_name = {dist.name: result for dist, result in zip(to_check, check_results)}
+    for dist in installed_distributions:
+        if dist.name in results_by_name:
+            result = results_by_name[dist.name]
+            if isinstance(result, BaseException):
+                continue  # The check failed, leave it out so that it is retried on the next run
+            new_state.distributions[dist.name] = _AuditedDistribution(
+                version=dist.version, fingerprint=dist.fingerprint, results=result.results
+            )
+        elif (previous := previous_state.distributions.get(dist.name)) is not None:
+            new_state.distributions[dist.name] = previous
+    return [
+        _failed_check_result(dist, f"Check failed: {result}") if isinstance(result, BaseException) else result
+        for dist, result in zip(to_check, check_results)
+    ], new_state
+
+
+async def _check_distribution(
+    dist: InstalledDistribution,
+    pypi_client: PypiClient,
+    checker: ReleaseVulnerabilityChecker,
+    progress_task: CheckTask,
+) -> PackageCheckResults:
+    try:
+        vulnerabilities = await pypi_client.get_release_vulnerabilities(dist.name, dist.version)
+        if vulnerabilities is None:
+            result = CheckResult(
+                result_type=CheckResultType.NEUTRAL,
+                message="Release not found in PyPI, no vulnerability information available",
+            )
+        else:
+            result = await checker.check_vulnerabilities(vulnerabilities)
+    except Exception:
+        logger.debug(f"Error checking vulnerabilities for {dist.name}=={dist.version}", exc_info=True)
+        progress_task.update(CheckResultType.FAILURE)
+        raise
+    progress_task.update(result.result_type)
+    return PackageCheckResults(
+        name=dist.name,
+        version=dist.version,
+        results=[result],
+        pypi_url=f"https://pypi.org/project/{dist.name}/{dist.version}/",
+        is_transitive_dependency=False,
+    )
+
+
+def _failed_check_result(dist: InstalledDistribution, message: str) -> PackageCheckResults:
+    return PackageCheckResults(
+        name=dist.name,
+        version=dist.version,
+        results=[CheckResult(result_type=CheckResultType.FAILURE, message=message)],
+        is_transitive_dependency=False,
+    )
+
+
+def _results_from_state(state: AuditState, exclude: set[str]) -> list[PackageCheckResults]:
+    return [
+        PackageCheckResults(
+            name=name,
+            version=audited.version,
+            results=audited.results,
+            pypi_url=f"https://pypi.org/project/{name}/{audited.version}/",
+            is_transitive_dependency=False,
+        )
+        for name, audited in state.distributions.items()
+        if name not in exclude
+    ]
+
+
+def _get_state_file(cache_dir: Path) -> Path:
+    sys_values = get_pip_sys_values()
+    environment_id = hashlib.sha256(sys_values.prefix.encode("utf-8")).hexdigest()[:16]
+    return cache_dir / "audit" / f"{environment_id}.json"
+
+
+def load_audit_state(state_file: Path) -> AuditState:
+    try:
+        return AuditState.model_validate_json(state_file.read_bytes())
+    except FileNotFoundError:
+        return AuditState()
+    except (OSError, ValidationError):
+        logger.debug(f"Ignoring invalid audit state in {state_file}", exc_info=True)
+        return AuditState()
+
+
+def save_audit_state(state_file: Path, state: AuditState) -> None:
+    try:
+        state_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = state_file.with_suffix(".tmp")
+        tmp_file.write_text(state.model_dump_json(), encoding="utf-8")
+        os.replace(tmp_file, state_file)
+    except OSError as e:
+        raise PipaskException(f"Could not save audit state to {state_file}: {e}") from e
@@ -0,0 +1,118 @@
+"""
+Running of the checks on an event loop in a background thread, so that data for the checks of requested packages
+can be fetched while pip resolves dependencies in the main thread.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import Future
+from contextlib import AsyncExitStack
+from optparse import Values
+from pathlib import Path
+from typing import Any, Coroutine, TypeVar
+
+from packaging.requirements import InvalidRequirement, Requirement
+
+from pipask.checks.checks_executor import ChecksExecutor, open_checks_executor
+from pipask.checks.release_data import ReleaseDataProvider
+from pipask.checks.types import PackageCheckResults
+from pipask.infra.pip_types import InstallationReportItem
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class BackgroundChecksRunner:
+    """
+    Checks executor running on an event loop in a background thread.
+
+    Data fetched by `prefetch()` is reused by `execute_checks()`. Must be closed (or used as a context manager)
+    to close the clients and stop the thread.
+    """
+
+    def __init__(self, install_options: Values):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="pipask-checks", daemon=True)
+        self._thread.start()
+        self._exit_stack = AsyncExitStack()
+        try:
+            self._checks_executor: ChecksExecutor = self._run(
+                self._exit_stack.enter_async_context(open_checks_executor(install_options))
+            )
+        except BaseException:
+            self._stop_loop()
+            raise
+        self._release_data_provider: ReleaseDataProvider = self._checks_executor.create_release_data_provider()
+        self._exit_stack.push_async_callback(self._release_data_provider.aclose)
+
+    def prefetch(self, project_names: list[str]) -> None:
+        """Start fetching data for checks of the given requested projects without waiting for it."""
+        if project_names:
+            logger.debug(f"Prefetching check data for {', '.join(project_names)}")
+            self._loop.call_soon_threadsafe(
+                self._checks_executor.prefetch_requested_projects, project_names, self._release_data_provider
+            )
+
+    def execute_checks(self, packages_to_install: list[InstallationReportItem], **kwargs) -> list[PackageCheckResults]:
+        """Run `ChecksExecutor.execute_checks()` on the background loop and wait for the results."""
+        return self._run(
+            self._checks_executor.execute_checks(
+                packages_to_install, release_data_provider=self._release_data_provider, **kwargs
+            )
+        )
+
+    def close(self) -> None:
+        if self._loop.is_closed():
+            return
+        try:
+            self._run(self._exit_stack.aclose())
+        finally:
+            self._stop_loop()
+
+    def _stop_loop(self) -> None:
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def _run(self, coroutine: Coroutine[Any, Any, T]) -> T:
+        future: Future[T] = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+        try:
+            return future.result()
+        except BaseException:
+            # E.g., KeyboardInterrupt in the main thread; don't leave the coroutine running
+            future.cancel()
+            raise
+
+    def __enter__(self) -> "BackgroundChecksRunner":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+def get_requested_project_names(install_args: list[str], requirement_files: list[str] | None = None) -> list[str]:
+    """
+    Best-effort names of the projects requested on the command line or in requirement files.
+    Anything that is not a plain requirement (paths, URLs, options in requirement files) is skipped.
+    """
+    requirement_lines = list(install_args)
+    for requirement_file in requirement_files or []:
+        try:
+            requirement_lines.extend(Path(requirement_file).read_text(encoding="utf-8").splitlines())
+        except (OSError, UnicodeDecodeError):
+            logger.debug(f"Could not read requirements file {requirement_file}", exc_info=True)
+    names: dict[str, None] = {}  # Ordered set
+    for line in requirement_lines:
+        line = line.split(" #", 1)[0].strip()
+        if not line or line.startswith(("#", "-")) or os.path.exists(line):
+            continue
+        try:
+            requirement = Requirement(line)
+        except InvalidRequirement:
+            continue
+        if requirement.url is None:
+            names[requirement.name] = None
+    return list(names)
@@ -0,0 +1,76 @@
+"""
+Refreshing of checks that timed out in a detached process, so that the next run finds their results in the cache.
+
+Usage: python -m pipask.checks.background_refresh <request file>
+
+The request file (deleted when read) contains the checks to run and the pip options needed to create the clients.
+"""
+
+import asyncio
+import json
+import logging
+import subprocess
+import sys
+import tempfile
+from optparse import Values
+from pathlib import Path
+
+from pipask.checks.checks_executor import open_checks_executor
+from pipask.infra.pip_types import InstallationReportItem
+
+logger = logging.getLogger(__name__)
+
+# Options used by create_httpx_client() and for locating the cache
+_FORWARDED_OPTIONS = ["cache_dir", "proxy", "cert", "client_cert", "timeout", "features_enabled"]
+
+
+def start_background_refresh(checks: list[tuple[InstallationReportItem, str]], install_options: Values) -> None:
+    """Start a detached process re-running the given checks (package and checker ID) without time limits."""
+    if not checks or not getattr(install_options, "cache_dir", None):
+        return  # Nowhere to store the results
+    request = {
+        "options": {name: getattr(install_options, name, None) for name in _FORWARDED_OPTIONS},
+        "checks": [
+            {"package": package.model_dump(mode="json"), "checker_id": checker_id} for package, checker_id in checks
+        ],
+    }
+    try:
+        with tempfile.NamedTemporaryFile("w", suffix=".json", prefix="pipask-refresh-", delete=False) as request_file:
+            json.dump(request, request_file)
+        detach_kwargs = (
+            {"creationflags": subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP}  # type: ignore[attr-defined]
+            if sys.platform == "win32"
+            else {"start_new_session": True}
+        )
+        subprocess.Popen(
+            [sys.executable, "-m", "pipask.checks.background_refresh", request_file.name],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            **detach_kwargs,
+        )
+        logger.debug(f"Refreshing {len(checks)} timed out checks in the background")
+    except OSError:
+        logger.debug("Could not start background refresh of checks", exc_info=True)
+
+
+async def _refresh(request: dict) -> None:
+    options = Values(request["options"])
+    checks = [
+        (InstallationReportItem.model_validate(check["package"]), check["checker_id"]) for check in request["checks"]
+    ]
+    async with open_checks_executor(options) as checks_executor:
+        await checks_executor.refresh_checks(checks)
+
+
+def main(request_path: str) -> None:
+    path = Path(request_path)
+    try:
+        request = json.loads(path.read_text(encoding="utf-8"))
+    finally:
+        path.unlink(missing_ok=True)
+    asyncio.run(_refresh(request))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1])
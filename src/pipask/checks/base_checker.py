@@ -1,5 +1,7 @@
 import abc
+from datetime import timedelta
 
+from pipask.checks.release_data import ReleaseData
 from pipask.checks.types import CheckResult
 from pipask.infra.pypi import VerifiedPypiReleaseInfo
 
@@ -13,3 +15,24 @@ class Checker(abc.ABC):
     @abc.abstractmethod
     def description(self) -> str:
         pass
+
+    @property
+    @abc.abstractmethod
+    def checker_id(self) -> str:
+        """Stable identifier of the check, e.g., for machine-readable reports."""
+        pass
+
+    @property
+    def timeout(self) -> timedelta | None:
+        """How long the check may take before it is reported as timed out, or None for no limit."""
+        return timedelta(seconds=15)
+
+    @property
+    def result_ttl(self) -> timedelta | None:
+        """How long a result for a release may be reused, or None if results should not be cached."""
+        return None
+
+    @property
+    def required_data(self) -> frozenset[ReleaseData]:
+        """Remote data the check needs, so that it can be fetched before the check runs."""
+        return frozenset()
@@ -1,38 +1,59 @@
 import asyncio
+import dataclasses
 import logging
-from typing import Tuple
+from contextlib import aclosing, asynccontextmanager, nullcontext
+from optparse import Values
+from typing import AsyncIterator, Callable, Tuple
 
 from pipask.checks.base_checker import Checker
 from pipask.checks.license import LicenseChecker
 from pipask.checks.package_age import PackageAge
 from pipask.checks.package_downloads import PackageDownloadsChecker
+from pipask.checks.release_data import ReleaseDataProvider
 from pipask.checks.release_metadata import ReleaseMetadataChecker
 from pipask.checks.repo_popularity import RepoPopularityChecker
+from pipask.checks.result_cache import CheckResultCache
 from pipask.checks.types import CheckResult, CheckResultType, PackageCheckResults
 from pipask.checks.vulnerabilities import ReleaseVulnerabilityChecker
 from pipask.cli_helpers import SimpleTaskProgress
+from pipask.infra.cache import get_pipask_cache_dir
 from pipask.infra.pip_types import InstallationReportItem
+from pipask.infra.popularity_snapshot import PopularitySnapshot, closing_popularity_snapshot
 from pipask.infra.pypi import PypiClient, VerifiedPypiReleaseInfo
 from pipask.infra.pypistats import PypiStatsClient
 from pipask.infra.repo_client import RepoClient
 from pipask.infra.vulnerability_details import OsvVulnerabilityDetailsService
+from pipask.tracing import trace_span
+from pipask.utils import create_httpx_client
 
 logger = logging.getLogger(__name__)
 
+# Failures are always re-checked so that they are not caused by stale or temporarily unavailable data
+_UNCACHED_RESULT_TYPES = {CheckResultType.FAILURE, CheckResultType.ERROR, CheckResultType.TIMED_OUT}
+
+# Called with the package and the ID of the checker that did not complete in time
+OnCheckTimedOut = Callable[[InstallationReportItem, str], None]
+
 
 class _CheckProgressTracker:
-    def __init__(self, progress: SimpleTaskProgress, checkers_with_counts: list[Tuple[Checker, int]]):
+    def __init__(self, progress: SimpleTaskProgress | None, checkers_with_counts: list[Tuple[Checker, int]]):
         self._progress = progress
-        self._progress_tasks_by_checker = {
-            id(checker): progress.add_task(checker.description, total=total_count)
-            for checker, total_count in checkers_with_counts
-        }
+        self._progress_tasks_by_checker = (
+            {
+                id(checker): progress.add_task(checker.description, total=total_count)
+                for checker, total_count in checkers_with_counts
+            }
+            if progress is not None
+            else {}
+        )
 
     def update_all_checks(self, partial_result: bool | CheckResultType):
         for progress_task in self._progress_tasks_by_checker.values():
             progress_task.update(partial_result)
 
     def update_check(self, checker: Checker, partial_result: bool | CheckResultType):
+        if self._progress is None:
+            return
         progress_task = self._progress_tasks_by_checker.get(id(checker))
         if progress_task is None:
             logger.warning(f"No progress task found for checker {checker}")
@@ -48,47 +69,144 @@ class ChecksExecutor:
         repo_client: RepoClient,
         pypi_stats_client: PypiStatsClient,
         vulnerability_details_service: OsvVulnerabilityDetailsService,
+        result_cache: CheckResultCache | None = None,
+        popularity_snapshot: PopularitySnapshot | None = None,
     ):
         self._pypi_client = pypi_client
-        release_vulnerability_checker = ReleaseVulnerabilityChecker(vulnerability_details_service)
-        self._requested_package_checkers = [
-            RepoPopularityChecker(repo_client, pypi_client),
-            PackageDownloadsChecker(pypi_stats_client),
-            PackageAge(pypi_client),
+        self._repo_client = repo_client
+        self._pypi_stats_client = pypi_stats_client
+        self._vulnerability_details_service = vulnerability_details_service
+        self._result_cache = result_cache
+        self._popularity_snapshot = popularity_snapshot
+
+    def _create_checkers(self, release_data_provider: ReleaseDataProvider) -> tuple[list[Checker], list[Checker]]:
+        """Checkers for requested packages and for transitive dependencies, respectively."""
+        release_vulnerability_checker = ReleaseVulnerabilityChecker(release_data_provider)
+        requested_package_checkers = [
+            RepoPopularityChecker(release_data_provider),
+            PackageDownloadsChecker(release_data_provider),
+            PackageAge(release_data_provider),
             release_vulnerability_checker,
             ReleaseMetadataChecker(),
             LicenseChecker(),
         ]
-        self._transitive_dependency_checkers = [release_vulnerability_checker]
+        return requested_package_checkers, [release_vulnerability_checker]
+
+    def create_release_data_provider(self) -> ReleaseDataProvider:
+        # A new provider for each run, so that long-running processes don't hold on to stale data
+        return ReleaseDataProvider(
+            pypi_client=self._pypi_client,
+            repo_client=self._repo_client,
+            pypi_stats_client=self._pypi_stats_client,
+            vulnerability_details_service=self._vulnerability_details_service,
+            popularity_snapshot=self._popularity_snapshot,
+        )
 
     async def execute_checks(
-        self, packages_to_install: list[InstallationReportItem], progress: SimpleTaskProgress
+        self,
+        packages_to_install: list[InstallationReportItem],
+        progress: SimpleTaskProgress | None = None,
+        on_package_checked: Callable[[PackageCheckResults], None] | None = None,
+        deadline_seconds: float | None = None,
+        on_check_timed_out: OnCheckTimedOut | None = None,
+        release_data_provider: ReleaseDataProvider | None = None,
     ) -> list[PackageCheckResults]:
-        # This is ugly, but it's just some math to figure out the correct number of steps
-        # in the progress task to count towards
-        requested_deps_count = len([p for p in packages_to_install if p.requested])
-        transitive_deps_count = len([p for p in packages_to_install if not p.requested])
-        checkers_with_counts_by_id = {
-            id(checker): (checker, requested_deps_count) for checker in self._requested_package_checkers
-        }
-        for checker in self._transitive_dependency_checkers:
-            previous_value = checkers_with_counts_by_id.get(id(checker))
-            previous_count = previous_value[1] if previous_value else 0
-            checkers_with_counts_by_id[id(checker)] = (checker, transitive_deps_count + previous_count)
-        check_progress_tracker = _CheckProgressTracker(progress, list(checkers_with_counts_by_id.values()))
-
-        # Run the checks in parallel
-        return await asyncio.gather(
-            *[self._check_package(package, check_progress_tracker) for package in packages_to_install]
-        )
+        """
+        Run checks for all packages in parallel.
+
+        Each check is limited by the timeout of its checker and by the deadline for all checks, if given.
+        Checks that don't complete in time are reported as timed out, so that one slow upstream service
+        doesn't hold up the whole report.
+
+        :param on_package_checked: called with the results for each package as soon as its checks complete
+        :param on_check_timed_out: called for each check that did not complete in time
+        :param release_data_provider: provider with data prefetched by `prefetch_requested_projects()`;
+            a new one is used if not given
+        """
+        deadline = asyncio.get_running_loop().time() + deadline_seconds if deadline_seconds else None
+        async with (
+            aclosing(self.create_release_data_provider())
+            if release_data_provider is None
+            else nullcontext(release_data_provider)
+        ) as release_data_provider:
+            requested_package_checkers, transitive_dependency_checkers = self._create_checkers(release_data_provider)
+            # This is ugly, but it's just some math to figure out the correct number of steps
+            # in the progress task to count towards
+            requested_deps_count = len([p for p in packages_to_install if p.requested])
+            transitive_deps_count = len([p for p in packages_to_install if not p.requested])
+            checkers_with_counts_by_id = {
+                id(checker): (checker, requested_deps_count) for checker in requested_package_checkers
+            }
+            for checker in transitive_dependency_checkers:
+                previous_value = checkers_with_counts_by_id.get(id(checker))
+                previous_count = previous_value[1] if previous_value else 0
+                checkers_with_counts_by_id[id(checker)] = (checker, transitive_deps_count + previous_count)
+            check_progress_tracker = _CheckProgressTracker(progress, list(checkers_with_counts_by_id.values()))
+
+            async def check_package(package: InstallationReportItem) -> PackageCheckResults:
+                checkers = requested_package_checkers if package.requested else transitive_dependency_checkers
+                package_results = await self._check_package(
+                    package, checkers, release_data_provider, check_progress_tracker, deadline, on_check_timed_out
+                )
+                if on_package_checked is not None:
+                    on_package_checked(package_results)
+                return package_results
+
+            # Run the checks in parallel
+            return await asyncio.gather(*[check_package(package) for package in packages_to_install])
+
+    def prefetch_requested_projects(self, project_names: list[str], release_data_provider: ReleaseDataProvider) -> None:
+        """
+        Start fetching data for checks of the given requested projects that doesn't depend on the version,
+        so that it is available once dependency resolution determines the versions to check.
+        """
+        requested_package_checkers, _ = self._create_checkers(release_data_provider)
+        required_data = {data for checker in requested_package_checkers for data in checker.required_data}
+        for project_name in project_names:
+            release_data_provider.prefetch_project(project_name, required_data)
+
+    async def refresh_checks(self, checks: list[tuple[InstallationReportItem, str]]) -> None:
+        """
+        Run the given checks without time limits, only to store their results in the result cache
+        (e.g., after they timed out, so that the next run doesn't have to wait for them).
+        """
+        tracker = _CheckProgressTracker(None, [])
+        async with aclosing(self.create_release_data_provider()) as release_data_provider:
+            requested_package_checkers, transitive_dependency_checkers = self._create_checkers(release_data_provider)
+            checkers_by_id = {c.checker_id: c for c in requested_package_checkers + transitive_dependency_checkers}
+
+            async def refresh(package: InstallationReportItem, checker_id: str) -> None:
+                release_info = await self._pypi_client.get_matching_release_info(package)
+                if release_info is not None and (checker := checkers_by_id.get(checker_id)) is not None:
+                    await _run_one_check(checker, release_info, tracker, self._result_cache, timeout=None)
+
+            await asyncio.gather(*[refresh(package, checker_id) for package, checker_id in checks])
 
     async def _check_package(
         self,
         unverified_metadata: InstallationReportItem,
+        checkers_for_package: list[Checker],
+        release_data_provider: ReleaseDataProvider,
         check_progress_tracker: _CheckProgressTracker,
+        deadline: float | None = None,
+        on_check_timed_out: OnCheckTimedOut | None = None,
     ) -> PackageCheckResults:
-        release_info = await self._pypi_client.get_matching_release_info(unverified_metadata)
         is_transitive_dep = not unverified_metadata.requested
+        try:
+            release_info = await asyncio.wait_for(
+                self._pypi_client.get_matching_release_info(unverified_metadata), _get_remaining_time(deadline)
+            )
+        except asyncio.TimeoutError:
+            check_progress_tracker.update_all_checks(CheckResultType.TIMED_OUT)
+            if on_check_timed_out is not None:
+                for checker in checkers_for_package:
+                    on_check_timed_out(unverified_metadata, checker.checker_id)
+            return PackageCheckResults(
+                name=unverified_metadata.metadata.name,
+                version=unverified_metadata.metadata.version,
+                results=[CheckResult(result_type=CheckResultType.TIMED_OUT, message="Release information timed out")],
+                is_transitive_dependency=is_transitive_dep,
+            )
 
         if release_info is None:
             # We don't have any trusted release information from PyPI available, we can't run any checks
@@ -105,12 +223,42 @@ class ChecksExecutor:
                 is_transitive_dependency=is_transitive_dep,
             )
 
-        # We do have a trusted release info from PyPI, we can run checks
-        checkers_for_package = (
-            self._transitive_dependency_checkers if is_transitive_dep else self._requested_package_checkers
+        # We do have a trusted release info from PyPI, we can run checks.
+        # Start fetching the data for all checks at once rather than as each check gets to it.
+        release_data_provider.prefetch(
+            release_info,
+            {
+                data
+                for checker in checkers_for_package
+                if not self._has_cached_result(checker, release_info)
+                for data in checker.required_data
+            },
         )
+
+        def timeout_for(checker: Checker) -> float | None:
+            checker_timeout = checker.timeout.total_seconds() if checker.timeout is not None else None
+            remaining_time = _get_remaining_time(deadline)
+            if checker_timeout is None or remaining_time is None:
+                return checker_timeout if remaining_time is None else remaining_time
+            return min(checker_timeout, remaining_time)
+
+        def timed_out_callback(checker: Checker) -> Callable[[], None] | None:
+            if on_check_timed_out is None:
+                return None
+            return lambda: on_check_timed_out(unverified_metadata, checker.checker_id)
+
         check_results = await asyncio.gather(
-            *[_run_one_check(checker, release_info, check_progress_tracker) for checker in checkers_for_package]
+            *[
+                _run_one_check(
+                    checker,
+                    release_info,
+                    check_progress_tracker,
+                    self._result_cache,
+                    timeout=timeout_for(checker),
+                    on_timed_out=timed_out_callback(checker),
+                )
+                for checker in checkers_for_package
+            ]
         )
         return PackageCheckResults(
             name=release_info.name,
@@ -120,21 +268,77 @@ class ChecksExecutor:
             is_transitive_dependency=is_transitive_dep,
         )
 
+    def _has_cached_result(self, checker: Checker, release_info: VerifiedPypiReleaseInfo) -> bool:
+        return self._result_cache is not None and self._result_cache.get(checker, release_info) is not None
+
+
+def _get_remaining_time(deadline: float | None) -> float | None:
+    if deadline is None:
+        return None
+    return max(0.0, deadline - asyncio.get_running_loop().time())
+
 
 async def _run_one_check(
-    checker: Checker, release_info: VerifiedPypiReleaseInfo, check_progress_tracker: _CheckProgressTracker
+    checker: Checker,
+    release_info: VerifiedPypiReleaseInfo,
+    check_progress_tracker: _CheckProgressTracker,
+    result_cache: CheckResultCache | None = None,
+    timeout: float | None = None,
+    on_timed_out: Callable[[], None] | None = None,
 ) -> CheckResult:
-    try:
-        result = await checker.check(release_info)
-        check_progress_tracker.update_check(checker, result.result_type)
-        return result
-    except Exception as e:
-        logger.debug(
-            f"Error running {checker.__class__.__name__} for {release_info.name}=={release_info.version}",
-            exc_info=True,
-        )
-        check_progress_tracker.update_check(checker, CheckResultType.FAILURE)
-        return CheckResult(
-            result_type=CheckResultType.FAILURE,
-            message=f"Check failed: {str(e)}",
-        )
+    with trace_span(checker.checker_id, "check", package=f"{release_info.name}=={release_info.version}") as attributes:
+        if result_cache is not None and (cached_result := result_cache.get(checker, release_info)) is not None:
+            attributes["cached"] = True
+            check_progress_tracker.update_check(checker, cached_result.result_type)
+            return cached_result
+        try:
+            check_result = await asyncio.wait_for(checker.check(release_info), timeout)
+            result = dataclasses.replace(check_result, checker_id=checker.checker_id)
+            check_progress_tracker.update_check(checker, result.result_type)
+            if result_cache is not None and result.result_type not in _UNCACHED_RESULT_TYPES:
+                result_cache.set(checker, release_info, result)
+            return result
+        except asyncio.TimeoutError:
+            attributes["timed_out"] = True
+            logger.debug(f"{checker.__class__.__name__} for {release_info.name}=={release_info.version} timed out")
+            check_progress_tracker.update_check(checker, CheckResultType.TIMED_OUT)
+            if on_timed_out is not None:
+                on_timed_out()
+            return CheckResult(
+                result_type=CheckResultType.TIMED_OUT,
+                message=f"Check timed out after {timeout:.0f}s" if timeout else "Check timed out",
+                checker_id=checker.checker_id,
+            )
+        except Exception as e:
+            logger.debug(
+                f"Error running {checker.__class__.__name__} for {release_info.name}=={release_info.version}",
+                exc_info=True,
+            )
+            check_progress_tracker.update_check(checker, CheckResultType.FAILURE)
+            return CheckResult(
+                result_type=CheckResultType.FAILURE,
+                message=f"Check failed: {str(e)}",
+                checker_id=checker.checker_id,
+            )
+
+
+@asynccontextmanager
+async def open_checks_executor(install_options: Values) -> AsyncIterator[ChecksExecutor]:
+    """Checks executor with clients configured from pip's options, closed on exit."""
+    cache_dir = get_pipask_cache_dir(install_options)
+    with closing_popularity_snapshot(cache_dir) as popularity_snapshot:
+        async with (
+            aclosing(create_httpx_client(install_options)) as httpx_client,
+            aclosing(PypiClient(httpx_client, cache_dir)) as pypi_client,
+            aclosing(RepoClient(httpx_client, cache_dir)) as repo_client,
+            aclosing(PypiStatsClient(httpx_client, cache_dir)) as pypi_stats_client,
+            aclosing(OsvVulnerabilityDetailsService(httpx_client)) as vulnerability_details_service,
+        ):
+            yield ChecksExecutor(
+                pypi_client=pypi_client,
+                repo_client=repo_client,
+                pypi_stats_client=pypi_stats_client,
+                vulnerability_details_service=vulnerability_details_service,
+                result_cache=CheckResultCache(cache_dir) if cache_dir is not None else None,
+                popularity_snapshot=popularity_snapshot,
+            )
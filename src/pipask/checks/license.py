@@ -1,3 +1,5 @@
+from datetime import timedelta
+
 from pipask.checks.base_checker import Checker
 from pipask.checks.types import CheckResult, CheckResultType
 from pipask.infra.pypi import VerifiedPypiReleaseInfo
@@ -10,6 +12,15 @@ class LicenseChecker(Checker):
     def description(self) -> str:
         return "Checking package license"
 
+    @property
+    def checker_id(self) -> str:
+        return "license"
+
+    @property
+    def result_ttl(self) -> timedelta | None:
+        # License metadata of a release is immutable
+        return timedelta(days=30)
+
     async def check(self, verified_release_info: VerifiedPypiReleaseInfo) -> CheckResult:
         info = verified_release_info.release_response.info
         license = next((c for c in info.classifiers if c.startswith("License :: ")), None)
@@ -1,30 +1,42 @@
 import datetime
 
 from pipask.checks.base_checker import Checker
+from pipask.checks.release_data import ReleaseData, ReleaseDataProvider
 from pipask.checks.types import CheckResult, CheckResultType
-from pipask.infra.pypi import PypiClient, VerifiedPypiReleaseInfo
+from pipask.infra.pypi import VerifiedPypiReleaseInfo
 
 _TOO_NEW_DAYS = 22
 _TOO_OLD_DAYS = 365
 
 
 class PackageAge(Checker):
-    def __init__(self, pypi_client: PypiClient):
-        self._pypi_client = pypi_client
+    def __init__(self, release_data_provider: ReleaseDataProvider):
+        self._release_data_provider = release_data_provider
 
     @property
     def description(self) -> str:
         return "Checking package age"
 
+    @property
+    def checker_id(self) -> str:
+        return "package-age"
+
+    @property
+    def result_ttl(self) -> datetime.timedelta | None:
+        return datetime.timedelta(days=1)
+
+    @property
+    def required_data(self) -> frozenset[ReleaseData]:
+        return frozenset({ReleaseData.FIRST_UPLOAD_TIME})
+
     async def check(self, verified_release_info: VerifiedPypiReleaseInfo) -> CheckResult:
-        distributions = await self._pypi_client.get_distributions(verified_release_info.name)
-        if distributions is None:
+        first_upload_time = await self._release_data_provider.get_first_upload_time(verified_release_info.name)
+        if first_upload_time is None:
             return CheckResult(
                 result_type=CheckResultType.FAILURE,
                 message="No distributions information available",
             )
-        oldest_distribution = min(distributions.files, key=lambda x: x.upload_time)
-        max_age_days = (datetime.datetime.now(datetime.timezone.utc) - oldest_distribution.upload_time).days
+        max_age_days = (datetime.datetime.now(datetime.timezone.utc) - first_upload_time).days
         if max_age_days < _TOO_NEW_DAYS:
             return CheckResult(
                 result_type=CheckResultType.WARNING,
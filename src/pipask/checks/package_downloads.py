@@ -1,22 +1,43 @@
+from datetime import timedelta
+
 from pipask.checks.base_checker import Checker
+from pipask.checks.release_data import ReleaseData, ReleaseDataProvider
 from pipask.checks.types import CheckResult, CheckResultType
 from pipask.infra.pypi import VerifiedPypiReleaseInfo
-from pipask.infra.pypistats import PypiStatsClient
+from pipask.infra.pypistats import get_time_to_daily_refresh
 
 _WARNING_THRESHOLD = 5000
 _FAILURE_THRESHOLD = 100
 
 
 class PackageDownloadsChecker(Checker):
-    def __init__(self, pypi_stats_client: PypiStatsClient):
-        self._pypi_stats_client = pypi_stats_client
+    def __init__(self, release_data_provider: ReleaseDataProvider):
+        self._release_data_provider = release_data_provider
 
     @property
     def description(self) -> str:
         return "Checking package download stats"
 
+    @property
+    def checker_id(self) -> str:
+        return "package-downloads"
+
+    @property
+    def timeout(self) -> timedelta | None:
+        # pypistats.org has a multi-second tail latency; a missing download count should not hold up the report
+        return timedelta(seconds=5)
+
+    @property
+    def result_ttl(self) -> timedelta | None:
+        # pypistats.org updates download counts daily - expire together with the cached download statistics
+        return get_time_to_daily_refresh()
+
+    @property
+    def required_data(self) -> frozenset[ReleaseData]:
+        return frozenset({ReleaseData.DOWNLOAD_STATS})
+
     async def check(self, verified_release_info: VerifiedPypiReleaseInfo) -> CheckResult:
-        pypi_stats = await self._pypi_stats_client.get_download_stats(verified_release_info.name)
+        pypi_stats = await self._release_data_provider.get_download_stats(verified_release_info.name)
         if pypi_stats is None:
             return CheckResult(
                 result_type=CheckResultType.FAILURE,
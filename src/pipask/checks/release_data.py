@@ -0,0 +1,200 @@
+"""
+Remote data needed by the checkers, shared by all checkers of a run.
+
+Checkers declare which data they need (see `Checker.required_data`), so that the executor can start fetching
+everything needed for a release as soon as the release information is available, instead of each checker
+fetching its data only when it runs. Each resource is fetched at most once per run and the result is handed
+to every checker that needs it.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from enum import Enum
+from typing import Any, Awaitable, Callable, Iterable, TypeVar
+
+from packaging.utils import canonicalize_name
+
+from pipask.infra.pypi import (
+    AttestationPublisher,
+    AttestationResponse,
+    PypiClient,
+    VerifiedPypiReleaseInfo,
+    VulnerabilityPypi,
+)
+from pipask.infra.popularity_snapshot import PopularityEntry, PopularitySnapshot
+from pipask.infra.pypistats import DownloadStats, PypiStatsClient
+from pipask.infra.repo_client import RepoClient, RepoInfo
+from pipask.infra.vulnerability_details import VulnerabilityDetails, VulnerabilityDetailsService
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ReleaseData(Enum):
+    """Remote resources a checker may need, in addition to the release information itself."""
+
+    FIRST_UPLOAD_TIME = "first-upload-time"
+    ATTESTATIONS = "attestations"
+    DOWNLOAD_STATS = "download-stats"
+    REPO_INFO = "repo-info"
+    VULNERABILITY_DETAILS = "vulnerability-details"
+
+
+# Slowest resources first, so that they are requested before the faster ones.
+# Repository info can only be requested once attestations are available, so it is the longest chain.
+_PREFETCH_ORDER = [
+    ReleaseData.REPO_INFO,
+    ReleaseData.DOWNLOAD_STATS,
+    ReleaseData.VULNERABILITY_DETAILS,
+    ReleaseData.ATTESTATIONS,
+    ReleaseData.FIRST_UPLOAD_TIME,
+]
+
+
+class ReleaseDataProvider(VulnerabilityDetailsService):
+    """
+    Single-flight access to the remote data used by the checkers: concurrent and repeated requests
+    for the same resource share one upstream request.
+
+    Intended to live for one run of checks (see `ChecksExecutor.execute_checks()`),
+    so that results are not reused for longer than the underlying caches allow.
+    """
+
+    def __init__(
+        self,
+        *,
+        pypi_client: PypiClient,
+        repo_client: RepoClient,
+        pypi_stats_client: PypiStatsClient,
+        vulnerability_details_service: VulnerabilityDetailsService,
+        popularity_snapshot: PopularitySnapshot | None = None,
+    ):
+        self._pypi_client = pypi_client
+        self._repo_client = repo_client
+        self._pypi_stats_client = pypi_stats_client
+        self._vulnerability_details_service = vulnerability_details_service
+        self._popularity_snapshot = popularity_snapshot
+        self._fetches: dict[tuple[ReleaseData, Any], asyncio.Future] = {}
+
+    async def get_attestations(self, verified_release_info: VerifiedPypiReleaseInfo) -> AttestationResponse | None:
+        key = (verified_release_info.name, verified_release_info.version, verified_release_info.release_filename)
+        return await self._get_shared(
+            ReleaseData.ATTESTATIONS, key, lambda: self._pypi_client.get_attestations(verified_release_info)
+        )
+
+    async def get_first_upload_time(self, project_name: str) -> datetime | None:
+        if (entry := self._get_popularity(project_name)) is not None and entry.first_upload_time is not None:
+            return entry.first_upload_time
+        return await self._get_shared(
+            ReleaseData.FIRST_UPLOAD_TIME,
+            canonicalize_name(project_name),
+            lambda: self._pypi_client.get_first_upload_time(project_name),
+        )
+
+    async def get_download_stats(self, package_name: str) -> DownloadStats | None:
+        if (entry := self._get_popularity(package_name)) is not None and entry.monthly_downloads is not None:
+            return DownloadStats(last_month=entry.monthly_downloads)
+        return await self._get_shared(
+            ReleaseData.DOWNLOAD_STATS,
+            canonicalize_name(package_name),
+            lambda: self._pypi_stats_client.get_download_stats(package_name),
+        )
+
+    async def get_repo_info(self, repo_url: str, project_name: str | None = None) -> RepoInfo | None:
+        """
+        :param project_name: project whose (verified) repository it is; allows using stars from the popularity
+            snapshot if the snapshot lists the same repository for the project
+        """
+        entry = self._get_popularity(project_name) if project_name is not None else None
+        if entry is not None and entry.star_count is not None and (entry.repo_url or "").lower() == repo_url.lower():
+            return RepoInfo(star_count=entry.star_count)
+        # Repository names are case-insensitive on both GitHub and GitLab
+        return await self._get_shared(
+            ReleaseData.REPO_INFO, repo_url.lower(), lambda: self._repo_client.get_repo_info(repo_url)
+        )
+
+    async def get_details(self, vulnerability: VulnerabilityPypi) -> VulnerabilityDetails:
+        key = (vulnerability.id, *vulnerability.aliases)
+        return await self._get_shared(
+            ReleaseData.VULNERABILITY_DETAILS,
+            key,
+            lambda: self._vulnerability_details_service.get_details(vulnerability),
+        )
+
+    def prefetch(self, verified_release_info: VerifiedPypiReleaseInfo, required_data: Iterable[ReleaseData]) -> None:
+        """Start fetching the given data for the release in the background, slowest resources first."""
+        required_data = set(required_data)
+        for data in _PREFETCH_ORDER:
+            if data in required_data:
+                self._start_prefetch(data, verified_release_info)
+
+    def prefetch_project(self, project_name: str, required_data: Iterable[ReleaseData]) -> None:
+        """
+        Start fetching the given data that doesn't depend on the release, e.g., before dependency resolution
+        determines the version to install. Release-specific data is ignored; this includes repository info,
+        because the repository URL is only trusted if it comes from attestations of the release.
+        """
+        required_data = set(required_data)
+        if ReleaseData.DOWNLOAD_STATS in required_data:
+            asyncio.ensure_future(self.get_download_stats(project_name)).add_done_callback(_ignore_prefetch_error)
+        if ReleaseData.FIRST_UPLOAD_TIME in required_data:
+            asyncio.ensure_future(self.get_first_upload_time(project_name)).add_done_callback(_ignore_prefetch_error)
+
+    def _start_prefetch(self, data: ReleaseData, verified_release_info: VerifiedPypiReleaseInfo) -> None:
+        match data:
+            case ReleaseData.FIRST_UPLOAD_TIME:
+                fetch: Awaitable = self.get_first_upload_time(verified_release_info.name)
+            case ReleaseData.ATTESTATIONS:
+                fetch = self.get_attestations(verified_release_info)
+            case ReleaseData.DOWNLOAD_STATS:
+                fetch = self.get_download_stats(verified_release_info.name)
+            case ReleaseData.REPO_INFO:
+                fetch = self._prefetch_repo_info(verified_release_info)
+            case ReleaseData.VULNERABILITY_DETAILS:
+                vulnerabilities = verified_release_info.release_response.vulnerabilities
+                fetch = asyncio.gather(*(self.get_details(v) for v in vulnerabilities if not v.withdrawn))
+        asyncio.ensure_future(fetch).add_done_callback(_ignore_prefetch_error)
+
+    async def _prefetch_repo_info(self, verified_release_info: VerifiedPypiReleaseInfo) -> None:
+        attestations = await self.get_attestations(verified_release_info)
+        if attestations is not None and len(attestations.attestation_bundles):
+            repo_url = get_publisher_repo_url(attestations.attestation_bundles[0].publisher)
+            if repo_url is not None:
+                await self.get_repo_info(repo_url, verified_release_info.name)
+
+    async def _get_shared(self, data: ReleaseData, key: Any, fetch: Callable[[], Awaitable[T]]) -> T:
+        future = self._fetches.get((data, key))
+        if future is None:
+            future = asyncio.ensure_future(fetch())
+            future.add_done_callback(_ignore_prefetch_error)
+            self._fetches[(data, key)] = future
+        # A consumer that gives up (e.g., a timed out check) must not cancel the fetch for the others
+        return await asyncio.shield(future)
+
+    def _get_popularity(self, project_name: str) -> PopularityEntry | None:
+        return self._popularity_snapshot.get(project_name) if self._popularity_snapshot is not None else None
+
+    async def aclose(self) -> None:
+        """Cancel fetches nobody waited for, e.g., because the checks timed out."""
+        for future in self._fetches.values():
+            future.cancel()
+        self._fetches.clear()
+
+
+def get_publisher_repo_url(publisher: AttestationPublisher) -> str | None:
+    match publisher.kind:
+        case "GitHub":
+            return f"https://github.com/{publisher.repository}"
+        case "GitLab":
+            return f"https://gitlab.com/{publisher.repository}"
+        case _:
+            logger.debug("Unsupported publisher: %s", publisher.kind)
+            return None
+
+
+def _ignore_prefetch_error(future: asyncio.Future) -> None:
+    # Errors are reported by the checkers awaiting the data; retrieve them so that asyncio doesn't log them
+    if not future.cancelled():
+        future.exception()
@@ -1,3 +1,5 @@
+from datetime import timedelta
+
 from pipask.checks.base_checker import Checker
 from pipask.checks.types import CheckResult, CheckResultType
 from pipask.infra.pypi import ReleaseResponse, VerifiedPypiReleaseInfo
@@ -21,6 +23,15 @@ class ReleaseMetadataChecker(Checker):
     def description(self) -> str:
         return "Checking release metadata"
 
+    @property
+    def checker_id(self) -> str:
+        return "release-metadata"
+
+    @property
+    def result_ttl(self) -> timedelta | None:
+        # Classifiers are immutable, but the release may get yanked
+        return timedelta(days=1)
+
     async def check(self, verified_release_info: VerifiedPypiReleaseInfo) -> CheckResult:
         if verified_release_info.release_response.info.yanked:
             reason = (
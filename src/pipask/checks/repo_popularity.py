@@ -1,39 +1,49 @@
+from datetime import timedelta
+
 from pipask.checks.base_checker import Checker
+from pipask.checks.release_data import ReleaseData, ReleaseDataProvider, get_publisher_repo_url
 from pipask.checks.types import CheckResult, CheckResultType
-from pipask.infra.pypi import AttestationPublisher, PypiClient, VerifiedPypiReleaseInfo
-from pipask.infra.repo_client import RepoClient
-import logging
+from pipask.infra.pypi import VerifiedPypiReleaseInfo
 
 from pipask.utils import format_link
 
 _WARNING_THRESHOLD = 1000
 _BOLD_WARNING_THRESHOLD = 100
 
-logger = logging.getLogger(__name__)
-
 
 class RepoPopularityChecker(Checker):
-    def __init__(self, repo_client: RepoClient, pypi_client: PypiClient):
-        self._repo_client = repo_client
-        self._pypi_client = pypi_client
+    def __init__(self, release_data_provider: ReleaseDataProvider):
+        self._release_data_provider = release_data_provider
 
     @property
     def description(self) -> str:
         return "Checking repository popularity"
 
+    @property
+    def checker_id(self) -> str:
+        return "repo-popularity"
+
+    @property
+    def result_ttl(self) -> timedelta | None:
+        return timedelta(days=1)
+
+    @property
+    def required_data(self) -> frozenset[ReleaseData]:
+        return frozenset({ReleaseData.ATTESTATIONS, ReleaseData.REPO_INFO})
+
     async def check(self, verified_release_info: VerifiedPypiReleaseInfo) -> CheckResult:
-        attestations = await self._pypi_client.get_attestations(verified_release_info)
+        attestations = await self._release_data_provider.get_attestations(verified_release_info)
         project_urls = verified_release_info.release_response.info.project_urls
         if attestations is not None and len(attestations.attestation_bundles):
             # We have VERIFIED info about the source repository
             publisher = attestations.attestation_bundles[0].publisher
-            repo_url = _get_repo_url(publisher)
+            repo_url = get_publisher_repo_url(publisher)
             if repo_url is None:
                 return CheckResult(
                     result_type=CheckResultType.WARNING,
                     message=f"Unrecognized repository type in attestation: {publisher.kind}",
                 )
-            repo_info = await self._repo_client.get_repo_info(repo_url)
+            repo_info = await self._release_data_provider.get_repo_info(repo_url, verified_release_info.name)
             if repo_info is None:
                 return CheckResult(
                     result_type=CheckResultType.FAILURE,
@@ -65,14 +75,3 @@ class RepoPopularityChecker(Checker):
         else:
             # No recognized link to the source repository
             return CheckResult(result_type=CheckResultType.WARNING, message="No repository URL found")
-
-
-def _get_repo_url(publisher: AttestationPublisher) -> str | None:
-    match publisher.kind:
-        case "GitHub":
-            return f"https://github.com/{publisher.repository}"
-        case "GitLab":
-            return f"https://gitlab.com/{publisher.repository}"
-        case _:
-            logger.debug("Unsupported publisher: %s", publisher.kind)
-            return None
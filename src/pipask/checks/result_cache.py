@@ -0,0 +1,45 @@
+import logging
+from pathlib import Path
+
+from packaging.utils import canonicalize_name
+from pydantic import TypeAdapter, ValidationError
+
+from pipask.checks.base_checker import Checker
+from pipask.checks.types import CheckResult
+from pipask.infra.cache import JsonFileCache
+from pipask.infra.pypi import VerifiedPypiReleaseInfo
+
+logger = logging.getLogger(__name__)
+
+_check_result_adapter = TypeAdapter(CheckResult)
+
+
+class CheckResultCache:
+    """Persistent cache of check results for a release, with expiration given by each checker's result TTL."""
+
+    def __init__(self, pipask_cache_dir: Path):
+        self._cache = JsonFileCache(pipask_cache_dir / "check-results")
+
+    def get(self, checker: Checker, release_info: VerifiedPypiReleaseInfo) -> CheckResult | None:
+        if checker.result_ttl is None:
+            return None
+        cached_value = self._cache.get(_cache_key(checker, release_info))
+        if cached_value is None:
+            return None
+        try:
+            return _check_result_adapter.validate_python(cached_value)
+        except ValidationError:
+            logger.debug(f"Ignoring invalid cached {checker.checker_id} result", exc_info=True)
+            return None
+
+    def set(self, checker: Checker, release_info: VerifiedPypiReleaseInfo, result: CheckResult) -> None:
+        if checker.result_ttl is None:
+            return
+        value = _check_result_adapter.dump_python(result, mode="json")
+        self._cache.set(_cache_key(checker, release_info), value, checker.result_ttl)
+
+
+def _cache_key(checker: Checker, release_info: VerifiedPypiReleaseInfo) -> str:
+    # Some checks depend on the file to be installed (e.g., attestations), which may be re-uploaded under the same name
+    release_file = f"{release_info.release_filename}#sha256={release_info.release_file_sha256}"
+    return f"{checker.checker_id}:{canonicalize_name(release_info.name)}=={release_info.version}:{release_file}"
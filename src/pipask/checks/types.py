@@ -9,6 +9,8 @@ class CheckResultType(str, Enum):
     WARNING = ("warning", "yellow", "[yellow bold]![/yellow bold]")
     NEUTRAL = ("neutral", "default", "✔")
     ERROR = ("error", "red", "[red]![/red]")
+    # The check didn't complete in time - unknown result, but not a policy violation
+    TIMED_OUT = ("timed-out", "yellow", "[yellow]?[/yellow]")
 
     rich_color: str
     rich_icon: str
@@ -26,6 +28,8 @@ class CheckResultType(str, Enum):
             return CheckResultType.FAILURE
         if any(result is CheckResultType.ERROR for result in results):
             return CheckResultType.ERROR
+        if any(result is CheckResultType.TIMED_OUT for result in results):
+            return CheckResultType.TIMED_OUT
         if any(result is CheckResultType.WARNING for result in results):
             return CheckResultType.WARNING
         if any(result is CheckResultType.NEUTRAL for result in results):
@@ -39,6 +43,7 @@ class CheckResultType(str, Enum):
 class CheckResult:
     result_type: CheckResultType
     message: str
+    checker_id: str | None = None
 
 
 @dataclass
@@ -1,9 +1,11 @@
 import asyncio
 from collections import defaultdict
+from datetime import timedelta
 
 from pipask.checks.base_checker import Checker
+from pipask.checks.release_data import ReleaseData
 from pipask.checks.types import CheckResult, CheckResultType
-from pipask.infra.pypi import VerifiedPypiReleaseInfo
+from pipask.infra.pypi import VerifiedPypiReleaseInfo, VulnerabilityPypi
 from pipask.infra.vulnerability_details import VulnerabilityDetails, VulnerabilityDetailsService, VulnerabilitySeverity
 from pipask.utils import format_link
 
@@ -18,9 +20,24 @@ class ReleaseVulnerabilityChecker(Checker):
     def description(self) -> str:
         return "Checking known vulnerabilities"
 
+    @property
+    def checker_id(self) -> str:
+        return "vulnerabilities"
+
+    @property
+    def result_ttl(self) -> timedelta | None:
+        # New vulnerabilities should show up soon
+        return timedelta(hours=1)
+
+    @property
+    def required_data(self) -> frozenset[ReleaseData]:
+        return frozenset({ReleaseData.VULNERABILITY_DETAILS})
+
     async def check(self, verified_release_info: VerifiedPypiReleaseInfo) -> CheckResult:
-        release_response = verified_release_info.release_response
-        relevant_vulnerabilities = [v for v in release_response.vulnerabilities if not v.withdrawn]
+        return await self.check_vulnerabilities(verified_release_info.release_response.vulnerabilities)
+
+    async def check_vulnerabilities(self, vulnerabilities: list[VulnerabilityPypi]) -> CheckResult:
+        relevant_vulnerabilities = [v for v in vulnerabilities if not v.withdrawn]
         if len(relevant_vulnerabilities) == 0:
             return CheckResult(
                 result_type=CheckResultType.SUCCESS,
@@ -1,5 +1,114 @@
 from dataclasses import dataclass
 from optparse import Values
+from typing import Iterator
+
+from pipask.exception import PipaskException
+from pipask.report import ReportFormat
+
+_PIPASK_REPORT_OPTION = "--pipask-report"
+_PIPASK_TRACE_OPTION = "--pipask-trace"
+_PIPASK_RECORD_HTTP_OPTION = "--pipask-record-http"
+_PIPASK_REPLAY_HTTP_OPTION = "--pipask-replay-http"
+_PIPASK_REPLAY_LATENCY_OPTION = "--pipask-replay-latency"
+_PIPASK_REPLAY_JITTER_OPTION = "--pipask-replay-jitter"
+_PIPASK_METRICS_OPTION = "--pipask-metrics"
+_PIPASK_METRICS_JSON_OPTION = "--pipask-metrics-json"
+_PIPASK_CHECK_DEADLINE_OPTION = "--pipask-check-deadline"
+_PIPASK_BACKGROUND_REFRESH_OPTION = "--pipask-background-refresh"
+
+DEFAULT_CHECK_DEADLINE_SECONDS = 30.0
+
+
+@dataclass
+class PipaskOptions:
+    """Options specific to pipask, which are removed from the arguments before passing them to pip."""
+
+    report_format: ReportFormat | None = None
+    trace_file: str | None = None
+    record_http_file: str | None = None
+    replay_http_file: str | None = None
+    replay_latency_ms: float = 0.0
+    replay_jitter_ms: float = 0.0
+    print_metrics: bool = False
+    metrics_json_file: str | None = None
+    check_deadline_seconds: float = DEFAULT_CHECK_DEADLINE_SECONDS  # 0 means no deadline
+    background_refresh: bool = False
+
+
+def parse_pipask_options(args: list[str]) -> tuple[PipaskOptions, list[str]]:
+    """
+    Extract pipask-specific options from the command line arguments.
+
+    :return: the pipask options and the remaining arguments for pip
+    """
+    pipask_options = PipaskOptions()
+    remaining_args = []
+    args_iterator = iter(args)
+    for arg in args_iterator:
+        if arg == "--":
+            remaining_args.append(arg)
+            remaining_args.extend(args_iterator)
+        elif _is_option(arg, _PIPASK_REPORT_OPTION):
+            value = _get_option_value(arg, args_iterator)
+            valid_formats = [f.value for f in ReportFormat]
+            if value not in valid_formats:
+                raise PipaskException(f"{_PIPASK_REPORT_OPTION} must be one of: {', '.join(valid_formats)}")
+            pipask_options.report_format = ReportFormat(value)
+        elif _is_option(arg, _PIPASK_TRACE_OPTION):
+            pipask_options.trace_file = _get_path_option_value(arg, args_iterator, _PIPASK_TRACE_OPTION)
+        elif _is_option(arg, _PIPASK_RECORD_HTTP_OPTION):
+            pipask_options.record_http_file = _get_path_option_value(arg, args_iterator, _PIPASK_RECORD_HTTP_OPTION)
+        elif _is_option(arg, _PIPASK_REPLAY_HTTP_OPTION):
+            pipask_options.replay_http_file = _get_path_option_value(arg, args_iterator, _PIPASK_REPLAY_HTTP_OPTION)
+        elif _is_option(arg, _PIPASK_REPLAY_LATENCY_OPTION):
+            pipask_options.replay_latency_ms = _get_non_negative_option_value(
+                arg, args_iterator, _PIPASK_REPLAY_LATENCY_OPTION, "milliseconds"
+            )
+        elif _is_option(arg, _PIPASK_REPLAY_JITTER_OPTION):
+            pipask_options.replay_jitter_ms = _get_non_negative_option_value(
+                arg, args_iterator, _PIPASK_REPLAY_JITTER_OPTION, "milliseconds"
+            )
+        elif arg == _PIPASK_METRICS_OPTION:
+            pipask_options.print_metrics = True
+        elif _is_option(arg, _PIPASK_METRICS_JSON_OPTION):
+            pipask_options.metrics_json_file = _get_path_option_value(arg, args_iterator, _PIPASK_METRICS_JSON_OPTION)
+        elif _is_option(arg, _PIPASK_CHECK_DEADLINE_OPTION):
+            pipask_options.check_deadline_seconds = _get_non_negative_option_value(
+                arg, args_iterator, _PIPASK_CHECK_DEADLINE_OPTION, "seconds"
+            )
+        elif arg == _PIPASK_BACKGROUND_REFRESH_OPTION:
+            pipask_options.background_refresh = True
+        else:
+            remaining_args.append(arg)
+    if pipask_options.record_http_file is not None and pipask_options.replay_http_file is not None:
+        raise PipaskException(f"{_PIPASK_RECORD_HTTP_OPTION} and {_PIPASK_REPLAY_HTTP_OPTION} cannot be combined")
+    return pipask_options, remaining_args
+
+
+def _is_option(arg: str, option: str) -> bool:
+    return arg == option or arg.startswith(option + "=")
+
+
+def _get_option_value(arg: str, args_iterator: Iterator[str]) -> str | None:
+    return arg.partition("=")[2] if "=" in arg else next(args_iterator, None)
+
+
+def _get_path_option_value(arg: str, args_iterator: Iterator[str], option: str) -> str:
+    value = _get_option_value(arg, args_iterator)
+    if not value:
+        raise PipaskException(f"{option} requires a file path")
+    return value
+
+
+def _get_non_negative_option_value(arg: str, args_iterator: Iterator[str], option: str, unit: str) -> float:
+    value = _get_option_value(arg, args_iterator)
+    try:
+        number = float(value or "")
+    except ValueError:
+        number = -1.0
+    if number < 0:
+        raise PipaskException(f"{option} must be a non-negative number of {unit}")
+    return number
 
 
 @dataclass
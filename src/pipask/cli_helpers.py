@@ -66,6 +66,8 @@ class _SpinnerAndStatusColumn(ProgressColumn):
                 return CheckResultType.FAILURE.rich_icon
             elif task.fields["result"] is CheckResultType.ERROR:
                 return CheckResultType.ERROR.rich_icon
+            elif task.fields["result"] is CheckResultType.TIMED_OUT:
+                return CheckResultType.TIMED_OUT.rich_icon
             elif task.fields["result"] is CheckResultType.WARNING:
                 return CheckResultType.WARNING.rich_icon
             else:
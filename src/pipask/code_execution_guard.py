@@ -10,10 +10,16 @@ class PackageCodeExecutionGuard:
     _progress_task: ContextVar[CheckTask | None] = ContextVar("progress_task", default=None)
 
     @classmethod
-    def reset_confirmation_state(cls, progress_task: CheckTask | None = None):
-        cls._execution_allowed.set(None)
+    def reset_confirmation_state(cls, progress_task: CheckTask | None = None, interactive: bool = True):
+        # Without user interaction, there is nobody to give consent -> deny
+        cls._execution_allowed.set(None if interactive else False)
         cls._progress_task.set(progress_task)
 
+    @classmethod
+    def is_execution_allowed(cls) -> bool:
+        """Whether the user has already allowed 3rd party code execution (without asking)."""
+        return cls._execution_allowed.get() is True
+
     @classmethod
     def check_execution_allowed(cls, package_name: str | None, package_url: str | None):
         """
@@ -0,0 +1,240 @@
+"""
+Optional long-running pipask daemon.
+
+The daemon imports pipask's dependencies once and then forks a worker for each invocation, so that the worker
+starts with everything already loaded. The client (the `pipask` command) passes its arguments, working directory,
+environment and standard file descriptors to the worker, so prompts and output behave as if pipask ran in-process.
+
+This module is imported on every pipask invocation - keep the module-level imports limited to the standard library.
+"""
+
+import json
+import os
+import shutil
+import signal
+import socket
+import struct
+import sys
+from optparse import OptionParser
+from pathlib import Path
+
+_SOCKET_PATH_ENV_VAR = "PIPASK_DAEMON_SOCKET"
+_DISABLE_DAEMON_ENV_VAR = "PIPASK_NO_DAEMON"
+_LENGTH_FORMAT = "!Q"
+_PID_FORMAT = "!q"
+_EXIT_CODE_FORMAT = "!i"
+_STANDARD_FDS = [0, 1, 2]
+# Environment variables that affect values the daemon computes once and keeps for all workers
+# (the target interpreter's sys.path and prefixes, pip's cache location)
+_TARGET_ENV_VARS = ["PYTHONPATH", "PYTHONHOME", "PYTHONUSERBASE", "PYTHONNOUSERSITE", "HOME", "XDG_CACHE_HOME"]
+
+
+def is_daemon_supported() -> bool:
+    return hasattr(os, "fork") and hasattr(socket, "AF_UNIX") and hasattr(socket, "send_fds")
+
+
+def get_daemon_socket_path() -> Path:
+    if socket_path := os.environ.get(_SOCKET_PATH_ENV_VAR):
+        return Path(socket_path)
+    from platformdirs import user_runtime_dir
+
+    return Path(user_runtime_dir("pipask")) / "daemon.sock"
+
+
+def run_in_daemon(args: list[str]) -> int | None:
+    """
+    Run pipask with the given arguments in the daemon, if one is running.
+
+    :return: exit code of the invocation, or None if the daemon is not available and pipask should run in-process
+    """
+    if not is_daemon_supported() or os.environ.get(_DISABLE_DAEMON_ENV_VAR):
+        return None
+    socket_path = get_daemon_socket_path()
+    if not socket_path.exists():
+        return None
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(str(socket_path))
+    except OSError:
+        connection.close()
+        return None  # Stale socket, e.g., the daemon was killed
+
+    with connection:
+        request = json.dumps(
+            {
+                "args": args,
+                "cwd": os.getcwd(),
+                "env": dict(os.environ),
+                "target": get_target_environment_key(os.environ),
+            }
+        ).encode("utf-8")
+        socket.send_fds(connection, [struct.pack(_LENGTH_FORMAT, len(request)) + request], _STANDARD_FDS)
+        worker_pid_data = _recv_exactly(connection, struct.calcsize(_PID_FORMAT))
+        if worker_pid_data is None:
+            # The daemon refused the request before starting a worker, e.g., because it targets another environment
+            return None
+        worker_pid = struct.unpack(_PID_FORMAT, worker_pid_data)[0]
+
+        # The worker shares our terminal, but is not in our process group -> forward Ctrl+C
+        previous_handler = signal.signal(signal.SIGINT, lambda signum, frame: os.kill(worker_pid, signal.SIGINT))
+        try:
+            exit_code_data = _recv_exactly(connection, struct.calcsize(_EXIT_CODE_FORMAT))
+        finally:
+            signal.signal(signal.SIGINT, previous_handler)
+        if exit_code_data is None:
+            print("pipask daemon worker terminated unexpectedly", file=sys.stderr)
+            return 1
+        return struct.unpack(_EXIT_CODE_FORMAT, exit_code_data)[0]
+
+
+def get_target_environment_key(env: dict[str, str] | os._Environ) -> dict[str, str | None]:
+    """
+    Cheap identification of the environment pip installs into: the `pip` found on PATH (which determines
+    the target interpreter) and environment variables affecting the target's sys values and pip's locations.
+    """
+    pip_executable = shutil.which("pip", path=env.get("PATH"))
+    key: dict[str, str | None] = {"pip": os.path.realpath(pip_executable) if pip_executable else None}
+    for name in _TARGET_ENV_VARS:
+        key[name] = env.get(name)
+    return key
+
+
+def parse_daemon_arguments(args: list[str]):
+    parser = OptionParser(
+        prog="pipask daemon",
+        usage="%prog [options]",
+        description="Keep pipask's modules imported (and the SSL context created) in a long-running process,"
+        " so that pipask commands start faster. Each command still runs in a fresh worker forked from the daemon,"
+        " so connections and in-memory caches are not shared between commands - only the on-disk cache is,"
+        " as without the daemon. Use `pipask serve` to share upstream responses in memory.",
+    )
+    parser.add_option(
+        "--socket",
+        dest="socket",
+        metavar="path",
+        help=f"Unix socket to listen on (default: ${_SOCKET_PATH_ENV_VAR} or the user runtime directory).",
+    )
+    options, remaining_args = parser.parse_args(args)
+    if remaining_args:
+        parser.error(f"unexpected arguments: {' '.join(remaining_args)}")
+    return options
+
+
+def run_daemon(args: list[str]) -> None:
+    """Run the daemon in the foreground until interrupted."""
+    if not is_daemon_supported():
+        raise RuntimeError("pipask daemon is not supported on this platform")
+    options = parse_daemon_arguments(args)
+    socket_path = Path(options.socket) if options.socket else get_daemon_socket_path()
+
+    # Preloading computes and caches values that depend on the target environment (e.g., the target interpreter
+    # and its sys.path, locations in pip modules) -> only serve invocations with the same target environment
+    target_environment_key = get_target_environment_key(os.environ)
+    _preload()
+    socket_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    socket_path.unlink(missing_ok=True)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    previous_umask = os.umask(0o177)  # Only the current user may connect
+    try:
+        server.bind(str(socket_path))
+    finally:
+        os.umask(previous_umask)
+    server.listen()
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)  # Workers are reaped automatically
+    print(f"pipask daemon listening on {socket_path}", file=sys.stderr)
+    try:
+        with server:
+            while True:
+                connection, _ = server.accept()
+                if os.fork() == 0:
+                    server.close()
+                    _run_worker(connection, target_environment_key)  # never returns
+                connection.close()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        socket_path.unlink(missing_ok=True)
+
+
+def _preload() -> None:
+    """Import everything an invocation needs, except for pipask.main which captures the console at import time."""
+    import pipask.audit  # noqa: F401
+    import pipask.checks.checks_executor  # noqa: F401
+    import pipask.infra.pip  # noqa: F401
+    import pipask.report  # noqa: F401
+    import pipask.server  # noqa: F401
+    import pipask._vendor.pip._internal.commands.install  # noqa: F401
+    import pipask._vendor.pip._internal.network.session  # noqa: F401
+    import pipask._vendor.pip._internal.resolution.resolvelib.resolver  # noqa: F401
+    from pipask.utils import get_default_ssl_context
+
+    get_default_ssl_context()
+
+
+def _run_worker(connection: socket.socket, target_environment_key: dict[str, str | None]) -> None:
+    exit_code = 1
+    try:
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)  # subprocess needs to be able to wait for its children
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        request = _receive_request(connection)
+        if request.get("target") != target_environment_key:
+            # Another virtual environment is active or PATH differs; the client runs pipask in-process instead
+            connection.close()
+            os._exit(0)
+        connection.sendall(struct.pack(_PID_FORMAT, os.getpid()))
+        os.chdir(request["cwd"])
+        os.environ.clear()
+        os.environ.update(request["env"])
+        exit_code = _run_main(request["args"])
+    except BaseException as e:
+        print(f"pipask daemon worker failed: {e!r}", file=sys.stderr)
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            connection.sendall(struct.pack(_EXIT_CODE_FORMAT, exit_code))
+        finally:
+            os._exit(exit_code)
+
+
+def _receive_request(connection: socket.socket) -> dict:
+    header_size = struct.calcsize(_LENGTH_FORMAT)
+    data, fds, _flags, _address = socket.recv_fds(connection, 64 * 1024, len(_STANDARD_FDS))
+    if len(fds) != len(_STANDARD_FDS):
+        raise RuntimeError("Client did not pass standard file descriptors")
+    for received_fd, standard_fd in zip(fds, _STANDARD_FDS):
+        os.dup2(received_fd, standard_fd)
+        os.close(received_fd)
+    while len(data) < header_size:
+        data += connection.recv(header_size - len(data))
+    length = struct.unpack(_LENGTH_FORMAT, data[:header_size])[0]
+    payload = data[header_size:]
+    if len(payload) < length:
+        payload += _recv_exactly(connection, length - len(payload)) or b""
+    return json.loads(payload.decode("utf-8"))
+
+
+def _run_main(args: list[str]) -> int:
+    # Imported only in the worker so that the console is created for the client's terminal
+    import pipask.utils
+    from pipask.main import main
+
+    pipask.utils._HYPERLINKS_NOT_SUPPORTED = pipask.utils._terminal_does_not_support_hyperlinks()
+
+    try:
+        main(args)
+    except SystemExit as e:
+        if e.code is None:
+            return 0
+        return e.code if isinstance(e.code, int) else 1
+    return 0
+
+
+def _recv_exactly(connection: socket.socket, size: int) -> bytes | None:
+    data = b""
+    while len(data) < size:
+        chunk = connection.recv(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
@@ -0,0 +1,25 @@
+"""
+Entry point of the `pipask` command.
+
+Forwards the invocation to a running pipask daemon if there is one, and runs pipask in-process otherwise.
+Deliberately avoids importing anything heavy before it is clear that pipask runs in-process.
+"""
+
+import sys
+
+from pipask.daemon import run_daemon, run_in_daemon
+
+
+def main() -> None:
+    args = sys.argv[1:]
+    if len(args) and args[0] == "daemon":
+        run_daemon(args[1:])
+        return
+
+    exit_code = run_in_daemon(args)
+    if exit_code is not None:
+        sys.exit(exit_code)
+
+    from pipask.main import main as main_in_process
+
+    main_in_process(args)
@@ -0,0 +1,78 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from datetime import timedelta
+from optparse import Values
+from pathlib import Path
+from typing import Any
+
+from pipask._vendor.pip._internal.locations import USER_CACHE_DIR
+from pipask.infra.cassette import is_cassette_active
+
+logger = logging.getLogger(__name__)
+
+_PIPASK_CACHE_SUBDIR = "pipask"
+
+
+def get_pipask_cache_dir(options: Values | None = None) -> Path | None:
+    """
+    Directory for data persisted by pipask between runs, nested inside pip's cache directory.
+    Returns None if caching has been disabled (e.g., with --no-cache-dir), and while HTTP exchanges
+    are recorded or replayed, so that cassettes contain all exchanges and replays don't depend on the local cache.
+    """
+    if is_cassette_active():
+        return None
+    cache_dir = getattr(options, "cache_dir", USER_CACHE_DIR) if options is not None else USER_CACHE_DIR
+    if not cache_dir:
+        return None
+    return Path(os.path.abspath(os.path.expanduser(cache_dir))) / _PIPASK_CACHE_SUBDIR
+
+
+class JsonFileCache:
+    """
+    Persistent cache of JSON values with expiration, stored as one file per key.
+    Uses the same directory layout as pip's HTTP cache to keep the number of files per directory low.
+    Errors reading or writing the cache are not fatal - the cache behaves as if the entry was missing.
+    """
+
+    def __init__(self, directory: Path):
+        self._directory = directory
+
+    def get(self, key: str) -> Any | None:
+        path = self._get_path(key)
+        try:
+            entry = json.loads(path.read_bytes())
+            if entry["expires_at"] > time.time():
+                return entry["value"]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError):
+            logger.debug(f"Ignoring invalid cache entry {path}", exc_info=True)
+        return None
+
+    def set(self, key: str, value: Any, ttl: timedelta) -> None:
+        entry = {"expires_at": time.time() + ttl.total_seconds(), "value": value}
+        write_cache_file(self._get_path(key), json.dumps(entry).encode("utf-8"))
+
+    def _get_path(self, key: str) -> Path:
+        return get_cache_file_path(self._directory, key)
+
+
+def get_cache_file_path(directory: Path, key: str) -> Path:
+    # Same as pip's SafeFileCache
+    hashed = hashlib.sha224(key.encode("utf-8")).hexdigest()
+    return directory.joinpath(*hashed[:5], hashed)
+
+
+def write_cache_file(path: Path, data: bytes) -> None:
+    """Atomically replace a cache file so that concurrent readers never see a partial write; errors are ignored."""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile("wb", dir=path.parent, delete=False, suffix=".tmp") as tmp_file:
+            tmp_file.write(data)
+        os.replace(tmp_file.name, path)
+    except OSError:
+        logger.debug(f"Could not write cache entry {path}", exc_info=True)
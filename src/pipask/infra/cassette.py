@@ -0,0 +1,322 @@
+"""
+Recording of HTTP exchanges into a cassette file and their offline replay.
+
+Both the async httpx clients and the (sync) requests session of the vendored pip are covered.
+When replaying, responses can be delayed with a configurable latency and jitter, so that network conditions
+(e.g., 50ms vs 300ms round-trip times) can be reproduced deterministically.
+"""
+
+import asyncio
+import base64
+import gzip
+import hashlib
+import io
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+import httpx
+import requests
+import urllib3
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+from pipask.exception import PipaskException
+from pipask.infra.shared_transport import read_raw_content
+
+_CASSETTE_VERSION = 1
+
+_ExchangeKey = tuple[str, str, str, str]
+
+
+@dataclass
+class RecordedExchange:
+    method: str
+    url: str
+    accept: str
+    request_body_sha256: str
+    status_code: int
+    headers: list[tuple[str, str]]
+    content: bytes  # Raw, i.e., still encoded according to Content-Encoding
+
+    @property
+    def key(self) -> _ExchangeKey:
+        return self.method, self.url, self.accept, self.request_body_sha256
+
+
+@dataclass
+class Cassette:
+    """HTTP exchanges in the order they were recorded."""
+
+    exchanges: list[RecordedExchange] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+    _exchanges_by_key: dict[_ExchangeKey, list[RecordedExchange]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _replay_positions: dict[_ExchangeKey, int] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        for exchange in self.exchanges:
+            self._exchanges_by_key.setdefault(exchange.key, []).append(exchange)
+
+    def record(self, exchange: RecordedExchange) -> None:
+        with self._lock:
+            self.exchanges.append(exchange)
+            self._exchanges_by_key.setdefault(exchange.key, []).append(exchange)
+
+    def next_response(self, method: str, url: str, accept: str, body: bytes | str | None) -> RecordedExchange | None:
+        """
+        Find the recorded response for a request.
+        Repeated requests get the recorded responses in order; the last one is repeated when they run out.
+        """
+        key = (method, url, accept, _sha256(body))
+        with self._lock:
+            matching = self._exchanges_by_key.get(key)
+            if not matching:
+                return None
+            position = self._replay_positions.get(key, 0)
+            self._replay_positions[key] = position + 1
+            return matching[min(position, len(matching) - 1)]
+
+    def save(self, path: Path) -> None:
+        with self._lock:
+            lines = [json.dumps({"version": _CASSETTE_VERSION})]
+            for e in self.exchanges:
+                lines.append(
+                    json.dumps(
+                        {
+                            "method": e.method,
+                            "url": e.url,
+                            "accept": e.accept,
+                            "request_body_sha256": e.request_body_sha256,
+                            "status_code": e.status_code,
+                            "headers": e.headers,
+                            "content": base64.b64encode(e.content).decode("ascii"),
+                        }
+                    )
+                )
+        path.write_bytes(gzip.compress(("\n".join(lines) + "\n").encode("utf-8")))
+
+    @classmethod
+    def load(cls, path: Path) -> "Cassette":
+        """:raises PipaskException: if the cassette cannot be read"""
+        try:
+            header, *lines = gzip.decompress(path.read_bytes()).decode("utf-8").splitlines()
+            if json.loads(header).get("version") != _CASSETTE_VERSION:
+                raise ValueError("unsupported cassette version")
+            exchanges = []
+            for line in lines:
+                data = json.loads(line)
+                exchanges.append(
+                    RecordedExchange(
+                        method=data["method"],
+                        url=data["url"],
+                        accept=data["accept"],
+                        request_body_sha256=data["request_body_sha256"],
+                        status_code=data["status_code"],
+                        headers=[(name, value) for name, value in data["headers"]],
+                        content=base64.b64decode(data["content"]),
+                    )
+                )
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            raise PipaskException(f"Could not read HTTP cassette {path}: {e}") from e
+        return cls(exchanges=exchanges)
+
+
+@dataclass
+class ReplayLatency:
+    """Delay of replayed responses: uniformly distributed in latency ± jitter."""
+
+    latency_seconds: float = 0.0
+    jitter_seconds: float = 0.0
+    seed: int = 0
+
+    def __post_init__(self) -> None:
+        self._random = random.Random(self.seed)  # Seeded for reproducible runs
+
+    def sample(self) -> float:
+        jitter = self._random.uniform(-self.jitter_seconds, self.jitter_seconds) if self.jitter_seconds else 0.0
+        return max(0.0, self.latency_seconds + jitter)
+
+
+class CassetteRecordingTransport(httpx.AsyncBaseTransport):
+    """Transport recording the exchanges of another transport."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, cassette: Cassette):
+        self._transport = transport
+        self._cassette = cassette
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        method, url, accept = request.method, str(request.url), request.headers.get("Accept", "")
+        request_body = await request.aread()
+        response = await self._transport.handle_async_request(request)
+        content = await read_raw_content(response)
+        self._cassette.record(
+            RecordedExchange(
+                method=method,
+                url=url,
+                accept=accept,
+                request_body_sha256=_sha256(request_body),
+                status_code=response.status_code,
+                headers=list(response.headers.multi_items()),
+                content=content,
+            )
+        )
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            content=content,
+            request=request,
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class CassetteReplayTransport(httpx.AsyncBaseTransport):
+    """Transport answering requests from a cassette instead of the network."""
+
+    def __init__(self, cassette: Cassette, latency: ReplayLatency):
+        self._cassette = cassette
+        self._latency = latency
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        request_body = await request.aread()
+        exchange = self._cassette.next_response(
+            request.method, str(request.url), request.headers.get("Accept", ""), request_body
+        )
+        if exchange is None:
+            raise httpx.ConnectError(f"No recorded response for {request.method} {request.url}", request=request)
+        delay = self._latency.sample()
+        if delay:
+            await asyncio.sleep(delay)
+        return httpx.Response(exchange.status_code, headers=exchange.headers, content=exchange.content, request=request)
+
+
+class CassetteRecordingAdapter(BaseAdapter):
+    """Requests adapter recording the exchanges of another adapter."""
+
+    def __init__(self, adapter: BaseAdapter, cassette: Cassette):
+        super().__init__()
+        self._adapter = adapter
+        self._cassette = cassette
+
+    def send(self, request: requests.PreparedRequest, *args, **kwargs) -> requests.Response:
+        method, url, accept = request.method or "GET", request.url or "", request.headers.get("Accept", "")
+        response = self._adapter.send(request, *args, **kwargs)
+        content = (response.raw.read(decode_content=False) if response.raw is not None else None) or b""
+        self._cassette.record(
+            RecordedExchange(
+                method=method,
+                url=url,
+                accept=accept,
+                request_body_sha256=_sha256(request.body),
+                status_code=response.status_code,
+                headers=list(response.headers.items()),
+                content=content,
+            )
+        )
+        # The body was consumed by recording -> let the caller read (or stream) it again
+        response.raw = _raw_response(response.status_code, response.headers.items(), content)
+        return response
+
+    def close(self) -> None:
+        self._adapter.close()
+
+
+class CassetteReplayAdapter(BaseAdapter):
+    """Requests adapter answering requests from a cassette instead of the network."""
+
+    def __init__(self, cassette: Cassette, latency: ReplayLatency):
+        super().__init__()
+        self._cassette = cassette
+        self._latency = latency
+        self._response_builder = HTTPAdapter()
+
+    def send(self, request: requests.PreparedRequest, *args, **kwargs) -> requests.Response:
+        exchange = self._cassette.next_response(
+            request.method or "GET", request.url or "", request.headers.get("Accept", ""), request.body
+        )
+        if exchange is None:
+            raise requests.ConnectionError(f"No recorded response for {request.method} {request.url}", request=request)
+        delay = self._latency.sample()
+        if delay:
+            time.sleep(delay)
+        return self._response_builder.build_response(
+            request, _raw_response(exchange.status_code, exchange.headers, exchange.content)
+        )
+
+    def close(self) -> None:
+        self._response_builder.close()
+
+
+def _raw_response(status_code: int, headers, content: bytes) -> urllib3.HTTPResponse:
+    return urllib3.HTTPResponse(
+        body=io.BytesIO(content),
+        headers=urllib3.response.HTTPHeaderDict(list(headers)),
+        status=status_code,
+        preload_content=False,
+        decode_content=False,
+    )
+
+
+def _sha256(body: bytes | str | None) -> str:
+    if body is None:
+        body = b""
+    elif isinstance(body, str):
+        body = body.encode("utf-8")
+    return hashlib.sha256(body).hexdigest()
+
+
+@dataclass
+class _ActiveCassette:
+    cassette: Cassette
+    latency: ReplayLatency | None  # None when recording
+
+
+_active_cassette: _ActiveCassette | None = None
+
+
+def start_recording() -> Cassette:
+    global _active_cassette
+    _active_cassette = _ActiveCassette(Cassette(), latency=None)
+    return _active_cassette.cassette
+
+
+def start_replay(cassette: Cassette, latency: ReplayLatency | None = None) -> None:
+    global _active_cassette
+    _active_cassette = _ActiveCassette(cassette, latency=latency or ReplayLatency())
+
+
+def stop_cassette() -> Cassette | None:
+    global _active_cassette
+    active, _active_cassette = _active_cassette, None
+    return active.cassette if active is not None else None
+
+
+def is_cassette_active() -> bool:
+    return _active_cassette is not None
+
+
+def get_cassette_transport_wrapper() -> Callable[[httpx.AsyncBaseTransport], httpx.AsyncBaseTransport] | None:
+    """Transport wrapper recording or replaying requests of httpx clients, if a cassette is active."""
+    active = _active_cassette
+    if active is None:
+        return None
+    if active.latency is None:
+        return lambda transport: CassetteRecordingTransport(transport, active.cassette)
+    return lambda transport: CassetteReplayTransport(active.cassette, active.latency)  # type: ignore[arg-type]
+
+
+def wrap_requests_adapter(adapter: BaseAdapter) -> BaseAdapter:
+    """Wrap an HTTP adapter of a requests session to record or replay requests, if a cassette is active."""
+    active = _active_cassette
+    if active is None or not isinstance(adapter, HTTPAdapter):
+        return adapter  # E.g., adapters for file:// URLs
+    if active.latency is None:
+        return CassetteRecordingAdapter(adapter, active.cassette)
+    return CassetteReplayAdapter(active.cassette, active.latency)
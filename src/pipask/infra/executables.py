@@ -3,6 +3,9 @@ import subprocess
 from functools import cache
 import logging
 
+from pipask.metrics import measure_subprocess
+from pipask.tracing import trace_span
+
 logger = logging.getLogger(__name__)
 
 _fallback_python_command = "python3"
@@ -15,7 +18,8 @@ def get_pip_python_executable() -> str:
     pip_executable = shutil.which("pip") or "pip"
     command = [pip_executable, "debug"]
     logger.debug("Running command: %s", " ".join(command))
-    pip_debug_output = subprocess.run(command, check=True, text=True, capture_output=True)
+    with trace_span("Probe pip python executable", "interpreter"), measure_subprocess("pip debug"):
+        pip_debug_output = subprocess.run(command, check=True, text=True, capture_output=True)
 
     executable_line = next(line for line in pip_debug_output.stdout.splitlines() if line.startswith("sys.executable:"))
     if not executable_line:
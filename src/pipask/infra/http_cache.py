@@ -0,0 +1,279 @@
+"""
+Persistent HTTP cache for the async clients, similar to what CacheControl does for pip's requests session.
+
+GET responses are stored in pipask's directory inside pip's cache directory and reused according to their
+Cache-Control and Expires headers. Stale responses with an ETag or Last-Modified header are revalidated
+with a conditional request, so that an unchanged resource costs a 304 response instead of the full body.
+
+Additionally, 404 responses are remembered for a short time regardless of their caching headers,
+because many lookups legitimately keep failing (e.g., attestations of packages without trusted publishing).
+PyPI's JSON API and simple index are excluded - a release published in the meantime must be found right away.
+"""
+
+import email.utils
+import json
+import logging
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+
+import httpx
+
+from pipask._vendor.pip._internal.models.index import PyPI
+from pipask.infra.cache import JsonFileCache, get_cache_file_path, write_cache_file
+from pipask.infra.shared_transport import CACHE_STATUS_EXTENSION, read_raw_content
+
+logger = logging.getLogger(__name__)
+
+HTTP_CACHE_SUBDIR = "http"
+NOT_FOUND_CACHE_SUBDIR = "not-found"
+
+# Short, so that e.g. newly published attestations or download statistics are picked up soon
+NOT_FOUND_TTL = timedelta(hours=1)
+
+# Not found responses of these are not remembered (e.g., a version that has just been released)
+_NOT_FOUND_UNCACHEABLE_URL_PREFIXES = (f"{PyPI.pypi_url}/", f"{PyPI.simple_url}/")
+
+_CACHEABLE_STATUS_CODES = {200}
+# Headers describing the stored body rather than the resource; not to be updated from a 304 response
+_BODY_HEADERS = {"content-length", "content-encoding", "transfer-encoding"}
+
+
+@dataclass
+class _CacheEntry:
+    status_code: int
+    headers: list[tuple[str, str]]
+    content: bytes  # Raw, i.e., still encoded according to Content-Encoding
+    stored_at: float  # Adjusted by the Age header, i.e., when the response was generated upstream
+    vary: dict[str, str]  # Values of the request headers listed in the Vary response header
+
+    def is_fresh(self, now: float) -> bool:
+        return now - self.stored_at < _get_freshness_lifetime(httpx.Headers(self.headers))
+
+    def matches(self, request: httpx.Request) -> bool:
+        return all(request.headers.get(name, "") == value for name, value in self.vary.items())
+
+    def to_bytes(self) -> bytes:
+        metadata = {
+            "status_code": self.status_code,
+            "headers": self.headers,
+            "stored_at": self.stored_at,
+            "vary": self.vary,
+        }
+        return json.dumps(metadata).encode("utf-8") + b"\n" + self.content
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "_CacheEntry":
+        metadata, content = data.split(b"\n", 1)
+        parsed = json.loads(metadata)
+        return cls(
+            status_code=parsed["status_code"],
+            headers=[(name, value) for name, value in parsed["headers"]],
+            content=content,
+            stored_at=parsed["stored_at"],
+            vary=parsed["vary"],
+        )
+
+
+class HttpCacheTransport(httpx.AsyncBaseTransport):
+    """
+    Transport caching GET responses on disk according to their caching headers.
+    Errors reading or writing the cache are not fatal - the request is then made as if nothing was cached.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, directory: Path):
+        self._transport = transport
+        self._directory = directory
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        request_directives = _parse_cache_control(request.headers.get("Cache-Control", ""))
+        if request.method != "GET" or "no-store" in request_directives:
+            return await self._transport.handle_async_request(request)
+
+        path = get_cache_file_path(self._directory, _cache_key(request))
+        entry = self._load(path, request)
+        now = time.time()
+        if entry is not None and "no-cache" not in request_directives and entry.is_fresh(now):
+            return _to_response(entry, request, "hit")
+
+        upstream_request = request
+        if entry is not None and (validators := _get_validators(entry)):
+            logger.debug(f"Revalidating cached response for {request.url}")
+            upstream_request = httpx.Request(
+                request.method,
+                request.url,
+                headers={**request.headers, **validators},
+                extensions=request.extensions,
+            )
+        response = await self._transport.handle_async_request(upstream_request)
+
+        if response.status_code == 304 and entry is not None:
+            await response.aclose()
+            headers = httpx.Headers(entry.headers)
+            for name, value in response.headers.items():
+                if name.lower() not in _BODY_HEADERS:
+                    headers[name] = value
+            entry.headers = list(headers.multi_items())
+            entry.stored_at = _get_generated_at(response.headers, now)
+            write_cache_file(path, entry.to_bytes())
+            return _to_response(entry, request, "revalidated")
+
+        content = await read_raw_content(response)
+        if _is_storable(response):
+            new_entry = _CacheEntry(
+                status_code=response.status_code,
+                headers=list(response.headers.multi_items()),
+                content=content,
+                stored_at=_get_generated_at(response.headers, now),
+                vary={name: request.headers.get(name, "") for name in _get_vary(response.headers)},
+            )
+            write_cache_file(path, new_entry.to_bytes())
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            content=content,
+            request=request,
+            extensions={**response.extensions, CACHE_STATUS_EXTENSION: "miss"},
+        )
+
+    def _load(self, path: Path, request: httpx.Request) -> _CacheEntry | None:
+        try:
+            entry = _CacheEntry.from_bytes(path.read_bytes())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError):
+            logger.debug(f"Ignoring invalid HTTP cache entry {path}", exc_info=True)
+            return None
+        return entry if entry.matches(request) else None
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class NotFoundCacheTransport(httpx.AsyncBaseTransport):
+    """
+    Transport remembering GET requests that resulted in 404 Not Found, both in memory (for duplicate requests
+    within a run) and optionally on disk (for subsequent runs).
+    """
+
+    def __init__(
+        self, transport: httpx.AsyncBaseTransport, cache: JsonFileCache | None, ttl: timedelta = NOT_FOUND_TTL
+    ):
+        self._transport = transport
+        self._cache = cache
+        self._ttl = ttl
+        self._not_found_until: dict[str, float] = {}
+        self._next_cleanup = time.monotonic() + ttl.total_seconds()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != "GET" or str(request.url).startswith(_NOT_FOUND_UNCACHEABLE_URL_PREFIXES):
+            return await self._transport.handle_async_request(request)
+
+        key = _cache_key(request)
+        now = time.monotonic()
+        if self._not_found_until.get(key, 0) > now or (self._cache is not None and self._cache.get(key)):
+            self._not_found_until.setdefault(key, now + self._ttl.total_seconds())
+            logger.debug(f"Reusing cached 404 response for {request.url}")
+            return httpx.Response(404, request=request, extensions={CACHE_STATUS_EXTENSION: "hit"})
+
+        response = await self._transport.handle_async_request(request)
+        if response.status_code == 404:
+            self._remove_expired_entries(now)
+            self._not_found_until[key] = now + self._ttl.total_seconds()
+            if self._cache is not None:
+                self._cache.set(key, True, self._ttl)
+        return response
+
+    def _remove_expired_entries(self, now: float) -> None:
+        # Relevant for long-running processes (e.g., the audit service)
+        if now < self._next_cleanup:
+            return
+        self._not_found_until = {key: until for key, until in self._not_found_until.items() if until > now}
+        self._next_cleanup = now + self._ttl.total_seconds()
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def _cache_key(request: httpx.Request) -> str:
+    # Different representations or credentials may result in different responses.
+    # The key is hashed to get the file name, so credentials are not persisted.
+    return "\n".join([str(request.url), request.headers.get("Accept", ""), request.headers.get("Authorization", "")])
+
+
+def _to_response(entry: _CacheEntry, request: httpx.Request, cache_status: str) -> httpx.Response:
+    return httpx.Response(
+        entry.status_code,
+        headers=entry.headers,
+        content=entry.content,
+        request=request,
+        extensions={CACHE_STATUS_EXTENSION: cache_status},
+    )
+
+
+def _is_storable(response: httpx.Response) -> bool:
+    if response.status_code not in _CACHEABLE_STATUS_CODES or "*" in _get_vary(response.headers):
+        return False
+    directives = _parse_cache_control(response.headers.get("Cache-Control", ""))
+    if "no-store" in directives:
+        return False
+    # Responses that are never fresh are still worth storing if they can be revalidated cheaply
+    has_validator = "ETag" in response.headers or "Last-Modified" in response.headers
+    return has_validator or _get_freshness_lifetime(response.headers) > 0
+
+
+def _get_validators(entry: _CacheEntry) -> dict[str, str]:
+    headers = httpx.Headers(entry.headers)
+    validators = {}
+    if (etag := headers.get("ETag")) is not None:
+        validators["If-None-Match"] = etag
+    if (last_modified := headers.get("Last-Modified")) is not None:
+        validators["If-Modified-Since"] = last_modified
+    return validators
+
+
+def _get_freshness_lifetime(headers: httpx.Headers) -> float:
+    directives = _parse_cache_control(headers.get("Cache-Control", ""))
+    if "no-cache" in directives:
+        return 0
+    if "max-age" in directives:
+        try:
+            return float(directives["max-age"] or 0)
+        except ValueError:
+            return 0
+    if (expires := _parse_http_date(headers.get("Expires"))) is not None:
+        date = _parse_http_date(headers.get("Date"))
+        return expires - date if date is not None else 0
+    # No heuristic freshness (unlike browsers), so that nothing is reused for longer than upstream allows
+    return 0
+
+
+def _get_generated_at(headers: httpx.Headers, received_at: float) -> float:
+    try:
+        age = max(0.0, float(headers.get("Age", 0)))
+    except ValueError:
+        age = 0.0
+    return received_at - age
+
+
+def _get_vary(headers: httpx.Headers) -> list[str]:
+    return [name.strip() for name in headers.get("Vary", "").split(",") if name.strip()]
+
+
+def _parse_cache_control(value: str) -> dict[str, str | None]:
+    directives: dict[str, str | None] = {}
+    for directive in value.split(","):
+        name, _, argument = directive.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') if argument else None
+    return directives
+
+
+def _parse_http_date(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
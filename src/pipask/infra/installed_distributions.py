@@ -0,0 +1,40 @@
+import hashlib
+import logging
+from dataclasses import dataclass
+
+from pipask._vendor.pip._internal.metadata import BaseDistribution
+from pipask._vendor.pip._internal.metadata.importlib import Environment
+from pipask.infra.sys_values import get_pip_sys_values
+
+logger = logging.getLogger(__name__)
+
+# Files identifying the exact installed content of a distribution, in order of preference
+_FINGERPRINT_FILES = ["RECORD", "METADATA", "PKG-INFO"]
+
+
+@dataclass(frozen=True)
+class InstalledDistribution:
+    name: str
+    version: str
+    fingerprint: str
+    """Hash of the distribution's RECORD file (or its metadata if there is no RECORD)"""
+
+
+def get_installed_distributions() -> list[InstalledDistribution]:
+    """Enumerate all distributions installed in the *target* environment."""
+    environment = Environment.from_paths(get_pip_sys_values().path)
+    return [
+        InstalledDistribution(name=dist.canonical_name, version=str(dist.version), fingerprint=_fingerprint(dist))
+        for dist in environment.iter_all_distributions()
+    ]
+
+
+def _fingerprint(dist: BaseDistribution) -> str:
+    for filename in _FINGERPRINT_FILES:
+        try:
+            content = dist.read_text(filename)
+        except (FileNotFoundError, UnicodeDecodeError):
+            continue
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+    logger.debug("No metadata files found to fingerprint %s", dist.canonical_name)
+    return ""
@@ -1,17 +1,20 @@
+import email.message
 import logging
-from typing import Tuple
+from typing import Collection, Iterable, Iterator, Tuple
 
+from packaging.requirements import Requirement
 from packaging.utils import (
     InvalidSdistFilename,
     InvalidWheelFilename,
+    NormalizedName,
     canonicalize_name,
     parse_sdist_filename,
     parse_wheel_filename,
 )
 from packaging.version import Version
 
-import pipask._vendor.pip._internal.utils.temp_dir
-from pipask._vendor.pip._internal.metadata import BaseDistribution, get_metadata_distribution
+from pipask._vendor.pip._internal.metadata import BaseDistribution
+from pipask._vendor.pip._internal.metadata.base import BaseEntryPoint, InfoPath
 from pipask._vendor.pip._internal.models.index import PyPI
 from pipask._vendor.pip._internal.models.link import Link
 from pipask._vendor.pip._internal.network.session import PipSession
@@ -28,37 +31,109 @@ from pipask.infra.pypi import (
 logger = logging.getLogger(__name__)
 
 
+def _release_metadata_fields(release_info: ReleaseResponse) -> list[tuple[str, str]]:
+    info = release_info.info
+    fields = [
+        ("Metadata-Version", "2.1"),
+        ("Name", info.name),
+        ("Version", info.version),
+    ]
+    if info.summary:
+        fields.append(("Summary", info.summary))
+    if info.home_page:
+        fields.append(("Home-page", info.home_page))
+    if info.download_url:
+        fields.append(("Download-URL", info.download_url))
+    if info.author:
+        fields.append(("Author", info.author))
+    if info.author_email:
+        fields.append(("Author-email", info.author_email))
+    if info.license:
+        fields.append(("License", info.license))
+    if info.classifiers:
+        fields.extend(("Classifier", classifier) for classifier in info.classifiers)
+    if info.requires_python:
+        fields.append(("Requires-Python", info.requires_python))
+    if info.requires_dist is not None:
+        fields.extend(("Requires-Dist", req) for req in info.requires_dist)
+    if info.provides_extra:
+        fields.extend(("Provides-Extra", extra) for extra in info.provides_extra)
+    return fields
+
+
 def synthesize_release_metadata_file(release_info: ReleaseResponse) -> str:
     """Synthesize a release metadata file for a project release from PyPI."""
-    lines = [
-        "Metadata-Version: 2.1",
-        f"Name: {release_info.info.name}",
-        f"Version: {release_info.info.version}",
-    ]
-    if release_info.info.summary:
-        lines.append(f"Summary: {release_info.info.summary}")
-    if release_info.info.home_page:
-        lines.append(f"Home-page: {release_info.info.home_page}")
-    if release_info.info.download_url:
-        lines.append(f"Download-URL: {release_info.info.download_url}")
-    if release_info.info.author:
-        lines.append(f"Author: {release_info.info.author}")
-    if release_info.info.author_email:
-        lines.append(f"Author-email: {release_info.info.author_email}")
-    if release_info.info.license:
-        lines.append(f"License: {release_info.info.license}")
-    if release_info.info.classifiers:
-        for classifier in release_info.info.classifiers:
-            lines.append(f"Classifier: {classifier}")
-    if release_info.info.requires_python:
-        lines.append(f"Requires-Python: {release_info.info.requires_python}")
-    if release_info.info.requires_dist is not None:
-        for req in release_info.info.requires_dist:
-            lines.append(f"Requires-Dist: {req}")
-    if release_info.info.provides_extra:
-        for extra in release_info.info.provides_extra:
-            lines.append(f"Provides-Extra: {extra}")
-    return "\n".join(lines)
+    return "\n".join(f"{field}: {value}" for field, value in _release_metadata_fields(release_info))
+
+
+class ReleaseInfoDistribution(BaseDistribution):
+    """
+    Distribution backed only by release metadata from the PyPI JSON API, held in memory.
+
+    Unlike `get_metadata_distribution()`, it doesn't write a METADATA file to a temporary directory
+    and parse it back, and it works the same regardless of the pip metadata backend.
+    """
+
+    def __init__(self, release_info: ReleaseResponse):
+        self._release_info = release_info
+
+    @property
+    def location(self) -> str | None:
+        return None
+
+    @property
+    def info_location(self) -> str | None:
+        return None
+
+    @property
+    def installed_location(self) -> str | None:
+        return None
+
+    @property
+    def canonical_name(self) -> NormalizedName:
+        return canonicalize_name(self._release_info.info.name)
+
+    @property
+    def version(self) -> Version:
+        return Version(self._release_info.info.version)
+
+    def is_file(self, path: InfoPath) -> bool:
+        return False
+
+    def iter_distutils_script_names(self) -> Iterator[str]:
+        return iter(())
+
+    def read_text(self, path: InfoPath) -> str:
+        raise FileNotFoundError(path)
+
+    def iter_entry_points(self) -> Iterable[BaseEntryPoint]:
+        return []
+
+    def _metadata_impl(self) -> email.message.Message:
+        metadata = email.message.Message()
+        for field, value in _release_metadata_fields(self._release_info):
+            metadata[field] = value  # Appends rather than replaces for repeated fields
+        return metadata
+
+    def iter_provided_extras(self) -> Iterable[str]:
+        return self._release_info.info.provides_extra or []
+
+    def is_extra_provided(self, extra: str) -> bool:
+        return any(
+            canonicalize_name(provided_extra) == canonicalize_name(extra)
+            for provided_extra in self._release_info.info.provides_extra or []
+        )
+
+    def iter_dependencies(self, extras: Collection[str] = ()) -> Iterable[Requirement]:
+        contexts = [{"extra": extra} for extra in extras]
+        for req_string in self._release_info.info.requires_dist or []:
+            req = Requirement(req_string)
+            if not req.marker:
+                yield req
+            elif not extras and req.marker.evaluate({"extra": ""}):
+                yield req
+            elif any(req.marker.evaluate(context) for context in contexts):
+                yield req
 
 
 # Making this private to avoid inadvertent use without checking that the hash or URL matches PyPI index
@@ -67,16 +142,10 @@ def _get_pypi_metadata_distribution(
     version: Version,
     pip_session: PipSession,
 ) -> BaseDistribution | None:
-    if pipask._vendor.pip._internal.utils.temp_dir._tempdir_manager is None:
-        raise RuntimeError(
-            # Required inside get_metadata_distribution(), fail fast
-            "Tempdir manager is not initialized. This is required by pip._internal.metadata.importlib._dists.Distribution.from_metadata_file_contents"
-        )
     release = get_pypi_release_info_sync(canonical_name, str(version), pip_session)
     if release is None:
         return None
-    metadata = synthesize_release_metadata_file(release)
-    return get_metadata_distribution(metadata.encode(), None, canonical_name)
+    return ReleaseInfoDistribution(release)
 
 
 def _is_from_pypi(link: Link) -> bool:
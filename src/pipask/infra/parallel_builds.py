@@ -0,0 +1,101 @@
+"""
+Concurrent metadata preparation of source distributions, used once the user allowed 3rd party code execution.
+
+Preparing metadata of a source distribution is mostly waiting for subprocesses (installing build dependencies
+into an isolated environment and running the PEP 517 hooks), so the builds run in a bounded thread pool,
+each driving its own subprocesses. Log output of each build is held back and emitted in one piece
+when the build finishes, so that output of concurrent builds doesn't interleave.
+"""
+
+import contextvars
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Iterator, Sequence, TypeVar
+
+T = TypeVar("T")
+
+# Builds mostly wait for downloads of build dependencies and for subprocesses
+MAX_PARALLEL_BUILDS = 4
+
+
+class _BuildOutputCapture(logging.Filter):
+    """Log handler filter holding back records logged by threads that capture their output."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._buffers: dict[int, list[logging.LogRecord]] = {}
+        self._flush_lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        buffer = self._buffers.get(threading.get_ident())
+        if buffer is None:
+            return True
+        # The filter is called for each handler the record is passed to
+        if not buffer or buffer[-1] is not record:
+            buffer.append(record)
+        return False
+
+    def is_capturing(self) -> bool:
+        return threading.get_ident() in self._buffers
+
+    @contextmanager
+    def capture(self) -> Iterator[None]:
+        thread_id = threading.get_ident()
+        self._buffers[thread_id] = buffer = []
+        try:
+            yield
+        finally:
+            del self._buffers[thread_id]
+            with self._flush_lock:
+                for record in buffer:
+                    logging.getLogger(record.name).callHandlers(record)
+
+
+_output_capture = _BuildOutputCapture()
+
+
+def is_capturing_build_output() -> bool:
+    """Whether the current thread runs a concurrent build (e.g., interactive spinners must not be used)."""
+    return _output_capture.is_capturing()
+
+
+def prepare_concurrently(items: Sequence[T], prepare: Callable[[T], object], max_workers: int | None = None) -> None:
+    """
+    Call `prepare` for all items in a bounded thread pool, with output of each call captured and logged at once.
+
+    Stops starting new calls after the first failure and re-raises the exception of the first failed item
+    once the running calls finish, similar to preparing the items one by one.
+    """
+    if len(items) <= 1:
+        for item in items:
+            prepare(item)
+        return
+
+    def run_captured(item: T) -> None:
+        with _output_capture.capture():
+            prepare(item)
+
+    handlers = logging.getLogger().handlers
+    for handler in handlers:
+        handler.addFilter(_output_capture)
+    executor = ThreadPoolExecutor(max_workers or MAX_PARALLEL_BUILDS, thread_name_prefix="pipask-build")
+    try:
+        # Each call gets its own copy of the context, e.g., with the code execution consent
+        futures = [executor.submit(contextvars.copy_context().run, run_captured, item) for item in items]
+        for future in futures:
+            future.add_done_callback(lambda done: _cancel_on_failure(done, futures))
+        for future in futures:
+            if not future.cancelled() and future.exception() is not None:
+                raise future.exception()  # type: ignore[misc]
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        for handler in handlers:
+            handler.removeFilter(_output_capture)
+
+
+def _cancel_on_failure(done: Future, futures: list[Future]) -> None:
+    if not done.cancelled() and done.exception() is not None:
+        for future in futures:
+            future.cancel()
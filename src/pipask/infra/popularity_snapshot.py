@@ -0,0 +1,171 @@
+"""
+Compact snapshot of popularity data of the most popular PyPI projects, so that their download and repository
+popularity checks don't need requests to pypistats.org and GitHub/GitLab.
+
+The snapshot is a binary file that is memory-mapped rather than parsed, so that opening it is cheap
+regardless of its size. Layout (little-endian):
+- header: magic, format version, creation time (epoch seconds), number of records
+- fixed-size records sorted by canonical project name, allowing binary search
+- a blob with the UTF-8 encoded strings (project names and repository URLs) referenced by the records
+"""
+
+import logging
+import mmap
+import os
+import struct
+import tempfile
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterator
+
+from packaging.utils import canonicalize_name
+
+logger = logging.getLogger(__name__)
+
+POPULARITY_SNAPSHOT_FILE = "popularity-snapshot.bin"
+# Older snapshots are ignored, so that checks don't rely on outdated popularity
+MAX_SNAPSHOT_AGE = timedelta(days=30)
+
+_MAGIC = b"PIPASKPS"
+_FORMAT_VERSION = 1
+_HEADER = struct.Struct("<8sHdI")  # magic, version, created_at, record count
+# name offset, name length, monthly downloads, stars, first upload (epoch seconds), repo offset, repo length
+_RECORD = struct.Struct("<IHqiqIH")
+_UNKNOWN = -1
+
+
+@dataclass(frozen=True)
+class PopularityEntry:
+    project: str  # Canonical name
+    monthly_downloads: int | None
+    repo_url: str | None  # From attestations of the latest release at the time of the snapshot
+    star_count: int | None
+    first_upload_time: datetime | None
+
+
+class PopularitySnapshot:
+    """Read-only view of a snapshot file. Use `open_popularity_snapshot()` to open one."""
+
+    def __init__(self, data: mmap.mmap | bytes):
+        if len(data) < _HEADER.size:
+            raise ValueError("not a popularity snapshot")
+        magic, version, created_at, self._count = _HEADER.unpack_from(data, 0)
+        if magic != _MAGIC or version != _FORMAT_VERSION:
+            raise ValueError("not a popularity snapshot or unsupported version")
+        self._data = data
+        self._blob_start = _HEADER.size + self._count * _RECORD.size
+        if len(data) < self._blob_start:
+            raise ValueError("truncated popularity snapshot")
+        self.created_at = datetime.fromtimestamp(created_at, timezone.utc)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def get(self, project_name: str) -> PopularityEntry | None:
+        name = canonicalize_name(project_name).encode("utf-8")
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            record = _RECORD.unpack_from(self._data, _HEADER.size + middle * _RECORD.size)
+            record_name = self._get_string(record[0], record[1])
+            if record_name == name:
+                return self._to_entry(record)
+            if record_name < name:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def _to_entry(self, record: tuple) -> PopularityEntry:
+        name_offset, name_length, downloads, stars, first_upload, repo_offset, repo_length = record
+        return PopularityEntry(
+            project=self._get_string(name_offset, name_length).decode("utf-8"),
+            monthly_downloads=downloads if downloads != _UNKNOWN else None,
+            repo_url=self._get_string(repo_offset, repo_length).decode("utf-8") if repo_length else None,
+            star_count=stars if stars != _UNKNOWN else None,
+            first_upload_time=datetime.fromtimestamp(first_upload, timezone.utc) if first_upload != _UNKNOWN else None,
+        )
+
+    def _get_string(self, offset: int, length: int) -> bytes:
+        start = self._blob_start + offset
+        return self._data[start : start + length]
+
+    def close(self) -> None:
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+
+def open_popularity_snapshot(path: Path, max_age: timedelta = MAX_SNAPSHOT_AGE) -> PopularitySnapshot | None:
+    """Open the snapshot if it exists and is fresh enough, None otherwise."""
+    try:
+        with open(path, "rb") as snapshot_file:
+            data = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError):  # ValueError for an empty file
+        logger.debug(f"Cannot open popularity snapshot {path}", exc_info=True)
+        return None
+    try:
+        snapshot = PopularitySnapshot(data)
+    except ValueError:
+        logger.debug(f"Ignoring invalid popularity snapshot {path}", exc_info=True)
+        data.close()
+        return None
+    if snapshot.created_at < datetime.now(timezone.utc) - max_age:
+        logger.debug(f"Ignoring popularity snapshot from {snapshot.created_at:%Y-%m-%d}, it is outdated")
+        snapshot.close()
+        return None
+    return snapshot
+
+
+@contextmanager
+def closing_popularity_snapshot(pipask_cache_dir: Path | None) -> Iterator[PopularitySnapshot | None]:
+    """The snapshot in the given cache directory if it is usable (see `open_popularity_snapshot()`), closed on exit."""
+    snapshot = open_popularity_snapshot(pipask_cache_dir / POPULARITY_SNAPSHOT_FILE) if pipask_cache_dir else None
+    try:
+        yield snapshot
+    finally:
+        if snapshot is not None:
+            snapshot.close()
+
+
+def serialize_popularity_snapshot(entries: list[PopularityEntry], created_at: datetime) -> bytes:
+    records = []
+    blob = bytearray()
+
+    def add_string(value: str) -> tuple[int, int]:
+        encoded = value.encode("utf-8")
+        offset = len(blob)
+        blob.extend(encoded)
+        return offset, len(encoded)
+
+    by_name = {canonicalize_name(entry.project).encode("utf-8"): entry for entry in entries}
+    for name in sorted(by_name):
+        entry = by_name[name]
+        name_offset, name_length = add_string(name.decode("utf-8"))
+        repo_offset, repo_length = add_string(entry.repo_url) if entry.repo_url else (0, 0)
+        records.append(
+            _RECORD.pack(
+                name_offset,
+                name_length,
+                entry.monthly_downloads if entry.monthly_downloads is not None else _UNKNOWN,
+                entry.star_count if entry.star_count is not None else _UNKNOWN,
+                int(entry.first_upload_time.timestamp()) if entry.first_upload_time is not None else _UNKNOWN,
+                repo_offset,
+                repo_length,
+            )
+        )
+    header = _HEADER.pack(_MAGIC, _FORMAT_VERSION, created_at.timestamp(), len(records))
+    return header + b"".join(records) + bytes(blob)
+
+
+def write_popularity_snapshot(path: Path, data: bytes) -> None:
+    """Validate and store a serialized snapshot; raises ValueError if it is invalid and OSError if it can't be written."""
+    PopularitySnapshot(data)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Replaced atomically, so that running pipask processes keep using the previous snapshot
+    with tempfile.NamedTemporaryFile("wb", dir=path.parent, delete=False, suffix=".tmp") as tmp_file:
+        tmp_file.write(data)
+    os.replace(tmp_file.name, path)
@@ -1,20 +1,31 @@
 import logging
 import urllib.parse
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta
+from pathlib import Path
 from typing import List, Optional, Tuple
 
 import httpx
+from packaging.utils import canonicalize_name
 from pydantic import BaseModel, Field
 
 from pipask._vendor.pip._internal.models.index import PyPI  # type: ignore
 from pipask._vendor.pip._internal.network.session import PipSession  # type: ignore
+from pipask.infra.cache import JsonFileCache
 from pipask.infra.pip_types import InstallationReportItem
 from pipask.infra.repo_client import REPO_URL_REGEX
 from pipask.utils import simple_get_request, simple_get_request_sync
 
 logger = logging.getLogger(__name__)
 
+# The first upload of a project doesn't change, unless all its older files get deleted
+# or the project is deleted and its name reused; expire entries eventually to account for that
+_FIRST_UPLOAD_TTL = timedelta(days=30)
+# Provenance of an uploaded file is immutable; attestations can only be uploaded together with the file,
+# but absence is cached for a shorter time in case PyPI backfills them
+_ATTESTATIONS_TTL = timedelta(days=365)
+_NO_ATTESTATIONS_TTL = timedelta(days=1)
+
 
 def _get_maybe_repo_url(url: str) -> str | None:
     match = REPO_URL_REGEX.match(url)
@@ -116,6 +127,7 @@ class VulnerabilityPypi(BaseModel):
 
 class ProjectReleaseFile(BaseModel):
     filename: str
+    url: Optional[str] = None
     upload_time: datetime = Field(..., alias="upload_time_iso_8601")
     yanked: bool = False
     digests: dict[str, str] = Field(default_factory=dict)
@@ -145,6 +157,15 @@ class DistributionsResponse(BaseModel):
     # versions: List[str]
 
 
+class DistributionUploadTime(BaseModel):
+    upload_time: Optional[datetime] = Field(None, alias="upload-time")
+
+
+class DistributionUploadTimesResponse(BaseModel):
+    # Popular projects have thousands of files; only the upload times are needed, so skip validating the rest
+    files: List[DistributionUploadTime] = Field(default_factory=list)
+
+
 class AttestationPublisher(BaseModel):
     # claims: Optional[dict] = None
     kind: str
@@ -207,15 +228,58 @@ class VerifiedPypiReleaseInfo:
     def pypi_url(self) -> str:
         return f"https://pypi.org/project/{self.name}/{self.version}/"
 
+    @property
+    def release_file_sha256(self) -> str | None:
+        return next(
+            (
+                file.digests.get("sha256")
+                for file in self.release_response.urls
+                if file.filename == self.release_filename
+            ),
+            None,
+        )
+
+
+@dataclass
+class PypiReleaseFile:
+    """
+    A file of a release on PyPI, *not* verified to match any distribution to be installed
+    (e.g., a file of the latest release of a project).
+    """
+
+    name: str
+    version: str
+    filename: str
+    sha256: str | None
+
 
 class PypiClient:
-    def __init__(self, async_client: None | httpx.AsyncClient = None):
+    def __init__(self, async_client: None | httpx.AsyncClient = None, pipask_cache_dir: Path | None = None):
         self.client = async_client or httpx.AsyncClient(follow_redirects=True)
+        self._first_upload_cache = JsonFileCache(pipask_cache_dir / "first-upload") if pipask_cache_dir else None
+        self._attestations_cache = JsonFileCache(pipask_cache_dir / "attestations") if pipask_cache_dir else None
 
     async def get_project_info(self, project_name: str) -> ProjectResponse | None:
         """Get project metadata from PyPI."""
         return await simple_get_request(_project_info_url(project_name), self.client, ProjectResponse)
 
+    async def get_latest_release_file(self, project_name: str) -> PypiReleaseFile | None:
+        """
+        Get one of the files (preferably a wheel) of the latest release of a project,
+        or None if the project doesn't exist or the release has no files.
+        """
+        # The project metadata contains the same fields as the metadata of its latest release
+        release_response = await simple_get_request(_project_info_url(project_name), self.client, ReleaseResponse)
+        if release_response is None or not release_response.urls:
+            return None
+        release_file = next((f for f in release_response.urls if f.filename.endswith(".whl")), release_response.urls[0])
+        return PypiReleaseFile(
+            name=release_response.info.name,
+            version=release_response.info.version,
+            filename=release_file.filename,
+            sha256=release_file.digests.get("sha256"),
+        )
+
     async def _get_release_info(self, project_name: str, version: str) -> ReleaseResponse | None:
         """Get metadata for a specific project release from PyPI."""
         # Private to avoid calling this without the checks in get__matching_release_info()
@@ -242,31 +306,61 @@ class PypiClient:
             return VerifiedPypiReleaseInfo(pypi_release_info, filename)
         elif package.download_info.archive_info is not None and package.download_info.archive_info.hashes is not None:
             # Not from PyPI, but we can check if the hash matches PyPI (this will match, e.g., for index proxies)
-            acceptable_hashes_to_filename: dict[Tuple[str, str], str] = {
-                digest: url.filename
-                for url in pypi_release_info.urls
-                for digest in url.digests.items()
-                if digest[0] != "md5"
-            }
             package_hashes: list[Tuple[str, str]] = list(package.download_info.archive_info.hashes.items())
-            for package_hash in package_hashes:
-                if package_hash in acceptable_hashes_to_filename:
-                    # We have a match, the metadata can be used
-                    logger.debug(f"\n\nHash of package {name} matches a PyPI release hash\n\n")
-                    filename = acceptable_hashes_to_filename[package_hash]
-                    return VerifiedPypiReleaseInfo(pypi_release_info, filename)
+            return _verify_release_by_hashes(pypi_release_info, package_hashes)
         # No match found, we cannot reliably say the PyPI metadata belong to the package
         logger.debug(f"Hash of package {name} does not match any PyPI release hash")
         return None
 
+    async def get_release_info_matching_hashes(
+        self, project_name: str, version: str, hashes: list[Tuple[str, str]]
+    ) -> VerifiedPypiReleaseInfo | None:
+        """
+        Get release info for a release pinned with hashes (e.g., in a lockfile).
+        The release info is returned only if one of the hashes (hash name and hex digest) matches a PyPI release file.
+        """
+        pypi_release_info = await self._get_release_info(project_name, version)
+        if pypi_release_info is None:
+            return None
+        return _verify_release_by_hashes(pypi_release_info, hashes)
+
+    async def get_release_vulnerabilities(self, project_name: str, version: str) -> list[VulnerabilityPypi] | None:
+        """
+        Get known vulnerabilities for a project release.
+        Unlike other release metadata, this doesn't require verifying the origin of the distribution,
+        because vulnerability reports are tied to the project name and version.
+        """
+        pypi_release_info = await self._get_release_info(project_name, version)
+        return pypi_release_info.vulnerabilities if pypi_release_info is not None else None
+
     async def get_attestations(self, verified_release_info: VerifiedPypiReleaseInfo) -> AttestationResponse | None:
-        url = _integrity_url(
-            verified_release_info.name,
-            verified_release_info.version,
-            verified_release_info.release_filename,
+        release_file = PypiReleaseFile(
+            name=verified_release_info.name,
+            version=verified_release_info.version,
+            filename=verified_release_info.release_filename,
+            sha256=verified_release_info.release_file_sha256,
         )
+        return await self.get_release_file_attestations(release_file)
+
+    async def get_release_file_attestations(self, release_file: PypiReleaseFile) -> AttestationResponse | None:
+        # Keyed by the file hash, so that a file re-uploaded under the same name is not mistaken for the cached one
+        cache_key = f"{release_file.filename}#sha256={release_file.sha256}" if release_file.sha256 else None
+        if self._attestations_cache is not None and cache_key is not None:
+            cached = self._attestations_cache.get(cache_key)
+            if cached is not None:
+                attestations = cached["attestations"]
+                return AttestationResponse.model_validate(attestations) if attestations is not None else None
+
+        url = _integrity_url(release_file.name, release_file.version, release_file.filename)
         headers = {"Accept": "application/vnd.pypi.integrity.v1+json"}
-        return await simple_get_request(url, self.client, AttestationResponse, headers=headers)
+        response = await simple_get_request(url, self.client, AttestationResponse, headers=headers)
+        if self._attestations_cache is not None and cache_key is not None:
+            self._attestations_cache.set(
+                cache_key,
+                {"attestations": response.model_dump(mode="json") if response is not None else None},
+                _ATTESTATIONS_TTL if response is not None else _NO_ATTESTATIONS_TTL,
+            )
+        return response
 
     async def get_distributions(self, project_name: str) -> DistributionsResponse | None:
         """Get all distribution download URLs for a project's available releases from PyPI."""
@@ -275,10 +369,43 @@ class PypiClient:
         headers = {"Accept": "application/vnd.pypi.simple.v1+json"}
         return await simple_get_request(url, self.client, DistributionsResponse, headers=headers)
 
+    async def get_first_upload_time(self, project_name: str) -> datetime | None:
+        """Time of the first upload of any file of the project to PyPI, or None if the project has no files."""
+        cache_key = canonicalize_name(project_name)
+        if self._first_upload_cache is not None and (cached := self._first_upload_cache.get(cache_key)) is not None:
+            return datetime.fromisoformat(cached)
+
+        url = f"{_pypi_simple_url}/{project_name}/"
+        headers = {"Accept": "application/vnd.pypi.simple.v1+json"}
+        response = await simple_get_request(url, self.client, DistributionUploadTimesResponse, headers=headers)
+        if response is None:
+            return None
+        first_upload_time = min((file.upload_time for file in response.files if file.upload_time), default=None)
+        if first_upload_time is not None and self._first_upload_cache is not None:
+            self._first_upload_cache.set(cache_key, first_upload_time.isoformat(), _FIRST_UPLOAD_TTL)
+        return first_upload_time
+
     async def aclose(self) -> None:
         await self.client.aclose()
 
 
+def _verify_release_by_hashes(
+    pypi_release_info: ReleaseResponse, hashes: list[Tuple[str, str]]
+) -> VerifiedPypiReleaseInfo | None:
+    acceptable_hashes_to_filename: dict[Tuple[str, str], str] = {
+        digest: url.filename for url in pypi_release_info.urls for digest in url.digests.items() if digest[0] != "md5"
+    }
+    for package_hash in hashes:
+        if package_hash in acceptable_hashes_to_filename:
+            # We have a match, the metadata can be used
+            logger.debug(f"\n\nHash of package {pypi_release_info.info.name} matches a PyPI release hash\n\n")
+            filename = acceptable_hashes_to_filename[package_hash]
+            return VerifiedPypiReleaseInfo(pypi_release_info, filename)
+    # No match found, we cannot reliably say the PyPI metadata belong to the package
+    logger.debug(f"Hash of package {pypi_release_info.info.name} does not match any PyPI release hash")
+    return None
+
+
 def get_pypi_release_info_sync(project_name: str, version: str, request_session: PipSession):
     return simple_get_request_sync(_release_info_url(project_name, version), request_session, ReleaseResponse)
 
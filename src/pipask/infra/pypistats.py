@@ -1,17 +1,30 @@
+import json
 import logging
+from datetime import datetime, time, timedelta, timezone
+from pathlib import Path
 
 import httpx
 from packaging.utils import canonicalize_name
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, ValidationError
 
+from pipask.exception import PipaskException
+from pipask.infra.cache import JsonFileCache
 from pipask.utils import simple_get_request
 
 logger = logging.getLogger(__name__)
 
+DOWNLOAD_STATS_CACHE_SUBDIR = "download-stats"
+
+# pypistats.org imports the previous day's downloads once a day, in the early hours UTC;
+# cached statistics expire at this time of day so that a refresh is picked up the same day
+_DAILY_REFRESH_TIME = time(hour=3, tzinfo=timezone.utc)
+# How long monthly download counts from an imported snapshot are considered representative
+_SNAPSHOT_VALIDITY = timedelta(days=31)
+
 
 class DownloadStats(BaseModel):
-    last_day: int
-    last_week: int
+    last_day: int | None = None  # Not available in imported snapshots
+    last_week: int | None = None  # Not available in imported snapshots
     last_month: int
 
 
@@ -24,14 +37,83 @@ class _DownloadStatsResponse(BaseModel):
 _BASE_URL = "https://pypistats.org/api"
 
 
+class DownloadStatsSnapshotRow(BaseModel):
+    project: str
+    download_count: int
+
+
+class DownloadStatsSnapshot(BaseModel):
+    """Monthly download counts in the format of https://hugovk.github.io/top-pypi-packages/ (sorted by downloads)."""
+
+    last_update: datetime
+    rows: list[DownloadStatsSnapshotRow] = Field(default_factory=list)
+
+    @property
+    def last_update_utc(self) -> datetime:
+        return self.last_update if self.last_update.tzinfo else self.last_update.replace(tzinfo=timezone.utc)
+
+
 class PypiStatsClient:
-    def __init__(self, async_client: None | httpx.AsyncClient = None):
+    def __init__(self, async_client: None | httpx.AsyncClient = None, pipask_cache_dir: Path | None = None):
         self.client = async_client or httpx.AsyncClient()
+        self._cache = JsonFileCache(pipask_cache_dir / DOWNLOAD_STATS_CACHE_SUBDIR) if pipask_cache_dir else None
 
     async def get_download_stats(self, package_name: str) -> DownloadStats | None:
-        url = f"{_BASE_URL}/packages/{canonicalize_name(package_name)}/recent"
+        cache_key = canonicalize_name(package_name)
+        if self._cache is not None and (cached := self._cache.get(cache_key)) is not None:
+            try:
+                return DownloadStats.model_validate(cached)
+            except ValidationError:
+                logger.debug(f"Ignoring invalid cached download stats for {package_name}", exc_info=True)
+
+        url = f"{_BASE_URL}/packages/{cache_key}/recent"
         parsed_response = await simple_get_request(url, self.client, _DownloadStatsResponse)
-        return parsed_response.data if parsed_response is not None else None
+        if parsed_response is None:
+            return None
+        if self._cache is not None:
+            self._cache.set(cache_key, parsed_response.data.model_dump(), get_time_to_daily_refresh())
+        return parsed_response.data
 
     async def aclose(self) -> None:
         await self.client.aclose()
+
+
+def import_download_stats_snapshot(snapshot_file: Path, pipask_cache_dir: Path) -> int:
+    """
+    Import monthly download counts from a snapshot file into the download statistics cache,
+    so that the download checks for the listed projects need no requests to pypistats.org.
+    Projects with statistics already cached from pypistats.org are left as they are.
+
+    :return: number of imported projects
+    """
+    try:
+        snapshot = parse_download_stats_snapshot(snapshot_file.read_bytes())
+    except OSError as e:
+        raise PipaskException(f"cannot read download statistics snapshot {snapshot_file}: {e}") from e
+    ttl = snapshot.last_update_utc + _SNAPSHOT_VALIDITY - datetime.now(timezone.utc)
+    if ttl <= timedelta(0):
+        raise PipaskException(f"download statistics snapshot from {snapshot.last_update_utc:%Y-%m-%d} is outdated")
+
+    cache = JsonFileCache(pipask_cache_dir / DOWNLOAD_STATS_CACHE_SUBDIR)
+    imported_count = 0
+    for row in snapshot.rows:
+        cache_key = canonicalize_name(row.project)
+        if cache.get(cache_key) is None:
+            cache.set(cache_key, DownloadStats(last_month=row.download_count).model_dump(), ttl)
+            imported_count += 1
+    return imported_count
+
+
+def parse_download_stats_snapshot(content: bytes) -> DownloadStatsSnapshot:
+    try:
+        return DownloadStatsSnapshot.model_validate(json.loads(content))
+    except ValueError as e:  # Including ValidationError
+        raise PipaskException(f"invalid download statistics snapshot: {e}") from e
+
+
+def get_time_to_daily_refresh() -> timedelta:
+    now = datetime.now(timezone.utc)
+    next_refresh = datetime.combine(now.date(), _DAILY_REFRESH_TIME)
+    if next_refresh <= now:
+        next_refresh += timedelta(days=1)
+    return next_refresh - now
@@ -1,12 +1,18 @@
+import asyncio
+import os
 import re
+import time
 import urllib.parse
 import logging
 from dataclasses import dataclass
+from pathlib import Path
+from typing import TypeVar
 
 import httpx
 from pydantic import BaseModel
 
-from pipask.utils import simple_get_request
+from pipask.metrics import record_async_response
+from pipask.utils import TimeLogger, simple_get_request
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +20,20 @@ logger = logging.getLogger(__name__)
 # Same options as in Google's https://docs.deps.dev/api/v3/#getproject, without discontinued bitbucket
 REPO_URL_REGEX = re.compile(r"^https://(github|gitlab)[.]com/([^/]+/[^/.]+)")
 
+# Checked in order; the host is also the service name looked up in the keyring
+_ACCESS_TOKEN_ENV_VARS = {
+    "github": ["PIPASK_GITHUB_TOKEN", "GITHUB_TOKEN", "GH_TOKEN"],
+    "gitlab": ["PIPASK_GITLAB_TOKEN", "GITLAB_TOKEN"],
+}
+_API_HOSTS = {"github": "api.github.com", "gitlab": "gitlab.com"}
+
+_GITHUB_GRAPHQL_URL = "https://api.github.com/graphql"
+# Lookups requested within the window are resolved by a single GraphQL query, up to the batch size
+_GITHUB_BATCH_WINDOW_SECONDS = 0.05
+_GITHUB_BATCH_SIZE = 100
+
+ResponseT = TypeVar("ResponseT", bound=BaseModel)
+
 
 class _GitHubRepoResponse(BaseModel):
     stargazers_count: int
@@ -23,14 +43,56 @@ class _GitLabProjectResponse(BaseModel):
     star_count: int
 
 
+class _GitHubGraphQLRepository(BaseModel):
+    stargazerCount: int
+
+
+class _GitHubGraphQLResponse(BaseModel):
+    data: dict[str, _GitHubGraphQLRepository | None] | None = None
+
+
+class _Unresolved:
+    """Marker for lookups that could not be resolved in a batch and should be made individually."""
+
+
+_UNRESOLVED = _Unresolved()
+
+
 @dataclass
 class RepoInfo:
     star_count: int
 
 
+def lookup_access_token(service_name: str) -> str | None:
+    """
+    Find an API token for a repository hosting service, in environment variables or in the keyring (if installed).
+    Authenticated requests have much higher rate limits, which matters e.g. for CI agents sharing an IP address.
+    """
+    for env_var in _ACCESS_TOKEN_ENV_VARS[service_name]:
+        if token := os.environ.get(env_var):
+            return token
+    try:
+        import keyring
+    except ImportError:
+        return None
+    try:
+        credential = keyring.get_credential(_API_HOSTS[service_name], None)
+    except Exception:  # Keyring backends can fail in many ways (e.g., a locked keychain or no D-Bus session)
+        logger.debug(f"Could not read {service_name} token from keyring", exc_info=True)
+        return None
+    return credential.password if credential is not None and credential.password else None
+
+
 class RepoClient:
-    def __init__(self, async_client: None | httpx.AsyncClient = None):
+    def __init__(self, async_client: None | httpx.AsyncClient = None, pipask_cache_dir: Path | None = None):
         self.client = async_client or httpx.AsyncClient(follow_redirects=True)
+        # Repeated queries are revalidated by the client's HTTP cache; without it (e.g., with --no-cache-dir
+        # or while a cassette is active), ETags of responses are remembered for the lifetime of the client instead
+        self._etags: dict[str, tuple[str, BaseModel]] | None = {} if pipask_cache_dir is None else None
+        self._access_tokens: dict[str, asyncio.Future[str | None]] = {}
+        self._github_batch: dict[str, asyncio.Future[RepoInfo | _Unresolved]] = {}
+        self._github_batch_timer: asyncio.TimerHandle | None = None
+        self._github_batch_tasks: set[asyncio.Task] = set()
 
     async def get_repo_info(self, repo_url: str) -> RepoInfo | None:
         match = REPO_URL_REGEX.match(repo_url)
@@ -46,14 +108,141 @@ class RepoClient:
             raise ValueError(f"Unsupported service: {service_name}")
 
     async def _get_github_repo_info(self, repo_name: str) -> RepoInfo | None:
+        # GitHub's GraphQL API requires authentication
+        if await self._get_access_token("github") is not None:
+            result = await asyncio.shield(self._enqueue_github_lookup(repo_name))
+            if isinstance(result, RepoInfo):
+                return result
+            # E.g., moved repositories, which only the REST API redirects
+        return await self._get_github_repo_info_rest(repo_name)
+
+    async def _get_github_repo_info_rest(self, repo_name: str) -> RepoInfo | None:
         url = f"https://api.github.com/repos/{repo_name}"
-        parsed_response = await simple_get_request(url, self.client, _GitHubRepoResponse)
+        parsed_response = await self._get_authenticated("github", url, _GitHubRepoResponse)
         return RepoInfo(star_count=parsed_response.stargazers_count) if parsed_response is not None else None
 
+    def _enqueue_github_lookup(self, repo_name: str) -> "asyncio.Future[RepoInfo | _Unresolved]":
+        if (future := self._github_batch.get(repo_name)) is not None:
+            return future
+        loop = asyncio.get_running_loop()
+        future = self._github_batch[repo_name] = loop.create_future()
+        if len(self._github_batch) >= _GITHUB_BATCH_SIZE:
+            self._flush_github_batch()
+        elif self._github_batch_timer is None:
+            self._github_batch_timer = loop.call_later(_GITHUB_BATCH_WINDOW_SECONDS, self._flush_github_batch)
+        return future
+
+    def _flush_github_batch(self) -> None:
+        if self._github_batch_timer is not None:
+            self._github_batch_timer.cancel()
+            self._github_batch_timer = None
+        batch, self._github_batch = self._github_batch, {}
+        task = asyncio.create_task(self._resolve_github_batch(batch))
+        self._github_batch_tasks.add(task)  # Keep a reference until done
+        task.add_done_callback(self._github_batch_tasks.discard)
+
+    async def _resolve_github_batch(self, batch: dict[str, "asyncio.Future[RepoInfo | _Unresolved]"]) -> None:
+        results: dict[str, RepoInfo] = {}
+        try:
+            results = await self._query_github_star_counts(list(batch))
+        except (httpx.HTTPError, ValueError) as e:
+            logger.debug(f"GitHub GraphQL query failed, falling back to REST API: {e}")
+        finally:
+            # Unresolved lookups (including when cancelled) fall back to individual REST requests
+            for repo_name, future in batch.items():
+                if not future.done():
+                    future.set_result(results.get(repo_name, _UNRESOLVED))
+
+    async def _query_github_star_counts(self, repo_names: list[str]) -> dict[str, RepoInfo]:
+        token = await self._get_access_token("github")
+        if token is None:
+            return {}
+        # Variables rather than inlined names, so that names never need escaping
+        variables: dict[str, str] = {}
+        fields = []
+        for i, repo_name in enumerate(repo_names):
+            variables[f"owner{i}"], variables[f"name{i}"] = repo_name.split("/", 1)
+            fields.append(f"r{i}: repository(owner: $owner{i}, name: $name{i}) {{ stargazerCount }}")
+        parameters = ", ".join(f"${name}: String!" for name in variables)
+        query = f"query({parameters}) {{ {' '.join(fields)} }}"
+        async with TimeLogger(f"GitHub GraphQL query for {len(repo_names)} repositories", logger) as time_logger:
+            response = await self.client.post(
+                _GITHUB_GRAPHQL_URL,
+                json={"query": query, "variables": variables},
+                headers={"Authorization": f"Bearer {token}"},
+            )
+        record_async_response(response, time.time() - time_logger.start_time)
+        if response.status_code == 401:
+            logger.warning("The github token was rejected, continuing without authentication")
+            self._access_tokens["github"] = _resolved(None)
+        response.raise_for_status()
+        # Not found repositories are null, with an error for each of them in the "errors" field
+        data = _GitHubGraphQLResponse.model_validate(response.json()).data or {}
+        return {
+            repo_name: RepoInfo(star_count=repository.stargazerCount)
+            for i, repo_name in enumerate(repo_names)
+            if (repository := data.get(f"r{i}")) is not None
+        }
+
     async def _get_gitlab_repo_info(self, repo_name: str) -> RepoInfo | None:
         url = f"https://gitlab.com/api/v4/projects/{urllib.parse.quote(repo_name, safe='')}"
-        parsed_response = await simple_get_request(url, self.client, _GitLabProjectResponse)
+        parsed_response = await self._get_authenticated("gitlab", url, _GitLabProjectResponse)
         return RepoInfo(star_count=parsed_response.star_count) if parsed_response is not None else None
 
+    async def _get_authenticated(
+        self, service_name: str, url: str, response_model: type[ResponseT]
+    ) -> ResponseT | None:
+        token = await self._get_access_token(service_name)
+        if token is None:
+            return await self._get(url, response_model)
+        try:
+            return await self._get(url, response_model, headers={"Authorization": f"Bearer {token}"})
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code != 401:
+                raise
+            logger.warning(f"The {service_name} token was rejected, continuing without authentication")
+            self._access_tokens[service_name] = _resolved(None)
+            return await self._get(url, response_model)
+
+    async def _get(
+        self, url: str, response_model: type[ResponseT], headers: dict[str, str] | None = None
+    ) -> ResponseT | None:
+        if self._etags is None:
+            return await simple_get_request(url, self.client, response_model, headers=headers)
+        remembered = self._etags.get(url)
+        request_headers = dict(headers or {})
+        if remembered is not None:
+            request_headers["If-None-Match"] = remembered[0]
+        async with TimeLogger(f"GET {url}", logger) as time_logger:
+            response = await self.client.get(url, headers=request_headers)
+        record_async_response(response, time.time() - time_logger.start_time)
+        if response.status_code == 304 and remembered is not None and isinstance(remembered[1], response_model):
+            return remembered[1]
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        parsed_response = response_model.model_validate(response.json())
+        if (etag := response.headers.get("ETag")) is not None:
+            self._etags[url] = (etag, parsed_response)
+        return parsed_response
+
+    async def _get_access_token(self, service_name: str) -> str | None:
+        # Looked up lazily and only once, as keyring backends can be slow
+        if service_name not in self._access_tokens:
+            self._access_tokens[service_name] = asyncio.ensure_future(
+                asyncio.to_thread(lookup_access_token, service_name)
+            )
+        return await self._access_tokens[service_name]
+
     async def aclose(self) -> None:
+        if self._github_batch_timer is not None:
+            self._github_batch_timer.cancel()
+        for task in list(self._github_batch_tasks):
+            task.cancel()
         await self.client.aclose()
+
+
+def _resolved(value: str | None) -> "asyncio.Future[str | None]":
+    future: asyncio.Future[str | None] = asyncio.get_running_loop().create_future()
+    future.set_result(value)
+    return future
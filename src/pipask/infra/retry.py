@@ -0,0 +1,129 @@
+"""
+Retries of transient upstream failures for the async clients, respecting rate limits signalled by upstream.
+
+Honored headers:
+- `Retry-After` (seconds or an HTTP date) on 429 and 503 responses and GitHub's secondary rate limits
+- `X-RateLimit-Remaining`/`X-RateLimit-Reset` (GitHub) and `RateLimit-Remaining`/`RateLimit-Reset` (GitLab)
+
+When a host asks to wait longer than we are willing to, or its rate limit budget is exhausted, further requests
+to that host fail fast with a 429 response until the limit resets, instead of hammering the host.
+"""
+
+import asyncio
+import email.utils
+import logging
+import random
+import time
+
+import httpx
+
+from pipask.metrics import ASYNC_CLIENT, record_retry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_RETRIES = 2
+
+_RETRYABLE_METHODS = {"GET", "HEAD", "OPTIONS"}
+_RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+_RATE_LIMIT_HEADER_PREFIXES = ["X-RateLimit-", "RateLimit-"]
+
+
+class RetryTransport(httpx.AsyncBaseTransport):
+    """Transport retrying idempotent requests with exponential backoff and jitter."""
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_seconds: float = 0.5,
+        max_wait_seconds: float = 10.0,
+    ):
+        self._transport = transport
+        self._max_retries = max_retries
+        self._backoff_seconds = backoff_seconds
+        self._max_wait_seconds = max_wait_seconds
+        self._blocked_until_by_host: dict[str, float] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        if (blocked_until := self._blocked_until_by_host.get(host, 0)) > time.time():
+            logger.debug(f"Rate limit of {host} exhausted, not sending {request.method} {request.url}")
+            return httpx.Response(
+                429, headers={"Retry-After": str(int(blocked_until - time.time()) + 1)}, request=request
+            )
+
+        retries_left = self._max_retries if request.method in _RETRYABLE_METHODS else 0
+        attempt = 0
+        while True:
+            try:
+                response = await self._transport.handle_async_request(request)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError):
+                if retries_left <= 0:
+                    raise
+                wait = self._get_backoff(attempt)
+            else:
+                wait = self._get_wait(response, host, attempt)
+                if wait is None or retries_left <= 0:
+                    return response
+                await response.aclose()
+
+            retries_left -= 1
+            attempt += 1
+            record_retry(ASYNC_CLIENT, host)
+            logger.debug(f"Retrying {request.method} {request.url} in {wait:.1f}s")
+            await asyncio.sleep(wait)
+
+    def _get_wait(self, response: httpx.Response, host: str, attempt: int) -> float | None:
+        """Seconds to wait before retrying the request, or None if it should not be retried."""
+        now = time.time()
+        rate_limit_reset = _get_exhausted_rate_limit_reset(response.headers)
+        retry_after = _parse_retry_after(response.headers.get("Retry-After"), now)
+        if rate_limit_reset is not None:
+            # Even successful responses may announce that no further requests are allowed
+            resume_at = max(rate_limit_reset, now + (retry_after or 0))
+        elif retry_after is not None and response.status_code in (403, *_RETRYABLE_STATUS_CODES):
+            resume_at = now + retry_after
+        elif response.status_code in _RETRYABLE_STATUS_CODES:
+            return self._get_backoff(attempt)
+        else:
+            return None
+
+        if resume_at - now > self._max_wait_seconds:
+            logger.debug(f"Rate limit of {host} exhausted until {time.ctime(resume_at)}")
+            self._blocked_until_by_host[host] = resume_at
+            return None
+        if response.status_code < 400:
+            return None  # The budget has not been exceeded yet; the next request waits out the rate limit
+        return max(0.0, resume_at - now)
+
+    def _get_backoff(self, attempt: int) -> float:
+        # "Full jitter" so that concurrent requests failing at once don't retry at once
+        return random.uniform(0, min(self._max_wait_seconds, self._backoff_seconds * 2**attempt))
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def _get_exhausted_rate_limit_reset(headers: httpx.Headers) -> float | None:
+    """Time when the rate limit resets if no requests are remaining, None otherwise."""
+    for prefix in _RATE_LIMIT_HEADER_PREFIXES:
+        if headers.get(prefix + "Remaining") != "0":
+            continue
+        try:
+            return float(headers[prefix + "Reset"])  # Epoch seconds for both GitHub and GitLab
+        except (KeyError, ValueError):
+            return None
+    return None
+
+
+def _parse_retry_after(value: str | None, now: float) -> float | None:
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - now)
+    except (TypeError, ValueError):
+        return None
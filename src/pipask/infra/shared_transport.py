@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Response extension set by caching transports to report whether the response was served from a cache
+CACHE_STATUS_EXTENSION = "pipask_cache_status"
+
+# Responses that describe the state of the upstream resource rather than a transient problem
+_SHAREABLE_STATUS_CODES = {200, 404}
+
+
+class HostConcurrencyLimitingTransport(httpx.AsyncBaseTransport):
+    """Transport limiting the number of concurrent requests to each upstream host."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, max_concurrent_requests_per_host: int):
+        self._transport = transport
+        self._max_concurrent_requests_per_host = max_concurrent_requests_per_host
+        self._semaphores_by_host: dict[str, asyncio.Semaphore] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        semaphore = self._semaphores_by_host.get(request.url.host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self._max_concurrent_requests_per_host)
+            self._semaphores_by_host[request.url.host] = semaphore
+        async with semaphore:
+            response = await self._transport.handle_async_request(request)
+            # Keep the slot until the body is read; the responses from upstream APIs are small
+            content = await read_raw_content(response)
+        return httpx.Response(response.status_code, headers=response.headers, content=content, request=request)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+@dataclass
+class _SharedResponse:
+    status_code: int
+    headers: httpx.Headers
+    content: bytes
+
+
+@dataclass
+class _SharedResponseEntry:
+    expires_at: float
+    response: "asyncio.Future[_SharedResponse]"
+
+
+class SharedResponseTransport(httpx.AsyncBaseTransport):
+    """
+    Transport sharing GET responses between all callers for a limited time.
+
+    Concurrent requests for the same resource result in a single upstream request,
+    and successful (or not found) responses are reused until they expire.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, ttl_seconds: float):
+        self._transport = transport
+        self._ttl_seconds = ttl_seconds
+        self._entries: dict[tuple[str, ...], _SharedResponseEntry] = {}
+        self._next_cleanup = time.monotonic() + ttl_seconds
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != "GET":
+            return await self._transport.handle_async_request(request)
+
+        now = time.monotonic()
+        self._remove_expired_entries(now)
+        key = _request_key(request)
+        entry = self._entries.get(key)
+        cache_status = "hit"
+        if entry is None or entry.expires_at <= now:
+            cache_status = "miss"
+            entry = _SharedResponseEntry(
+                expires_at=now + self._ttl_seconds,
+                response=asyncio.ensure_future(self._fetch(request)),
+            )
+            self._entries[key] = entry
+            entry.response.add_done_callback(lambda future: self._discard_if_not_shareable(key, future))
+        else:
+            logger.debug(f"Sharing response for {request.method} {request.url}")
+
+        # Shielded so that a cancelled caller does not cancel the request for the other callers
+        shared_response = await asyncio.shield(entry.response)
+        return httpx.Response(
+            shared_response.status_code,
+            headers=shared_response.headers,
+            content=shared_response.content,
+            request=request,
+            extensions={CACHE_STATUS_EXTENSION: cache_status},
+        )
+
+    async def _fetch(self, request: httpx.Request) -> _SharedResponse:
+        response = await self._transport.handle_async_request(request)
+        content = await read_raw_content(response)
+        return _SharedResponse(status_code=response.status_code, headers=response.headers, content=content)
+
+    def _discard_if_not_shareable(self, key: tuple[str, ...], future: "asyncio.Future[_SharedResponse]") -> None:
+        if (
+            future.cancelled()
+            or future.exception() is not None
+            or future.result().status_code not in _SHAREABLE_STATUS_CODES
+        ):
+            entry = self._entries.get(key)
+            if entry is not None and entry.response is future:
+                del self._entries[key]
+
+    def _remove_expired_entries(self, now: float) -> None:
+        if now < self._next_cleanup:
+            return
+        self._entries = {
+            key: entry for key, entry in self._entries.items() if entry.expires_at > now or not entry.response.done()
+        }
+        self._next_cleanup = now + self._ttl_seconds
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def _request_key(request: httpx.Request) -> tuple[str, ...]:
+    # Different representations or credentials may result in different responses
+    return str(request.url), request.headers.get("Accept", ""), request.headers.get("Authorization", "")
+
+
+async def read_raw_content(response: httpx.Response) -> bytes:
+    # Raw, i.e., still encoded according to Content-Encoding; the client decodes it when reading the response
+    if response.is_stream_consumed:
+        return response.content  # Responses created with in-memory content (e.g., by MockTransport) are read already
+    try:
+        return b"".join([chunk async for chunk in response.aiter_raw()])
+    finally:
+        await response.aclose()
@@ -5,6 +5,8 @@ import json
 from functools import cache
 
 from pipask.infra.executables import get_pip_python_executable
+from pipask.metrics import measure_subprocess
+from pipask.tracing import trace_span
 
 
 @dataclass
@@ -57,7 +59,9 @@ values = {
 print(json.dumps(values))
 """
 
-    result = subprocess.run([get_pip_python_executable(), "-c", script], capture_output=True, text=True, check=True)
+    python_executable = get_pip_python_executable()
+    with trace_span("Probe target environment sys values", "interpreter"), measure_subprocess("sys values probe"):
+        result = subprocess.run([python_executable, "-c", script], capture_output=True, text=True, check=True)
 
     data = json.loads(result.stdout)
     return SysValues(
@@ -1,16 +1,17 @@
 import logging
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
+from datetime import datetime
 from enum import Enum
 from typing import Optional
 
 import httpx
 from cvss import CVSS2, CVSS3, CVSS4
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from pipask.checks.types import CheckResultType
 from pipask.infra.pypi import VulnerabilityPypi
-from pipask.utils import simple_get_request
+from pipask.utils import TimeLogger, simple_get_request
 
 logger = logging.getLogger(__name__)
 
@@ -77,6 +78,23 @@ class _OsvVulnerabilityResponse(BaseModel):
     severity: list[_OsvSeverity] | None = None
 
 
+class _OsvBatchVulnerability(BaseModel):
+    id: str
+    modified: datetime
+
+
+class _OsvBatchResult(BaseModel):
+    vulns: list[_OsvBatchVulnerability] = Field(default_factory=list)
+    next_page_token: str | None = None
+
+
+class _OsvBatchResponse(BaseModel):
+    results: list[_OsvBatchResult]
+
+
+_OSV_MAX_BATCH_SIZE = 1000
+
+
 class OsvVulnerabilityDetailsService(VulnerabilityDetailsService):
     def __init__(self, async_client: None | httpx.AsyncClient = None):
         self.client = async_client or httpx.AsyncClient(follow_redirects=True)
@@ -96,6 +114,35 @@ class OsvVulnerabilityDetailsService(VulnerabilityDetailsService):
                     )
         return VulnerabilityDetails(id=vulnerability.id, severity=None, link=vulnerability.link)
 
+    async def get_vulnerabilities_modified_after(
+        self, releases: list[tuple[str, str]], modified_after: datetime
+    ) -> set[tuple[str, str]]:
+        """
+        Find which of the given (name, version) releases have a known vulnerability
+        that has been published or modified after the given time.
+        Releases of a batch that could not be queried are all returned, so that they are checked in full.
+        """
+        # See https://google.github.io/osv.dev/post-v1-querybatch/ for OSV API docs
+        affected_releases = set()
+        for batch_start in range(0, len(releases), _OSV_MAX_BATCH_SIZE):
+            batch = releases[batch_start : batch_start + _OSV_MAX_BATCH_SIZE]
+            queries = [{"package": {"name": name, "ecosystem": "PyPI"}, "version": version} for name, version in batch]
+            url = "https://api.osv.dev/v1/querybatch"
+            try:
+                async with TimeLogger(f"POST {url}", logger):
+                    response = await self.client.post(url, json={"queries": queries})
+                response.raise_for_status()
+                parsed_response = _OsvBatchResponse.model_validate(response.json())
+            except (httpx.HTTPError, ValueError) as e:
+                logger.debug(f"OSV batch query failed, checking {len(batch)} releases in full: {e}")
+                affected_releases.update(batch)
+                continue
+            for release, result in zip(batch, parsed_response.results):
+                # Be conservative if not all vulnerabilities fit in the response
+                if result.next_page_token is not None or any(v.modified > modified_after for v in result.vulns):
+                    affected_releases.add(release)
+        return affected_releases
+
     async def aclose(self) -> None:
         await self.client.aclose()
 
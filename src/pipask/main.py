@@ -1,9 +1,10 @@
-import asyncio
+import json
 import logging
 from optparse import Values
 import os
 import sys
-from contextlib import aclosing
+from pathlib import Path
+from typing import Callable
 
 from httpx import HTTPError
 from rich import traceback as rich_traceback
@@ -13,12 +14,15 @@ from rich.prompt import Confirm
 
 import pipask._vendor.pip._internal.exceptions
 import pipask._vendor.pip._internal.utils.logging
-from pipask.checks.checks_executor import ChecksExecutor
+from pipask.audit import run_audit
+from pipask.checks.background_refresh import start_background_refresh
+from pipask.checks.background_checks import BackgroundChecksRunner, get_requested_project_names
 from pipask.checks.types import PackageCheckResults
-from pipask.cli_args import InstallArgs
+from pipask.cli_args import InstallArgs, PipaskOptions, parse_pipask_options
 from pipask.cli_helpers import CheckTask, SimpleTaskProgress
 from pipask.code_execution_guard import PackageCodeExecutionGuard
-from pipask.exception import HandoverToPipException, PipAskCodeExecutionDeniedException
+from pipask.exception import HandoverToPipException, PipAskCodeExecutionDeniedException, PipaskException
+from pipask.infra.cassette import Cassette, ReplayLatency, start_recording, start_replay, stop_cassette
 from pipask.infra.pip import (
     get_pip_install_report_from_pypi,
     parse_pip_arguments,
@@ -26,12 +30,16 @@ from pipask.infra.pip import (
     pip_pass_through,
 )
 from pipask.infra.pip_types import InstallationReportItem, PipInstallReport
-from pipask.infra.pypi import PypiClient
-from pipask.infra.pypistats import PypiStatsClient
-from pipask.infra.repo_client import RepoClient
-from pipask.infra.vulnerability_details import OsvVulnerabilityDetailsService
-from pipask.report import print_report
-from pipask.utils import create_httpx_client
+from pipask.metrics import start_metrics, stop_metrics
+from pipask.popularity import run_popularity_command
+from pipask.report import (
+    FAILED_CHECKS_EXIT_CODE,
+    MachineReadableReportWriter,
+    has_policy_violations,
+    print_report,
+)
+from pipask.server import run_server
+from pipask.tracing import start_tracing, stop_tracing, trace_span
 
 console = Console()
 
@@ -49,19 +57,49 @@ def main(args: list[str] | None = None) -> None:
         args = sys.argv[1:]
 
     try:
-        # 1. Parse arguments
-        # And short-circuit to pip if this is not an installation command
-        try:
-            parsed_args = parse_pip_arguments(args)
-        except HandoverToPipException:
-            pip_pass_through(args)
+        pipask_options, args = parse_pipask_options(args)
+        _start_diagnostics(pipask_options)
+    except PipaskException as e:
+        console.print(f"[red]Error: {e}")
+        sys.exit(2)
+    report_writer = (
+        MachineReadableReportWriter(pipask_options.report_format, sys.stdout)
+        if pipask_options.report_format is not None
+        else None
+    )
+    # Standard output is reserved for the machine-readable report
+    pip_stdout = sys.stderr if report_writer is not None else None
+    if report_writer is not None:
+        console.file = sys.stderr
+
+    try:
+        # Commands implemented by pipask itself rather than pip
+        if len(args) and args[0] == "audit":
+            run_audit(args[1:], console)
+            return
+        if len(args) and args[0] == "serve":
+            run_server(args[1:])
+            return
+        if len(args) and args[0] == "popularity":
+            run_popularity_command(args[1:], console)
             return
 
-        if parsed_args.command_name != "install":
+        # 1. Parse arguments
+        # And short-circuit to pip if this is not an installation command
+        with trace_span("Parse arguments"):
+            try:
+                parsed_args = parse_pip_arguments(args)
+            except HandoverToPipException:
+                parsed_args = None
+            install_args = (
+                parse_pip_install_arguments(parsed_args)
+                if parsed_args is not None and parsed_args.command_name == "install"
+                else None
+            )
+        if parsed_args is None or install_args is None:
             pip_pass_through(args)
             return
 
-        install_args = parse_pip_install_arguments(parsed_args)
         if install_args.help or install_args.version:
             pip_pass_through(args)
             return
@@ -70,10 +108,22 @@ def main(args: list[str] | None = None) -> None:
         if debug_logging:
             rich_traceback.install(show_locals=True)
         check_results: list[PackageCheckResults] | None = None
-        with SimpleTaskProgress(console=console) as progress:
+        with (
+            SimpleTaskProgress(console=console) as progress,
+            BackgroundChecksRunner(install_args.options) as checks_runner,
+        ):
+            # Data for checks of requested packages that doesn't depend on the resolved version can be fetched already
+            checks_runner.prefetch(
+                get_requested_project_names(
+                    install_args.install_args, getattr(install_args.options, "requirements", None)
+                )
+            )
             pip_report_task = progress.add_task("Resolving dependencies to install")
             try:
-                pip_report = get_pip_install_report_with_consent(install_args, pip_report_task)
+                with trace_span("Resolve dependencies"):
+                    pip_report = get_pip_install_report_with_consent(
+                        install_args, pip_report_task, interactive=report_writer is None
+                    )
                 pip_report_task.update(True)
             except Exception as e:
                 pip_report_task.update(False)
@@ -83,17 +133,37 @@ def main(args: list[str] | None = None) -> None:
 
             # 3. Run checks on the dependencies to install
             if len(packages_to_install) > 0:
-                check_results = asyncio.run(execute_checks(packages_to_install, progress, install_args.options))
+                with trace_span("Run checks", package_count=len(packages_to_install)):
+                    check_results = execute_checks(
+                        checks_runner,
+                        packages_to_install,
+                        progress,
+                        install_args.options,
+                        report_writer.on_package_checked if report_writer is not None else None,
+                        deadline_seconds=pipask_options.check_deadline_seconds,
+                        background_refresh=pipask_options.background_refresh,
+                    )
 
         # 4. Either delegate actual installation to pip or abort (based on the checks and user consent)
         if len(packages_to_install) == 0:
             console.print("  No new packages to install\n")
-            pip_pass_through(parsed_args.raw_args)
+            if report_writer is not None:
+                report_writer.write_report([])
+            pip_pass_through(parsed_args.raw_args, stdout=pip_stdout)
             return
         elif check_results is None:
             console.print("  No checks were performed. Aborting.")
             sys.exit(1)
 
+        if report_writer is not None:
+            # Non-interactive mode: the checks results decide instead of the user
+            report_writer.write_report(check_results)
+            if has_policy_violations(check_results):
+                console.print("[red]Some checks failed. Aborting.")
+                sys.exit(FAILED_CHECKS_EXIT_CODE)
+            pip_pass_through(parsed_args.raw_args, stdout=pip_stdout)
+            return
+
         # Intentionally printing report after the progress monitor is closed
         # to make sure the progress bars are displayed as completed
         print_report(check_results, console)
@@ -102,7 +172,12 @@ def main(args: list[str] | None = None) -> None:
         else:
             console.print("[yellow]Aborted by user.")
             sys.exit(2)
-    except (KeyboardInterrupt, PipAskCodeExecutionDeniedException):
+    except PipAskCodeExecutionDeniedException as exc:
+        if report_writer is not None:
+            console.print(f"[red]{exc}. Source distributions cannot be built in non-interactive mode.")
+            sys.exit(FAILED_CHECKS_EXIT_CODE)
+        console.print("\n[yellow]Aborted by user.")
+    except KeyboardInterrupt:
         console.print("\n[yellow]Aborted by user.")
     except HTTPError as exc:
         logger.error(f"\nNetwork error when making request to {exc.request.url}")
@@ -121,36 +196,73 @@ def main(args: list[str] | None = None) -> None:
         logger.error("Unexpected error", exc_info=True)
         logger.debug("Exception information:", exc_info=True)
         sys.exit(1)
+    finally:
+        _finish_diagnostics(pipask_options)
+
 
+def _start_diagnostics(pipask_options: PipaskOptions) -> None:
+    if pipask_options.record_http_file is not None:
+        start_recording()
+    elif pipask_options.replay_http_file is not None:
+        latency = ReplayLatency(
+            latency_seconds=pipask_options.replay_latency_ms / 1000,
+            jitter_seconds=pipask_options.replay_jitter_ms / 1000,
+        )
+        start_replay(Cassette.load(Path(pipask_options.replay_http_file)), latency)
+    if pipask_options.trace_file is not None:
+        start_tracing()
+    if pipask_options.print_metrics or pipask_options.metrics_json_file is not None:
+        start_metrics()
 
-def get_pip_install_report_with_consent(args: InstallArgs, progress_task: CheckTask) -> PipInstallReport:
+
+def _finish_diagnostics(pipask_options: PipaskOptions) -> None:
+    tracer = stop_tracing()
+    if tracer is not None and pipask_options.trace_file is not None:
+        tracer.write_chrome_trace(Path(pipask_options.trace_file))
+    cassette = stop_cassette()
+    if cassette is not None and pipask_options.record_http_file is not None:
+        cassette.save(Path(pipask_options.record_http_file))
+    metrics = stop_metrics()
+    if metrics is not None and pipask_options.print_metrics:
+        console.print()
+        metrics.print_summary(console)
+    if metrics is not None and pipask_options.metrics_json_file is not None:
+        Path(pipask_options.metrics_json_file).write_text(json.dumps(metrics.to_json(), indent=2), encoding="utf-8")
+
+
+def get_pip_install_report_with_consent(
+    args: InstallArgs, progress_task: CheckTask, interactive: bool = True
+) -> PipInstallReport:
     pipask._vendor.pip._internal.utils.logging.setup_logging(
         verbosity=1 if debug_logging else -1, no_color=False, user_log_file=None
     )
     # PackageCodeExecutionGuard is the part responsible for asking for user consent;
     # its check_execution_allowed() method should be called on all code paths inside
     # get_pip_install_report_from_pypi() that may execute 3rd party code.
-    PackageCodeExecutionGuard.reset_confirmation_state(progress_task)
+    PackageCodeExecutionGuard.reset_confirmation_state(progress_task, interactive)
     return get_pip_install_report_from_pypi(args)
 
 
-async def execute_checks(
-    packages_to_install: list[InstallationReportItem], progress: SimpleTaskProgress, install_options: Values
+def execute_checks(
+    checks_runner: BackgroundChecksRunner,
+    packages_to_install: list[InstallationReportItem],
+    progress: SimpleTaskProgress,
+    install_options: Values,
+    on_package_checked: Callable[[PackageCheckResults], None] | None = None,
+    deadline_seconds: float | None = None,
+    background_refresh: bool = False,
 ) -> list[PackageCheckResults]:
-    async with (
-        aclosing(create_httpx_client(install_options)) as httpx_client,
-        aclosing(PypiClient(httpx_client)) as pypi_client,
-        aclosing(RepoClient(httpx_client)) as repo_client,
-        aclosing(PypiStatsClient(httpx_client)) as pypi_stats_client,
-        aclosing(OsvVulnerabilityDetailsService(httpx_client)) as vulnerability_details_service,
-    ):
-        checks_executor = ChecksExecutor(
-            pypi_client=pypi_client,
-            repo_client=repo_client,
-            pypi_stats_client=pypi_stats_client,
-            vulnerability_details_service=vulnerability_details_service,
-        )
-        return await checks_executor.execute_checks(packages_to_install, progress)
+    timed_out_checks: list[tuple[InstallationReportItem, str]] = []
+    results = checks_runner.execute_checks(
+        packages_to_install,
+        progress=progress,
+        on_package_checked=on_package_checked,
+        deadline_seconds=deadline_seconds,
+        on_check_timed_out=lambda package, checker_id: timed_out_checks.append((package, checker_id)),
+    )
+    if background_refresh:
+        start_background_refresh(timed_out_checks, install_options)
+    return results
 
 
 if __name__ == "__main__":
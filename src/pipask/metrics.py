@@ -0,0 +1,219 @@
+"""
+Network, cache and subprocess metrics collected during a pipask run, summarized at the end of the run.
+
+Collection is disabled unless started with start_metrics(), in which case the record_* functions are no-ops.
+"""
+
+import math
+import threading
+import time
+import urllib.parse
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator
+
+import httpx
+from rich.console import Console
+from rich.table import Table
+
+from pipask.infra.shared_transport import CACHE_STATUS_EXTENSION
+
+# Clients the requests are made by
+PIP_SESSION_CLIENT = "pip"
+ASYNC_CLIENT = "async"
+
+
+@dataclass
+class _HostMetrics:
+    requests: int = 0
+    bytes: int = 0
+    latencies: list[float] = field(default_factory=list)
+    retries: int = 0
+    not_found: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+
+
+@dataclass
+class _SubprocessMetrics:
+    count: int = 0
+    total_seconds: float = 0.0
+
+
+class MetricsCollector:
+    def __init__(self) -> None:
+        self._hosts: dict[tuple[str, str], _HostMetrics] = defaultdict(_HostMetrics)
+        self._subprocesses: dict[str, _SubprocessMetrics] = defaultdict(_SubprocessMetrics)
+        self._lock = threading.Lock()
+
+    def record_request(
+        self,
+        client: str,
+        host: str,
+        *,
+        status_code: int,
+        byte_count: int,
+        latency_seconds: float,
+        cache_status: str | None = None,
+        retries: int = 0,
+    ) -> None:
+        """
+        :param cache_status: "hit", "revalidated" or "miss" if the response went through a cache, None otherwise
+        """
+        with self._lock:
+            metrics = self._hosts[(client, host)]
+            metrics.requests += 1
+            metrics.bytes += byte_count
+            metrics.latencies.append(latency_seconds)
+            metrics.retries += retries
+            metrics.not_found += status_code == 404
+            # Revalidated responses are served from the cache too, only their headers are downloaded
+            metrics.cache_hits += cache_status in ("hit", "revalidated")
+            metrics.cache_misses += cache_status == "miss"
+
+    def record_retry(self, client: str, host: str) -> None:
+        with self._lock:
+            self._hosts[(client, host)].retries += 1
+
+    def record_subprocess(self, name: str, seconds: float) -> None:
+        with self._lock:
+            metrics = self._subprocesses[name]
+            metrics.count += 1
+            metrics.total_seconds += seconds
+
+    def to_json(self) -> dict:
+        with self._lock:
+            hosts = sorted(self._hosts.items())
+            subprocesses = sorted(self._subprocesses.items())
+        cache: dict[str, dict[str, int]] = {}
+        for (client, _host), metrics in hosts:
+            client_cache = cache.setdefault(client, {"hits": 0, "misses": 0})
+            client_cache["hits"] += metrics.cache_hits
+            client_cache["misses"] += metrics.cache_misses
+        return {
+            "http": [
+                {
+                    "client": client,
+                    "host": host,
+                    "requests": metrics.requests,
+                    "bytes": metrics.bytes,
+                    "latency_p50_ms": _percentile_ms(metrics.latencies, 50),
+                    "latency_p95_ms": _percentile_ms(metrics.latencies, 95),
+                    "retries": metrics.retries,
+                    "not_found": metrics.not_found,
+                    "cache_hits": metrics.cache_hits,
+                    "cache_misses": metrics.cache_misses,
+                }
+                for (client, host), metrics in hosts
+            ],
+            "cache": cache,
+            "subprocesses": [
+                {"name": name, "count": metrics.count, "total_seconds": round(metrics.total_seconds, 3)}
+                for name, metrics in subprocesses
+            ],
+        }
+
+    def print_summary(self, console: Console) -> None:
+        data = self.to_json()
+        table = Table(title="Network", title_justify="left")
+        for column in ["Client", "Host", "Requests", "Bytes", "p50 ms", "p95 ms", "Retries", "404s", "Cache hit/miss"]:
+            table.add_column(column, justify="left" if column in ("Client", "Host") else "right")
+        for row in data["http"]:
+            table.add_row(
+                row["client"],
+                row["host"],
+                str(row["requests"]),
+                str(row["bytes"]),
+                str(row["latency_p50_ms"]),
+                str(row["latency_p95_ms"]),
+                str(row["retries"]),
+                str(row["not_found"]),
+                f"{row['cache_hits']}/{row['cache_misses']}",
+            )
+        console.print(table)
+        for client, cache in data["cache"].items():
+            console.print(f"Cache ({client}): {cache['hits']} hits, {cache['misses']} misses")
+        for subprocess_metrics in data["subprocesses"]:
+            console.print(
+                f"Subprocess {subprocess_metrics['name']}: {subprocess_metrics['count']}x, "
+                f"{subprocess_metrics['total_seconds']:.2f}s"
+            )
+
+
+def _percentile_ms(values: list[float], percentile: int) -> float | None:
+    if not values:
+        return None
+    # Nearest-rank method
+    sorted_values = sorted(values)
+    rank = max(1, math.ceil(percentile / 100 * len(sorted_values)))
+    return round(sorted_values[rank - 1] * 1000, 1)
+
+
+_active_collector: MetricsCollector | None = None
+
+
+def start_metrics() -> MetricsCollector:
+    global _active_collector
+    _active_collector = MetricsCollector()
+    return _active_collector
+
+
+def stop_metrics() -> MetricsCollector | None:
+    global _active_collector
+    collector, _active_collector = _active_collector, None
+    return collector
+
+
+def record_async_response(response: httpx.Response, latency_seconds: float) -> None:
+    """Record a response of an async client that has already been read."""
+    collector = _active_collector
+    if collector is None:
+        return
+    collector.record_request(
+        ASYNC_CLIENT,
+        response.request.url.host,
+        status_code=response.status_code,
+        # Responses created from in-memory content (e.g., by caching transports) are not downloaded as a stream
+        byte_count=response.num_bytes_downloaded or len(response.content),
+        latency_seconds=latency_seconds,
+        cache_status=response.extensions.get(CACHE_STATUS_EXTENSION),
+    )
+
+
+def record_requests_response(response, *args, **kwargs) -> None:
+    """Response hook for requests sessions."""
+    collector = _active_collector
+    if collector is None:
+        return
+    raw_retries = getattr(response.raw, "retries", None)
+    from_cache = getattr(response, "from_cache", None)
+    collector.record_request(
+        PIP_SESSION_CLIENT,
+        urllib.parse.urlparse(response.request.url).hostname or "",
+        status_code=response.status_code,
+        # Reading the body here would break streaming downloads
+        byte_count=int(response.headers.get("Content-Length", 0)),
+        latency_seconds=response.elapsed.total_seconds(),
+        # Only caching adapters set from_cache
+        cache_status=None if from_cache is None else "hit" if from_cache else "miss",
+        retries=len(raw_retries.history) if raw_retries is not None else 0,
+    )
+
+
+def record_retry(client: str, host: str) -> None:
+    if (collector := _active_collector) is not None:
+        collector.record_retry(client, host)
+
+
+@contextmanager
+def measure_subprocess(name: str) -> Iterator[None]:
+    collector = _active_collector
+    if collector is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        collector.record_subprocess(name, time.perf_counter() - start)
@@ -0,0 +1,176 @@
+import asyncio
+import logging
+from contextlib import aclosing
+from datetime import datetime, timezone
+from optparse import OptionParser, Values
+from pathlib import Path
+
+from rich.console import Console
+
+from pipask._vendor.pip._internal.locations import USER_CACHE_DIR
+from pipask.checks.release_data import get_publisher_repo_url
+from pipask.cli_helpers import CheckTask, SimpleTaskProgress
+from pipask.exception import PipaskException
+from pipask.infra.cache import get_pipask_cache_dir
+from pipask.infra.popularity_snapshot import (
+    POPULARITY_SNAPSHOT_FILE,
+    PopularityEntry,
+    serialize_popularity_snapshot,
+    write_popularity_snapshot,
+)
+from pipask.infra.pypi import PypiClient
+from pipask.infra.pypistats import (
+    DownloadStatsSnapshot,
+    import_download_stats_snapshot,
+    parse_download_stats_snapshot,
+)
+from pipask.infra.repo_client import RepoClient
+from pipask.utils import create_httpx_client
+
+logger = logging.getLogger(__name__)
+
+TOP_PROJECTS_URL = "https://hugovk.github.io/top-pypi-packages/top-pypi-packages.min.json"
+DEFAULT_TOP_PROJECT_COUNT = 2000
+# Concurrent projects while building the snapshot; each needs a few requests to PyPI
+_CONCURRENCY = 16
+
+_USAGE = """
+  %prog refresh [--top <count>] [--source <file or URL>] [options]
+  %prog import-snapshot <snapshot file> [options]
+  %prog import-downloads <top-pypi-packages file> [options]
+
+refresh: build a snapshot of download counts, verified repositories, stars and first upload times
+  of the most popular projects, used by the checks instead of requests to pypistats.org and GitHub/GitLab
+import-snapshot: use a snapshot built with `refresh` elsewhere (e.g., copied from the pipask cache directory)
+import-downloads: import monthly download counts, e.g., from https://hugovk.github.io/top-pypi-packages/"""
+
+_COMMAND_ARG_COUNTS = {"refresh": 0, "import-snapshot": 1, "import-downloads": 1}
+
+
+def parse_popularity_arguments(args: list[str]) -> tuple[str, list[str], Values]:
+    parser = OptionParser(prog="pipask popularity", usage=_USAGE)
+    parser.add_option(
+        "--cache-dir", dest="cache_dir", default=USER_CACHE_DIR, metavar="dir", help="Store the cache data in <dir>."
+    )
+    parser.add_option(
+        "--top",
+        dest="top",
+        type="int",
+        default=DEFAULT_TOP_PROJECT_COUNT,
+        metavar="count",
+        help=f"Number of the most downloaded projects to include in the snapshot (default {DEFAULT_TOP_PROJECT_COUNT}).",
+    )
+    parser.add_option(
+        "--source",
+        dest="source",
+        default=TOP_PROJECTS_URL,
+        metavar="file or URL",
+        help="List of the most downloaded projects in the top-pypi-packages format.",
+    )
+    parser.add_option(
+        "--proxy",
+        dest="proxy",
+        default="",
+        help="Specify a proxy in the form scheme://[user:passwd@]proxy.server:port.",
+    )
+    options, remaining_args = parser.parse_args(args)
+    if not remaining_args or remaining_args[0] not in _COMMAND_ARG_COUNTS:
+        parser.error(f"expected one of the commands: {', '.join(_COMMAND_ARG_COUNTS)}")
+    command, command_args = remaining_args[0], remaining_args[1:]
+    if len(command_args) != _COMMAND_ARG_COUNTS[command]:
+        parser.error(f"unexpected number of arguments for {command}")
+    return command, command_args, options
+
+
+def run_popularity_command(args: list[str], console: Console) -> None:
+    command, command_args, options = parse_popularity_arguments(args)
+    cache_dir = get_pipask_cache_dir(options)
+    if cache_dir is None:
+        console.print("[red]Error: popularity data cannot be stored with the cache disabled")
+        raise SystemExit(2)
+    try:
+        match command:
+            case "refresh":
+                with SimpleTaskProgress(console=console) as progress:
+                    data = asyncio.run(build_popularity_snapshot(options, progress))
+                write_popularity_snapshot(cache_dir / POPULARITY_SNAPSHOT_FILE, data)
+                console.print(f"Popularity snapshot written to {cache_dir / POPULARITY_SNAPSHOT_FILE}")
+            case "import-snapshot":
+                write_popularity_snapshot(cache_dir / POPULARITY_SNAPSHOT_FILE, Path(command_args[0]).read_bytes())
+                console.print(f"Popularity snapshot imported to {cache_dir / POPULARITY_SNAPSHOT_FILE}")
+            case "import-downloads":
+                imported_count = import_download_stats_snapshot(Path(command_args[0]), cache_dir)
+                console.print(f"Imported download statistics of {imported_count:,} projects")
+    except (PipaskException, OSError, ValueError) as e:
+        console.print(f"[red]Error: {e}")
+        raise SystemExit(2)
+
+
+async def build_popularity_snapshot(options: Values, progress: SimpleTaskProgress) -> bytes:
+    """Build a serialized popularity snapshot of the `options.top` most downloaded projects."""
+    cache_dir = get_pipask_cache_dir(options)
+    async with (
+        aclosing(create_httpx_client(options)) as httpx_client,
+        aclosing(PypiClient(httpx_client, cache_dir)) as pypi_client,
+        aclosing(RepoClient(httpx_client, cache_dir)) as repo_client,
+    ):
+        download_counts_task = progress.add_task("Fetching download counts of the most popular projects")
+        top_projects = await _load_top_projects(options.source, httpx_client)
+        download_counts_task.update(True)
+        rows = top_projects.rows[: options.top]
+
+        projects_task = progress.add_task(f"Fetching popularity of {len(rows)} projects", total=len(rows))
+        semaphore = asyncio.Semaphore(_CONCURRENCY)
+        entries = await asyncio.gather(
+            *[
+                _get_popularity_entry(
+                    row.project, row.download_count, pypi_client, repo_client, semaphore, projects_task
+                )
+                for row in rows
+            ]
+        )
+    return serialize_popularity_snapshot(
+        entries, created_at=min(top_projects.last_update_utc, datetime.now(timezone.utc))
+    )
+
+
+async def _load_top_projects(source: str, httpx_client) -> DownloadStatsSnapshot:
+    if source.startswith(("https://", "http://")):
+        response = await httpx_client.get(source)
+        response.raise_for_status()
+        return parse_download_stats_snapshot(response.content)
+    return parse_download_stats_snapshot(Path(source).read_bytes())
+
+
+async def _get_popularity_entry(
+    project: str,
+    monthly_downloads: int,
+    pypi_client: PypiClient,
+    repo_client: RepoClient,
+    semaphore: asyncio.Semaphore,
+    progress_task: CheckTask,
+) -> PopularityEntry:
+    repo_url = star_count = first_upload_time = None
+    try:
+        async with semaphore:
+            first_upload_time = await pypi_client.get_first_upload_time(project)
+            release_file = await pypi_client.get_latest_release_file(project)
+            attestations = (
+                await pypi_client.get_release_file_attestations(release_file) if release_file is not None else None
+            )
+        if attestations is not None and len(attestations.attestation_bundles):
+            repo_url = get_publisher_repo_url(attestations.attestation_bundles[0].publisher)
+        # Outside of the semaphore, so that star count lookups of many projects can be batched
+        repo_info = await repo_client.get_repo_info(repo_url) if repo_url is not None else None
+        star_count = repo_info.star_count if repo_info is not None else None
+        progress_task.update(True)
+    except Exception:
+        logger.debug(f"Could not get popularity of {project}", exc_info=True)
+        progress_task.update(False)
+    return PopularityEntry(
+        project=project,
+        monthly_downloads=monthly_downloads,
+        repo_url=repo_url if star_count is not None else None,
+        star_count=star_count,
+        first_upload_time=first_upload_time,
+    )
@@ -1,8 +1,17 @@
+import json
+from enum import Enum
+from typing import TextIO
+
 from rich.console import Console
+from rich.text import Text
 
-from pipask.checks.types import CheckResultType, PackageCheckResults
+import pipask
+from pipask.checks.types import CheckResult, CheckResultType, PackageCheckResults
 from pipask.utils import format_link
 
+# Exit code used when the checks completed, but some of them failed
+FAILED_CHECKS_EXIT_CODE = 3
+
 
 def _get_worst_result(package_result: PackageCheckResults) -> CheckResultType:
     return (
@@ -47,3 +56,148 @@ def print_report(package_results: list[PackageCheckResults], console: Console) -
         console.print(_format_requirement_heading(package_result))
         for check_result in package_result.results:
             console.print(_format_check_result(check_result.result_type, check_result.message))
+
+
+def print_audit_report(package_results: list[PackageCheckResults], checked_count: int, console: Console) -> None:
+    unchanged_count = len(package_results) - checked_count
+    console.print(
+        f"\nAudited {len(package_results)} installed distributions ({unchanged_count} unchanged since last audit)"
+    )
+    with_warning_or_worse = [
+        p for p in package_results if _get_worst_result(p) not in {CheckResultType.NEUTRAL, CheckResultType.SUCCESS}
+    ]
+    if len(with_warning_or_worse) == 0:
+        console.print(f"  {CheckResultType.SUCCESS.rich_icon} No known vulnerabilities found")
+        return
+    console.print("Vulnerable distributions:")
+    for package_result in with_warning_or_worse:
+        console.print(_format_requirement_heading(package_result))
+        for check_result in package_result.results:
+            console.print(_format_check_result(check_result.result_type, check_result.message))
+
+
+class ReportFormat(str, Enum):
+    JSON = "json"
+    JSONL = "jsonl"
+    SARIF = "sarif"
+
+
+# Results that make a non-interactive run fail
+_POLICY_VIOLATION_RESULT_TYPES = {CheckResultType.FAILURE, CheckResultType.ERROR}
+# Timeouts that make a non-interactive run fail, because nothing is known about the package
+# (release information, with checker ID None) or about its security (known vulnerabilities).
+# Timeouts of the other checks don't, so that a slow statistics service doesn't fail the run.
+_POLICY_VIOLATION_TIMED_OUT_CHECKER_IDS = {None, "vulnerabilities"}
+
+_SARIF_LEVELS = {
+    CheckResultType.FAILURE: "error",
+    CheckResultType.ERROR: "error",
+    CheckResultType.TIMED_OUT: "warning",
+    CheckResultType.WARNING: "warning",
+}
+
+
+def has_policy_violations(package_results: list[PackageCheckResults]) -> bool:
+    return any(_is_policy_violation(r) for p in package_results for r in p.results)
+
+
+def _is_policy_violation(result: CheckResult) -> bool:
+    if result.result_type is CheckResultType.TIMED_OUT:
+        return result.checker_id in _POLICY_VIOLATION_TIMED_OUT_CHECKER_IDS
+    return result.result_type in _POLICY_VIOLATION_RESULT_TYPES
+
+
+def _to_plain_text(message: str) -> str:
+    return Text.from_markup(message).plain
+
+
+def package_results_to_json(package_result: PackageCheckResults) -> dict:
+    """Convert check results to a JSON-serializable dict with messages as plain text without rich markup."""
+    return {
+        "name": package_result.name,
+        "version": package_result.version,
+        "pypi_url": package_result.pypi_url,
+        "is_transitive_dependency": package_result.is_transitive_dependency,
+        "result_type": _get_worst_result(package_result).value,
+        "results": [
+            {
+                "checker_id": result.checker_id,
+                "result_type": result.result_type.value,
+                "message": _to_plain_text(result.message),
+            }
+            for result in package_result.results
+        ],
+    }
+
+
+def check_results_to_json(package_results: list[PackageCheckResults]) -> dict:
+    worst_result = CheckResultType.get_worst(*(r.result_type for p in package_results for r in p.results))
+    return {
+        "result_type": (worst_result or CheckResultType.SUCCESS).value,
+        "packages": [package_results_to_json(p) for p in package_results],
+    }
+
+
+def check_results_to_sarif(package_results: list[PackageCheckResults]) -> dict:
+    """Convert check results to a SARIF 2.1.0 log, with a result for each warning or failure."""
+    results = []
+    rule_ids: set[str] = set()
+    for package_result in package_results:
+        requirement = f"{package_result.name}=={package_result.version}"
+        for check_result in package_result.results:
+            level = _SARIF_LEVELS.get(check_result.result_type)
+            if level is None:
+                continue
+            rule_id = check_result.checker_id or "release-info"
+            rule_ids.add(rule_id)
+            results.append(
+                {
+                    "ruleId": rule_id,
+                    "level": level,
+                    "message": {"text": f"{requirement}: {_to_plain_text(check_result.message)}"},
+                    "locations": [{"logicalLocations": [{"name": requirement, "kind": "package"}]}],
+                }
+            )
+    return {
+        "$schema": "https://json.schemastore.org/sarif-2.1.0.json",
+        "version": "2.1.0",
+        "runs": [
+            {
+                "tool": {
+                    "driver": {
+                        "name": "pipask",
+                        "version": pipask.__version__,
+                        "informationUri": "https://github.com/feynmanix/pipask",
+                        "rules": [{"id": rule_id} for rule_id in sorted(rule_ids)],
+                    }
+                },
+                "results": results,
+            }
+        ],
+    }
+
+
+class MachineReadableReportWriter:
+    """
+    Writes check results in a machine-readable format.
+    In the JSON Lines format, results for each package are written as soon as they are available.
+    """
+
+    def __init__(self, report_format: ReportFormat, output: TextIO):
+        self._report_format = report_format
+        self._output = output
+
+    def on_package_checked(self, package_result: PackageCheckResults) -> None:
+        if self._report_format is ReportFormat.JSONL:
+            self._output.write(json.dumps(package_results_to_json(package_result)) + "\n")
+            self._output.flush()
+
+    def write_report(self, package_results: list[PackageCheckResults]) -> None:
+        if self._report_format is ReportFormat.JSON:
+            json.dump(check_results_to_json(package_results), self._output, indent=2)
+        elif self._report_format is ReportFormat.SARIF:
+            json.dump(check_results_to_sarif(package_results), self._output, indent=2)
+        else:
+            return
+        self._output.write("\n")
+        self._output.flush()
@@ -0,0 +1,312 @@
+"""
+Local audit service exposing pipask checks over HTTP, e.g., for a fleet of CI build agents.
+
+All requests share the upstream clients, so metadata, vulnerability and repository information
+fetched for one build agent is reused for the others.
+"""
+
+import asyncio
+import json
+import logging
+import re
+import sys
+from contextlib import aclosing
+from dataclasses import dataclass
+from http import HTTPStatus
+from optparse import OptionParser, Values
+from pathlib import Path
+
+import httpx
+from packaging.requirements import Requirement
+from packaging.utils import canonicalize_name
+from pydantic import BaseModel, ValidationError, model_validator
+
+from pipask._vendor.pip._internal.locations import USER_CACHE_DIR
+from pipask.checks.checks_executor import ChecksExecutor
+from pipask.checks.result_cache import CheckResultCache
+from pipask.checks.types import PackageCheckResults
+from pipask.infra.cache import get_pipask_cache_dir
+from pipask.infra.pip_types import (
+    InstallationReportArchiveInfo,
+    InstallationReportItem,
+    InstallationReportItemDownloadInfo,
+    InstallationReportItemMetadata,
+    PipInstallReport,
+)
+from pipask.infra.popularity_snapshot import PopularitySnapshot, closing_popularity_snapshot
+from pipask.infra.pypi import PypiClient
+from pipask.infra.pypistats import PypiStatsClient
+from pipask.infra.repo_client import RepoClient
+from pipask.infra.shared_transport import HostConcurrencyLimitingTransport, SharedResponseTransport
+from pipask.infra.vulnerability_details import OsvVulnerabilityDetailsService
+from pipask.report import check_results_to_json
+from pipask.utils import create_httpx_client
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_PORT = 8421
+_MAX_REQUEST_BODY_SIZE = 10 * 1024 * 1024
+_COMMENT_REGEX = re.compile(r"(^|\s+)#.*$")
+
+
+@dataclass
+class PinnedRequirement:
+    name: str
+    version: str
+    hashes: list[tuple[str, str]]
+
+
+class _CheckRequest(BaseModel):
+    requirements: list[str] | None = None
+    lockfile: str | None = None
+    report: PipInstallReport | None = None
+
+    @model_validator(mode="after")
+    def check_single_input(self):
+        if sum(value is not None for value in (self.requirements, self.lockfile, self.report)) != 1:
+            raise ValueError("exactly one of 'requirements', 'lockfile' or 'report' must be provided")
+        return self
+
+
+class CheckService:
+    """Runs checks for requests from multiple clients with shared upstream clients."""
+
+    def __init__(
+        self,
+        httpx_client: httpx.AsyncClient,
+        result_cache: CheckResultCache | None = None,
+        pipask_cache_dir: Path | None = None,
+        popularity_snapshot: PopularitySnapshot | None = None,
+    ):
+        self._pypi_client = PypiClient(httpx_client, pipask_cache_dir)
+        self._repo_client = RepoClient(httpx_client, pipask_cache_dir)
+        self._pypi_stats_client = PypiStatsClient(httpx_client, pipask_cache_dir)
+        self._vulnerability_details_service = OsvVulnerabilityDetailsService(httpx_client)
+        self._checks_executor = ChecksExecutor(
+            pypi_client=self._pypi_client,
+            repo_client=self._repo_client,
+            pypi_stats_client=self._pypi_stats_client,
+            vulnerability_details_service=self._vulnerability_details_service,
+            result_cache=result_cache,
+            popularity_snapshot=popularity_snapshot,
+        )
+
+    async def check_installation_report(self, report: PipInstallReport) -> list[PackageCheckResults]:
+        return await self._checks_executor.execute_checks(report.install)
+
+    async def check_requirements(self, requirements: list[PinnedRequirement]) -> list[PackageCheckResults]:
+        packages = await asyncio.gather(*[self._to_installation_report_item(r) for r in requirements])
+        return await self._checks_executor.execute_checks(packages)
+
+    async def _to_installation_report_item(self, requirement: PinnedRequirement) -> InstallationReportItem:
+        release_info = await self._pypi_client.get_release_info_matching_hashes(
+            requirement.name, requirement.version, requirement.hashes
+        )
+        release_file = (
+            next(f for f in release_info.release_response.urls if f.filename == release_info.release_filename)
+            if release_info is not None
+            else None
+        )
+        return InstallationReportItem(
+            metadata=InstallationReportItemMetadata(name=requirement.name, version=requirement.version),
+            # The same information pip would report for a file downloaded from PyPI;
+            # without a matching file, no checks can be run for the requirement
+            download_info=InstallationReportItemDownloadInfo(
+                url=release_file.url or "",
+                archive_info=InstallationReportArchiveInfo(
+                    hashes={name: digest for name, digest in release_file.digests.items() if name != "md5"}
+                ),
+            )
+            if release_file is not None
+            else None,
+            requested=True,
+            is_direct=False,
+        )
+
+    async def aclose(self) -> None:
+        # All clients share the same httpx client
+        await self._pypi_client.aclose()
+
+
+def parse_pinned_requirements(lines: list[str]) -> list[PinnedRequirement]:
+    """
+    Parse requirements pinned to an exact version with hashes, in the requirements file format
+    (e.g., a lockfile generated by `pip-compile --generate-hashes`).
+
+    :raises ValueError: if a requirement is invalid or is not pinned with hashes
+    """
+    requirements = []
+    for line in _join_continuation_lines(lines):
+        line = _COMMENT_REGEX.sub("", line).strip()
+        if not line:
+            continue
+        hashes: list[tuple[str, str]] = []
+        requirement_parts = []
+        for token in line.split():
+            if token.startswith("--hash="):
+                hash_name, _, hash_value = token.removeprefix("--hash=").partition(":")
+                hashes.append((hash_name, hash_value))
+            elif token.startswith("-"):
+                raise ValueError(f"Unsupported option: {token}")
+            else:
+                requirement_parts.append(token)
+        requirement = Requirement(" ".join(requirement_parts))
+        specifiers = list(requirement.specifier)
+        if len(specifiers) != 1 or specifiers[0].operator not in ("==", "===") or "*" in specifiers[0].version:
+            raise ValueError(f"Requirement is not pinned to an exact version: {requirement}")
+        if not hashes:
+            raise ValueError(f"Requirement is not pinned with hashes: {requirement}")
+        requirements.append(
+            PinnedRequirement(name=canonicalize_name(requirement.name), version=specifiers[0].version, hashes=hashes)
+        )
+    return requirements
+
+
+def _join_continuation_lines(lines: list[str]) -> list[str]:
+    joined_lines = []
+    current_line = ""
+    for line in lines:
+        if line.endswith("\\"):
+            current_line += line[:-1] + " "
+        else:
+            joined_lines.append(current_line + line)
+            current_line = ""
+    if current_line:
+        joined_lines.append(current_line)
+    return joined_lines
+
+
+def parse_serve_arguments(args: list[str]) -> Values:
+    parser = OptionParser(prog="pipask serve", usage="%prog [options]")
+    parser.add_option("--host", dest="host", default="127.0.0.1", help="Address to listen on (default: %default).")
+    parser.add_option(
+        "--port", dest="port", type="int", default=_DEFAULT_PORT, help="Port to listen on (default: %default)."
+    )
+    parser.add_option(
+        "--cache-ttl",
+        dest="cache_ttl",
+        type="float",
+        default=600.0,
+        metavar="seconds",
+        help="How long upstream responses are shared between requests (default: %default).",
+    )
+    parser.add_option(
+        "--max-connections-per-host",
+        dest="max_connections_per_host",
+        type="int",
+        default=10,
+        help="Maximum number of concurrent requests to each upstream host (default: %default).",
+    )
+    parser.add_option(
+        "--cache-dir", dest="cache_dir", default=USER_CACHE_DIR, metavar="dir", help="Store the cache data in <dir>."
+    )
+    parser.add_option(
+        "--no-cache-dir", dest="cache_dir", action="store_false", help="Disable the persistent check result cache."
+    )
+    parser.add_option(
+        "--proxy",
+        dest="proxy",
+        default="",
+        help="Specify a proxy in the form scheme://[user:passwd@]proxy.server:port.",
+    )
+    options, remaining_args = parser.parse_args(args)
+    if remaining_args:
+        parser.error(f"unexpected arguments: {' '.join(remaining_args)}")
+    return options
+
+
+def run_server(args: list[str]) -> None:
+    options = parse_serve_arguments(args)
+    try:
+        asyncio.run(_serve_forever(options))
+    except KeyboardInterrupt:
+        pass
+
+
+async def _serve_forever(options: Values) -> None:
+    httpx_client = create_httpx_client(
+        options,
+        transport_wrapper=lambda transport: SharedResponseTransport(
+            HostConcurrencyLimitingTransport(transport, options.max_connections_per_host), options.cache_ttl
+        ),
+    )
+    cache_dir = get_pipask_cache_dir(options)
+    result_cache = CheckResultCache(cache_dir) if cache_dir is not None else None
+    # The snapshot is only loaded at startup; restart the service after refreshing it
+    with closing_popularity_snapshot(cache_dir) as popularity_snapshot:
+        async with aclosing(CheckService(httpx_client, result_cache, cache_dir, popularity_snapshot)) as check_service:
+            server = await start_check_server(check_service, options.host, options.port)
+            async with server:
+                for socket in server.sockets:
+                    print(f"pipask audit service listening on {socket.getsockname()}", file=sys.stderr)
+                await server.serve_forever()
+
+
+async def start_check_server(check_service: CheckService, host: str, port: int) -> asyncio.Server:
+    """
+    Start an HTTP server with the following endpoints:
+    - `GET /health`
+    - `POST /v1/check` with a JSON body containing one of `requirements` (list of pinned requirements with hashes),
+      `lockfile` (contents of a requirements file pinned with hashes) or `report` (pip installation report)
+    """
+
+    async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            status, body = await _handle_request(reader, check_service)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError) as e:
+            status, body = HTTPStatus.BAD_REQUEST, {"error": f"Invalid HTTP request: {e}"}
+        try:
+            await _write_json_response(writer, status, body)
+        except ConnectionError:
+            logger.debug("Client disconnected before receiving the response", exc_info=True)
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle_connection, host, port)
+
+
+async def _handle_request(reader: asyncio.StreamReader, check_service: CheckService) -> tuple[HTTPStatus, object]:
+    request_head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+    request_line, *header_lines = request_head.split("\r\n")
+    method, path, _version = request_line.split(" ", 2)
+    headers = {
+        name.strip().lower(): value.strip() for name, _, value in (line.partition(":") for line in header_lines if line)
+    }
+    content_length = int(headers.get("content-length", "0"))
+    if content_length > _MAX_REQUEST_BODY_SIZE:
+        return HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "Request body is too large"}
+    body = await reader.readexactly(content_length)
+
+    if path == "/health":
+        return (HTTPStatus.OK, {"status": "ok"}) if method == "GET" else (HTTPStatus.METHOD_NOT_ALLOWED, {})
+    if path != "/v1/check":
+        return HTTPStatus.NOT_FOUND, {"error": f"Unknown path: {path}"}
+    if method != "POST":
+        return HTTPStatus.METHOD_NOT_ALLOWED, {"error": f"Unsupported method: {method}"}
+
+    try:
+        check_request = _CheckRequest.model_validate_json(body)
+        if check_request.report is not None:
+            results = await check_service.check_installation_report(check_request.report)
+        else:
+            lines = check_request.requirements or (check_request.lockfile or "").splitlines()
+            results = await check_service.check_requirements(parse_pinned_requirements(lines))
+    except (ValidationError, ValueError) as e:
+        return HTTPStatus.BAD_REQUEST, {"error": str(e)}
+    except Exception as e:
+        logger.error("Error checking packages", exc_info=True)
+        return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"Error checking packages: {e}"}
+
+    return HTTPStatus.OK, check_results_to_json(results)
+
+
+async def _write_json_response(writer: asyncio.StreamWriter, status: HTTPStatus, body: object) -> None:
+    content = json.dumps(body).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(content)}\r\n"
+        "Connection: close\r\n\r\n"
+    )
+    writer.write(head.encode("latin-1") + content)
+    await writer.drain()
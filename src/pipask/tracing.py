@@ -0,0 +1,200 @@
+"""
+Span-based tracing of pipask phases, exported in the Chrome trace event format (viewable, e.g., in Perfetto).
+
+Tracing is disabled unless started with start_tracing(), in which case trace_span() is a cheap no-op.
+Spans in different asyncio tasks are recorded on separate tracks so that concurrent spans don't overlap.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import urllib.parse
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+
+import httpx
+from resolvelib import BaseReporter
+
+from pipask.infra.shared_transport import CACHE_STATUS_EXTENSION, read_raw_content
+
+logger = logging.getLogger(__name__)
+
+
+class Tracer:
+    def __init__(self) -> None:
+        self._events: list[dict[str, Any]] = []
+        self._start = time.perf_counter()
+        self._pid = os.getpid()
+        self._track_ids: dict[tuple[str, int], int] = {}
+        self._lock = threading.Lock()
+
+    def add_span(self, name: str, category: str, start: float, end: float, attributes: dict[str, Any]) -> None:
+        """Record a span with start and end times as returned by time.perf_counter()."""
+        with self._lock:
+            self._events.append(
+                {
+                    "name": name,
+                    "cat": category,
+                    "ph": "X",
+                    "ts": (start - self._start) * 1e6,
+                    "dur": (end - start) * 1e6,
+                    "pid": self._pid,
+                    "tid": self._get_current_track_id(),
+                    "args": attributes,
+                }
+            )
+
+    def _get_current_track_id(self) -> int:
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None  # No running event loop
+        key = ("task", id(task)) if task is not None else ("thread", threading.get_ident())
+        track_id = self._track_ids.get(key)
+        if track_id is None:
+            track_id = len(self._track_ids) + 1
+            self._track_ids[key] = track_id
+            track_name = task.get_name() if task is not None else threading.current_thread().name
+            self._events.append(
+                {"name": "thread_name", "ph": "M", "pid": self._pid, "tid": track_id, "args": {"name": track_name}}
+            )
+        return track_id
+
+    def write_chrome_trace(self, path: Path) -> None:
+        with self._lock:
+            events = [{"name": "process_name", "ph": "M", "pid": self._pid, "args": {"name": "pipask"}}] + self._events
+        path.write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}), encoding="utf-8")
+
+
+_active_tracer: Tracer | None = None
+
+
+def start_tracing() -> Tracer:
+    global _active_tracer
+    _active_tracer = Tracer()
+    return _active_tracer
+
+
+def stop_tracing() -> Tracer | None:
+    global _active_tracer
+    tracer, _active_tracer = _active_tracer, None
+    return tracer
+
+
+def is_tracing_enabled() -> bool:
+    return _active_tracer is not None
+
+
+@contextmanager
+def trace_span(name: str, category: str = "pipask", **attributes: Any) -> Iterator[dict[str, Any]]:
+    """
+    Record the enclosed block as a span.
+    Yields a dict of span attributes that the block can add to (e.g., with results known only at the end).
+    """
+    tracer = _active_tracer
+    if tracer is None:
+        yield attributes
+        return
+    start = time.perf_counter()
+    try:
+        yield attributes
+    finally:
+        tracer.add_span(name, category, start, time.perf_counter(), attributes)
+
+
+class TracingTransport(httpx.AsyncBaseTransport):
+    """Transport recording a span for each async HTTP request."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        # Imported here - the vendored pip imports this module indirectly (e.g., through interpreter probing)
+        from pipask._vendor.pip._internal.utils.misc import redact_auth_from_url
+
+        url = redact_auth_from_url(str(request.url))
+        with trace_span(f"{request.method} {request.url.host}", "http", url=url) as attributes:
+            response = await self._transport.handle_async_request(request)
+            content = await read_raw_content(response)
+            attributes["status"] = response.status_code
+            attributes["bytes"] = len(content)
+            attributes["cache"] = response.extensions.get(CACHE_STATUS_EXTENSION, "none")
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            content=content,
+            request=request,
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def trace_requests_response(response, *args, **kwargs) -> None:
+    """Response hook for requests sessions recording a span for each sync HTTP request."""
+    tracer = _active_tracer
+    if tracer is None:
+        return
+    end = time.perf_counter()
+    request = response.request
+    tracer.add_span(
+        f"{request.method} {urllib.parse.urlparse(request.url).hostname}",
+        "http",
+        end - response.elapsed.total_seconds(),
+        end,
+        {
+            "url": request.url,
+            "status": response.status_code,
+            # Reading the body here would break streaming downloads
+            "bytes": int(response.headers.get("Content-Length", -1)),
+            "cache": "hit" if getattr(response, "from_cache", False) else "miss",
+        },
+    )
+
+
+class TracingReporter(BaseReporter):
+    """Resolver reporter recording a span for each resolution round and delegating to another reporter."""
+
+    def __init__(self, reporter: BaseReporter):
+        self._reporter = reporter
+        self._round_start: tuple[int, float] | None = None
+
+    def starting(self) -> None:
+        self._reporter.starting()
+
+    def starting_round(self, index: int) -> None:
+        self._round_start = (index, time.perf_counter())
+        self._reporter.starting_round(index)
+
+    def ending_round(self, index: int, state: Any) -> None:
+        self._record_round(pinned_count=len(state.mapping))
+        self._reporter.ending_round(index, state)
+
+    def ending(self, state: Any) -> None:
+        self._record_round(pinned_count=len(state.mapping))  # The last round doesn't end with ending_round()
+        self._reporter.ending(state)
+
+    def adding_requirement(self, requirement: Any, parent: Any) -> None:
+        self._reporter.adding_requirement(requirement, parent)
+
+    def resolving_conflicts(self, causes: Any) -> None:
+        self._reporter.resolving_conflicts(causes)
+
+    def rejecting_candidate(self, criterion: Any, candidate: Any) -> None:
+        self._reporter.rejecting_candidate(criterion, candidate)
+
+    def pinning(self, candidate: Any) -> None:
+        self._reporter.pinning(candidate)
+
+    def _record_round(self, pinned_count: int) -> None:
+        tracer = _active_tracer
+        if tracer is None or self._round_start is None:
+            return
+        index, start = self._round_start
+        self._round_start = None
+        tracer.add_span(f"Resolver round {index}", "resolver", start, time.perf_counter(), {"pinned": pinned_count})
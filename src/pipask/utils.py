@@ -1,7 +1,8 @@
 import requests
 import time
 import logging
-from typing import TypeVar
+from functools import cache
+from typing import Callable, TypeVar
 from pydantic import BaseModel
 import httpx
 import os
@@ -10,6 +11,18 @@ from optparse import Values
 import ssl
 import truststore
 
+from pipask.infra.cache import JsonFileCache, get_pipask_cache_dir
+from pipask.infra.cassette import get_cassette_transport_wrapper
+from pipask.infra.retry import RetryTransport
+from pipask.infra.http_cache import (
+    HTTP_CACHE_SUBDIR,
+    NOT_FOUND_CACHE_SUBDIR,
+    HttpCacheTransport,
+    NotFoundCacheTransport,
+)
+from pipask.metrics import record_async_response
+from pipask.tracing import TracingTransport, is_tracing_enabled
+
 logger = logging.getLogger(__name__)
 
 
@@ -37,10 +50,21 @@ class TimeLogger:
 ResponseT = TypeVar("ResponseT", bound=BaseModel)
 
 
+def get_default_ssl_context() -> ssl.SSLContext:
+    # Loading CA certificates is relatively expensive -> share the context between clients
+    return _get_ssl_context_for_env(os.environ.get("SSL_CERT_FILE"), os.environ.get("SSL_CERT_DIR"))
+
+
+@cache
+def _get_ssl_context_for_env(ssl_cert_file: str | None, ssl_cert_dir: str | None) -> ssl.SSLContext:
+    return httpx.create_ssl_context()
+
+
 def create_httpx_client(
     options: Values,
     retries: None | int = None,
     timeout: None | int = None,
+    transport_wrapper: Callable[[httpx.AsyncBaseTransport], httpx.AsyncBaseTransport] | None = None,
 ) -> httpx.AsyncClient:
     # Adapted from SessionCommandMixin._build_session()
 
@@ -63,7 +87,7 @@ def create_httpx_client(
     max_retries = retries if retries is not None else 0
 
     # Handle custom CA bundle
-    verify_ssl = ssl_context if ssl_context else True
+    verify_ssl: ssl.SSLContext | str = ssl_context if ssl_context else get_default_ssl_context()
     if hasattr(options, "cert") and options.cert:
         verify_ssl = options.cert
 
@@ -73,24 +97,64 @@ def create_httpx_client(
         client_cert = options.client_cert
 
     # Create transport with configuration
-    transport = httpx.AsyncHTTPTransport(
+    transport: httpx.AsyncBaseTransport = httpx.AsyncHTTPTransport(
         retries=max_retries,
         verify=verify_ssl,
         cert=client_cert,
         http2=False,
     )
+    # The proxy transport is created here (instead of passing `proxy=` to the client) to wrap it like the default one
+    proxy_transports: dict[str, httpx.AsyncBaseTransport | None] = {}
+    if getattr(options, "proxy", None):
+        proxy_transports["all://"] = httpx.AsyncHTTPTransport(
+            proxy=options.proxy, retries=max_retries, verify=verify_ssl, cert=client_cert, http2=False
+        )
+
+    # Retries don't hold a connection slot while waiting, and cached responses are not retried
+    transport_wrapper = _chain_wrappers(transport_wrapper, RetryTransport)
+    # Caches are outside other wrappers, so that cached responses don't wait for a connection slot
+    not_found_cache = None
+    if (cache_dir := get_pipask_cache_dir(options)) is not None:
+        http_cache_dir = cache_dir / HTTP_CACHE_SUBDIR
+        transport_wrapper = _chain_wrappers(transport_wrapper, lambda t: HttpCacheTransport(t, http_cache_dir))
+        not_found_cache = JsonFileCache(cache_dir / NOT_FOUND_CACHE_SUBDIR)
+    transport_wrapper = _chain_wrappers(transport_wrapper, lambda t: NotFoundCacheTransport(t, not_found_cache))
+    if (cassette_transport_wrapper := get_cassette_transport_wrapper()) is not None:
+        # Innermost, so that replayed responses go through the same wrappers as real ones
+        transport_wrapper = _chain_wrappers(cassette_transport_wrapper, transport_wrapper)
+    if is_tracing_enabled():
+        # Outermost, so that the span includes time spent in other wrappers (e.g., waiting for a connection slot)
+        transport_wrapper = _chain_wrappers(transport_wrapper, TracingTransport)
+
+    if transport_wrapper is not None:
+        transport = transport_wrapper(transport)
+        proxy_transports = {
+            pattern: transport_wrapper(proxy_transport) if proxy_transport is not None else None
+            for pattern, proxy_transport in proxy_transports.items()
+        }
 
     # Create the async client
     client = httpx.AsyncClient(
         transport=transport,
+        mounts=proxy_transports,
         timeout=timeout_config,
-        proxy=options.proxy or None,
         follow_redirects=True,
     )
 
     return client
 
 
+def _chain_wrappers(
+    inner: Callable[[httpx.AsyncBaseTransport], httpx.AsyncBaseTransport] | None,
+    outer: Callable[[httpx.AsyncBaseTransport], httpx.AsyncBaseTransport] | None,
+) -> Callable[[httpx.AsyncBaseTransport], httpx.AsyncBaseTransport]:
+    def wrap(transport: httpx.AsyncBaseTransport) -> httpx.AsyncBaseTransport:
+        transport = inner(transport) if inner is not None else transport
+        return outer(transport) if outer is not None else transport
+
+    return wrap
+
+
 async def simple_get_request(
     url: str,
     client: httpx.AsyncClient,
@@ -98,8 +162,9 @@ async def simple_get_request(
     *,
     headers: dict[str, str] | None = None,
 ) -> ResponseT | None:
-    async with TimeLogger(f"GET {url}", logger):
+    async with TimeLogger(f"GET {url}", logger) as time_logger:
         response = await client.get(url, headers=headers)
+    record_async_response(response, time.time() - time_logger.start_time)
     if response.status_code == 404:
         return None
     response.raise_for_status()
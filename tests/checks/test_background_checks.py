@@ -0,0 +1,113 @@
+import threading
+from contextlib import asynccontextmanager
+from optparse import Values
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+
+from pipask.checks.background_checks import BackgroundChecksRunner, get_requested_project_names
+from pipask.checks.checks_executor import ChecksExecutor
+from pipask.infra.pip_types import (
+    InstallationReportItem,
+    InstallationReportItemDownloadInfo,
+    InstallationReportItemMetadata,
+)
+from pipask.infra.pypi import ProjectInfo, ReleaseResponse, VerifiedPypiReleaseInfo
+
+
+def test_gets_requested_project_names(tmp_path: Path):
+    requirements_file = tmp_path / "requirements.txt"
+    requirements_file.write_text("# Comment\n-e ./local\nrich>=13 # pinned\nhttpx[http2]\n\n--index-url https://x\n")
+
+    names = get_requested_project_names(
+        ["requests==2.31.0", "pkg @ https://example.com/pkg.whl", str(requirements_file), "rich"],
+        [str(requirements_file), str(tmp_path / "missing.txt")],
+    )
+
+    assert names == ["requests", "rich", "httpx"]
+
+
+def test_checks_reuse_data_prefetched_before_resolution():
+    release_info = VerifiedPypiReleaseInfo(
+        ReleaseResponse(info=ProjectInfo(name="Requests", version="2.31.0")), "requests-2.31.0-py3-none-any.whl"
+    )
+    pypi_client = MagicMock()
+    pypi_client.get_matching_release_info = AsyncMock(return_value=release_info)
+    pypi_client.get_first_upload_time = AsyncMock(return_value=None)
+    pypi_client.get_attestations = AsyncMock(return_value=None)
+    pypi_stats_client = MagicMock()
+    pypi_stats_client.get_download_stats = AsyncMock(return_value=None)
+    executor = ChecksExecutor(
+        pypi_client=pypi_client,
+        repo_client=MagicMock(),
+        pypi_stats_client=pypi_stats_client,
+        vulnerability_details_service=MagicMock(),
+    )
+
+    @asynccontextmanager
+    async def open_checks_executor(_install_options: Values):
+        yield executor
+
+    package = InstallationReportItem(
+        metadata=InstallationReportItemMetadata(name="requests", version="2.31.0"),
+        download_info=None,
+        requested=True,
+        is_direct=False,
+    )
+    with patch("pipask.checks.background_checks.open_checks_executor", open_checks_executor):
+        with BackgroundChecksRunner(Values()) as checks_runner:
+            checks_runner.prefetch(["requests"])
+            [package_results] = checks_runner.execute_checks([package])
+
+    assert package_results.name == "Requests"
+    pypi_client.get_first_upload_time.assert_awaited_once_with("requests")
+    pypi_stats_client.get_download_stats.assert_awaited_once_with("requests")
+
+
+def test_runs_checks_with_real_checks_executor(tmp_path: Path, monkeypatch):
+    wheel_url = "https://files.pythonhosted.org/packages/ab/cd/requests-2.31.0-py3-none-any.whl"
+    requested_urls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested_urls.append(str(request.url))
+        if str(request.url) == "https://pypi.org/pypi/requests/2.31.0/json":
+            release_file = {
+                "filename": "requests-2.31.0-py3-none-any.whl",
+                "url": wheel_url,
+                "upload_time_iso_8601": "2023-05-22T15:12:42Z",
+                "digests": {"sha256": "aaa"},
+            }
+            return httpx.Response(200, json={"info": {"name": "requests", "version": "2.31.0"}, "urls": [release_file]})
+        return httpx.Response(404)
+
+    monkeypatch.setattr(httpx, "AsyncHTTPTransport", lambda **_kwargs: httpx.MockTransport(handler))
+    package = InstallationReportItem(
+        metadata=InstallationReportItemMetadata(name="requests", version="2.31.0"),
+        download_info=InstallationReportItemDownloadInfo(url=wheel_url),
+        requested=True,
+        is_direct=False,
+    )
+
+    with BackgroundChecksRunner(Values({"cache_dir": str(tmp_path), "proxy": ""})) as checks_runner:
+        checks_runner.prefetch(["requests"])
+        [package_results] = checks_runner.execute_checks([package])
+
+    assert package_results.name == "requests"
+    assert {result.checker_id for result in package_results.results} >= {"package-age", "package-downloads"}
+    assert "https://pypi.org/pypi/requests/2.31.0/json" in requested_urls
+    assert (tmp_path / "pipask").is_dir()
+
+
+def test_stops_thread_if_checks_executor_cannot_be_opened():
+    @asynccontextmanager
+    async def open_checks_executor(_install_options: Values):
+        raise RuntimeError("cannot open")
+        yield
+
+    with patch("pipask.checks.background_checks.open_checks_executor", open_checks_executor):
+        with pytest.raises(RuntimeError, match="cannot open"):
+            BackgroundChecksRunner(Values())
+
+    assert not any(thread.name == "pipask-checks" for thread in threading.enumerate())
@@ -0,0 +1,36 @@
+import json
+from optparse import Values
+from pathlib import Path
+from unittest.mock import patch
+
+from pipask.checks.background_refresh import start_background_refresh
+from pipask.infra.pip_types import InstallationReportItem, InstallationReportItemMetadata
+
+package = InstallationReportItem(
+    metadata=InstallationReportItemMetadata(name="requests", version="2.31.0"),
+    download_info=None,
+    requested=True,
+    is_direct=False,
+)
+
+
+def test_starts_detached_process_with_timed_out_checks(tmp_path: Path):
+    options = Values({"cache_dir": str(tmp_path), "proxy": None, "timeout": 15})
+
+    with patch("pipask.checks.background_refresh.subprocess.Popen") as popen:
+        start_background_refresh([(package, "package-downloads")], options)
+
+    command = popen.call_args.args[0]
+    assert command[1:3] == ["-m", "pipask.checks.background_refresh"]
+    request_file = Path(command[3])
+    request = json.loads(request_file.read_text())
+    request_file.unlink()
+    assert request["options"]["cache_dir"] == str(tmp_path)
+    assert request["checks"] == [{"package": package.model_dump(mode="json"), "checker_id": "package-downloads"}]
+
+
+def test_does_not_refresh_without_cache():
+    with patch("pipask.checks.background_refresh.subprocess.Popen") as popen:
+        start_background_refresh([(package, "package-downloads")], Values({"cache_dir": False}))
+
+    popen.assert_not_called()
@@ -0,0 +1,124 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from optparse import Values
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from pipask.checks.checks_executor import ChecksExecutor, _run_one_check, open_checks_executor
+from pipask.checks.types import CheckResult, CheckResultType
+from pipask.infra.popularity_snapshot import (
+    POPULARITY_SNAPSHOT_FILE,
+    PopularityEntry,
+    serialize_popularity_snapshot,
+    write_popularity_snapshot,
+)
+from pipask.infra.pip_types import InstallationReportItem, InstallationReportItemMetadata
+from pipask.infra.pypi import ProjectInfo, ReleaseResponse, VerifiedPypiReleaseInfo
+
+release_info = VerifiedPypiReleaseInfo(
+    ReleaseResponse(info=ProjectInfo(name="requests", version="2.31.0")), "requests-2.31.0-py3-none-any.whl"
+)
+package = InstallationReportItem(
+    metadata=InstallationReportItemMetadata(name="requests", version="2.31.0"),
+    download_info=None,
+    requested=True,
+    is_direct=False,
+)
+
+
+def _checker(checker_id: str, delay: float, timeout: timedelta | None = None) -> MagicMock:
+    async def check(_release_info):
+        await asyncio.sleep(delay)
+        return CheckResult(CheckResultType.SUCCESS, "OK")
+
+    checker = MagicMock()
+    checker.checker_id = checker_id
+    checker.timeout = timeout
+    checker.required_data = frozenset()
+    checker.check = check
+    return checker
+
+
+def _executor(*checkers: MagicMock) -> ChecksExecutor:
+    pypi_client = MagicMock()
+    pypi_client.get_matching_release_info = AsyncMock(return_value=release_info)
+    executor = ChecksExecutor(
+        pypi_client=pypi_client,
+        repo_client=MagicMock(),
+        pypi_stats_client=MagicMock(),
+        vulnerability_details_service=MagicMock(),
+    )
+    executor._create_checkers = lambda _release_data_provider: (list(checkers), [])
+    return executor
+
+
+@pytest.mark.asyncio
+async def test_reports_timed_out_check():
+    on_timed_out = MagicMock()
+
+    result = await _run_one_check(
+        _checker("slow", 1), release_info, MagicMock(), timeout=0.01, on_timed_out=on_timed_out
+    )
+
+    assert result.result_type is CheckResultType.TIMED_OUT
+    assert result.checker_id == "slow"
+    assert "timed out" in result.message
+    on_timed_out.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_returns_partial_results_at_deadline():
+    timed_out = []
+    executor = _executor(_checker("fast", 0), _checker("slow", 10))
+
+    [package_results] = await asyncio.wait_for(
+        executor.execute_checks(
+            [package],
+            deadline_seconds=0.05,
+            on_check_timed_out=lambda p, checker_id: timed_out.append((p.metadata.name, checker_id)),
+        ),
+        timeout=1,
+    )
+
+    assert [(r.checker_id, r.result_type) for r in package_results.results] == [
+        ("fast", CheckResultType.SUCCESS),
+        ("slow", CheckResultType.TIMED_OUT),
+    ]
+    assert timed_out == [("requests", "slow")]
+
+
+@pytest.mark.asyncio
+async def test_applies_checker_timeout():
+    executor = _executor(_checker("slow", 10, timeout=timedelta(milliseconds=10)))
+
+    [package_results] = await asyncio.wait_for(executor.execute_checks([package]), timeout=1)
+
+    assert package_results.results[0].result_type is CheckResultType.TIMED_OUT
+
+
+@pytest.mark.asyncio
+async def test_refresh_runs_checks_without_time_limit():
+    result_cache = MagicMock()
+    result_cache.get.return_value = None
+    executor = _executor(_checker("slow", 0.05, timeout=timedelta(milliseconds=1)))
+    executor._result_cache = result_cache
+
+    await executor.refresh_checks([(package, "slow")])
+
+    [(_checker_arg, _release_info_arg, result)] = [call.args for call in result_cache.set.call_args_list]
+    assert result.result_type is CheckResultType.SUCCESS
+
+
+@pytest.mark.asyncio
+async def test_opens_checks_executor_with_popularity_snapshot(tmp_path: Path):
+    entry = PopularityEntry(
+        project="requests", monthly_downloads=1_000_000, repo_url=None, star_count=None, first_upload_time=None
+    )
+    snapshot_data = serialize_popularity_snapshot([entry], created_at=datetime.now(timezone.utc))
+    write_popularity_snapshot(tmp_path / "pipask" / POPULARITY_SNAPSHOT_FILE, snapshot_data)
+
+    async with open_checks_executor(Values({"cache_dir": str(tmp_path), "proxy": ""})) as executor:
+        assert executor._popularity_snapshot is not None
+        assert executor._result_cache is not None
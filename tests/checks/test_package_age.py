@@ -4,10 +4,9 @@ from unittest.mock import AsyncMock
 import pytest
 
 from pipask.checks.package_age import PackageAge
+from pipask.checks.release_data import ReleaseDataProvider
 from pipask.checks.types import CheckResult, CheckResultType
 from pipask.infra.pypi import (
-    Distribution,
-    DistributionsResponse,
     ProjectInfo,
     ProjectReleaseFile,
     ReleaseResponse,
@@ -20,13 +19,13 @@ PACKAGE_VERSION = "1.0.0"
 
 @pytest.mark.asyncio
 async def test_no_distributions():
-    pypi_client = AsyncMock()
-    pypi_client.get_distributions.return_value = None
+    release_data_provider = AsyncMock(spec=ReleaseDataProvider)
+    release_data_provider.get_first_upload_time.return_value = None
     release_info = VerifiedPypiReleaseInfo(
         ReleaseResponse(info=ProjectInfo(name=PACKAGE_NAME, version=PACKAGE_VERSION)),
         "file.whl",
     )
-    checker = PackageAge(pypi_client)
+    checker = PackageAge(release_data_provider)
 
     result = await checker.check(release_info)
 
@@ -38,18 +37,10 @@ async def test_no_distributions():
 
 @pytest.mark.asyncio
 async def test_too_new_package():
-    pypi_client = AsyncMock()
+    release_data_provider = AsyncMock(spec=ReleaseDataProvider)
     now = datetime.datetime.now(datetime.timezone.utc)
-    pypi_client.get_distributions.return_value = DistributionsResponse(
-        files=[
-            Distribution(
-                filename="package-1.0.0.tar.gz",
-                **{"upload-time": now - datetime.timedelta(days=10)},
-                yanked=False,
-            )
-        ],
-    )
-    checker = PackageAge(pypi_client)
+    release_data_provider.get_first_upload_time.return_value = now - datetime.timedelta(days=10)
+    checker = PackageAge(release_data_provider)
     release_info = VerifiedPypiReleaseInfo(
         ReleaseResponse(info=ProjectInfo(name=PACKAGE_NAME, version=PACKAGE_VERSION)),
         "file.whl",
@@ -65,23 +56,10 @@ async def test_too_new_package():
 
 @pytest.mark.asyncio
 async def test_too_old_release():
-    pypi_client = AsyncMock()
+    release_data_provider = AsyncMock(spec=ReleaseDataProvider)
     now = datetime.datetime.now(datetime.timezone.utc)
-    pypi_client.get_distributions.return_value = DistributionsResponse(
-        files=[
-            Distribution(
-                filename="package-1.0.0.tar.gz",
-                **{"upload-time": now - datetime.timedelta(days=400)},
-                yanked=False,
-            ),
-            Distribution(
-                filename="package-2.0.0.tar.gz",
-                **{"upload-time": now - datetime.timedelta(days=100)},
-                yanked=False,
-            ),
-        ],
-    )
-    checker = PackageAge(pypi_client)
+    release_data_provider.get_first_upload_time.return_value = now - datetime.timedelta(days=400)
+    checker = PackageAge(release_data_provider)
     release_info = VerifiedPypiReleaseInfo(
         ReleaseResponse(
             info=ProjectInfo(
@@ -109,24 +87,10 @@ async def test_too_old_release():
 
 @pytest.mark.asyncio
 async def test_successful_check():
-    pypi_client = AsyncMock()
+    release_data_provider = AsyncMock(spec=ReleaseDataProvider)
     now = datetime.datetime.now(datetime.timezone.utc)
-    pypi_client.get_distributions.return_value = DistributionsResponse(
-        files=[
-            # Include both a recent and an old distribution
-            Distribution(
-                filename="package-1.0.0.tar.gz",
-                **{"upload-time": now - datetime.timedelta(days=25)},
-                yanked=False,
-            ),
-            Distribution(
-                filename="package-2.0.0.tar.gz",
-                **{"upload-time": now - datetime.timedelta(days=1)},
-                yanked=False,
-            ),
-        ],
-    )
-    checker = PackageAge(pypi_client)
+    release_data_provider.get_first_upload_time.return_value = now - datetime.timedelta(days=25)
+    checker = PackageAge(release_data_provider)
     release_info = VerifiedPypiReleaseInfo(
         ReleaseResponse(
             info=ProjectInfo(
@@ -1,3 +1,4 @@
+from datetime import timedelta
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
@@ -5,7 +6,7 @@ import pytest
 from pipask.checks.package_downloads import PackageDownloadsChecker
 from pipask.checks.types import CheckResultType
 from pipask.infra.pypi import ProjectInfo, ReleaseResponse, VerifiedPypiReleaseInfo
-from pipask.infra.pypistats import DownloadStats, PypiStatsClient
+from pipask.infra.pypistats import DownloadStats, PypiStatsClient, get_time_to_daily_refresh
 
 PACKAGE_NAME = "package"
 PACKAGE_VERSION = "1.0.0"
@@ -61,3 +62,13 @@ async def test_low_download_count():
 
     assert result.result_type == CheckResultType.FAILURE
     assert result.message == "Only 50 downloads from PyPI in the last month"
+
+
+def test_package_downloads_result_expires_at_daily_refresh():
+    checker = PackageDownloadsChecker(MagicMock(spec=PypiStatsClient))
+
+    time_to_refresh = get_time_to_daily_refresh()
+    result_ttl = checker.result_ttl
+
+    assert result_ttl is not None
+    assert abs(result_ttl - time_to_refresh) < timedelta(seconds=5)
@@ -0,0 +1,141 @@
+import asyncio
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from pipask.checks.release_data import ReleaseData, ReleaseDataProvider
+from pipask.infra.popularity_snapshot import PopularityEntry, PopularitySnapshot, serialize_popularity_snapshot
+from pipask.infra.pypi import (
+    AttestationBundle,
+    AttestationPublisher,
+    AttestationResponse,
+    ProjectInfo,
+    ReleaseResponse,
+    VerifiedPypiReleaseInfo,
+)
+from pipask.infra.repo_client import RepoInfo
+
+release_info = VerifiedPypiReleaseInfo(
+    ReleaseResponse(info=ProjectInfo(name="requests", version="2.31.0")), "requests-2.31.0-py3-none-any.whl"
+)
+attestations = AttestationResponse(
+    attestation_bundles=[AttestationBundle(publisher=AttestationPublisher(kind="GitHub", repository="psf/requests"))],
+    version=1,
+)
+
+
+def _provider(**clients: MagicMock) -> ReleaseDataProvider:
+    return ReleaseDataProvider(
+        pypi_client=clients.get("pypi_client", MagicMock()),
+        repo_client=clients.get("repo_client", MagicMock()),
+        pypi_stats_client=clients.get("pypi_stats_client", MagicMock()),
+        vulnerability_details_service=clients.get("vulnerability_details_service", MagicMock()),
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_fetch():
+    pypi_stats_client = MagicMock()
+
+    async def get_download_stats(package_name: str):
+        await asyncio.sleep(0.01)
+        return MagicMock(last_month=1000)
+
+    pypi_stats_client.get_download_stats = AsyncMock(side_effect=get_download_stats)
+    provider = _provider(pypi_stats_client=pypi_stats_client)
+
+    first, second = await asyncio.gather(
+        provider.get_download_stats("requests"), provider.get_download_stats("requests")
+    )
+    third = await provider.get_download_stats("requests")
+
+    assert first is second is third
+    pypi_stats_client.get_download_stats.assert_awaited_once_with("requests")
+
+
+@pytest.mark.asyncio
+async def test_prefetch_follows_attestations_to_repo_info():
+    pypi_client = MagicMock()
+    pypi_client.get_attestations = AsyncMock(return_value=attestations)
+    repo_client = MagicMock()
+    repo_client.get_repo_info = AsyncMock(return_value=RepoInfo(star_count=50000))
+    provider = _provider(pypi_client=pypi_client, repo_client=repo_client)
+
+    provider.prefetch(release_info, {ReleaseData.REPO_INFO, ReleaseData.ATTESTATIONS})
+    repo_info = await provider.get_repo_info("https://github.com/psf/requests")
+
+    assert repo_info is not None and repo_info.star_count == 50000
+    pypi_client.get_attestations.assert_awaited_once()
+    repo_client.get_repo_info.assert_awaited_once_with("https://github.com/psf/requests")
+
+
+@pytest.mark.asyncio
+async def test_failed_prefetch_is_reported_to_consumer():
+    pypi_client = MagicMock()
+    pypi_client.get_first_upload_time = AsyncMock(side_effect=RuntimeError("upstream error"))
+    provider = _provider(pypi_client=pypi_client)
+
+    provider.prefetch(release_info, {ReleaseData.FIRST_UPLOAD_TIME})
+
+    with pytest.raises(RuntimeError, match="upstream error"):
+        await provider.get_first_upload_time("requests")
+    pypi_client.get_first_upload_time.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_consumer_does_not_cancel_fetch():
+    pypi_client = MagicMock()
+
+    async def get_first_upload_time(project_name: str):
+        await asyncio.sleep(0.02)
+        return "first upload time"
+
+    pypi_client.get_first_upload_time = AsyncMock(side_effect=get_first_upload_time)
+    provider = _provider(pypi_client=pypi_client)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(provider.get_first_upload_time("requests"), 0.001)
+    result = await provider.get_first_upload_time("requests")
+
+    assert result == "first upload time"
+    pypi_client.get_first_upload_time.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_popularity_snapshot_short_circuits_fetches():
+    snapshot = PopularitySnapshot(
+        serialize_popularity_snapshot(
+            [
+                PopularityEntry(
+                    project="requests",
+                    monthly_downloads=500_000_000,
+                    repo_url="https://github.com/psf/requests",
+                    star_count=52000,
+                    first_upload_time=None,
+                )
+            ],
+            datetime.now(timezone.utc),
+        )
+    )
+    pypi_stats_client = MagicMock()
+    pypi_stats_client.get_download_stats = AsyncMock()
+    repo_client = MagicMock()
+    repo_client.get_repo_info = AsyncMock(return_value=RepoInfo(star_count=10))
+    provider = ReleaseDataProvider(
+        pypi_client=MagicMock(),
+        repo_client=repo_client,
+        pypi_stats_client=pypi_stats_client,
+        vulnerability_details_service=MagicMock(),
+        popularity_snapshot=snapshot,
+    )
+
+    download_stats = await provider.get_download_stats("Requests")
+    repo_info = await provider.get_repo_info("https://github.com/PSF/requests", "requests")
+    other_repo_info = await provider.get_repo_info("https://github.com/attacker/requests", "requests")
+
+    assert download_stats is not None and download_stats.last_month == 500_000_000
+    assert repo_info == RepoInfo(star_count=52000)
+    assert other_repo_info == RepoInfo(star_count=10)
+    pypi_stats_client.get_download_stats.assert_not_awaited()
+    repo_client.get_repo_info.assert_awaited_once_with("https://github.com/attacker/requests")
@@ -2,6 +2,7 @@ from unittest.mock import MagicMock, AsyncMock
 
 import pytest
 
+from pipask.checks.release_data import ReleaseDataProvider
 from pipask.checks.repo_popularity import RepoPopularityChecker
 from pipask.checks.types import CheckResultType
 from pipask.infra.pypi import (
@@ -56,12 +57,21 @@ UNKNOWN_PUBLISHER_ATTESTATION = AttestationResponse(
 )
 
 
+def _release_data_provider(repo_client: RepoClient, pypi_client: PypiClient) -> ReleaseDataProvider:
+    return ReleaseDataProvider(
+        pypi_client=pypi_client,
+        repo_client=repo_client,
+        pypi_stats_client=MagicMock(),
+        vulnerability_details_service=MagicMock(),
+    )
+
+
 @pytest.mark.asyncio
 async def test_repo_popularity_no_repo_url():
     repo_client = MagicMock(spec=RepoClient)
     pypi_client = MagicMock(spec=PypiClient)
     pypi_client.get_attestations = AsyncMock(return_value=None)
-    checker = RepoPopularityChecker(repo_client, pypi_client)
+    checker = RepoPopularityChecker(_release_data_provider(repo_client, pypi_client))
     release_info = VerifiedPypiReleaseInfo(
         ReleaseResponse(info=ProjectInfo(name=PACKAGE_NAME, version=PACKAGE_VERSION, project_urls=None)),
         "file.whl",
@@ -78,7 +88,7 @@ async def test_unrecognized_publisher_type():
     repo_client = MagicMock(spec=RepoClient)
     pypi_client = MagicMock(spec=PypiClient)
     pypi_client.get_attestations = AsyncMock(return_value=UNKNOWN_PUBLISHER_ATTESTATION)
-    checker = RepoPopularityChecker(repo_client, pypi_client)
+    checker = RepoPopularityChecker(_release_data_provider(repo_client, pypi_client))
     release_info = VerifiedPypiReleaseInfo(
         ReleaseResponse(info=ProjectInfo(name=PACKAGE_NAME, version=PACKAGE_VERSION, project_urls=None)),
         "file.whl",
@@ -96,7 +106,7 @@ async def test_repo_not_found_with_attestation():
     repo_client.get_repo_info.return_value = None
     pypi_client = MagicMock(spec=PypiClient)
     pypi_client.get_attestations = AsyncMock(return_value=GITHUB_ATTESTATION)
-    checker = RepoPopularityChecker(repo_client, pypi_client)
+    checker = RepoPopularityChecker(_release_data_provider(repo_client, pypi_client))
     release_info = VerifiedPypiReleaseInfo(
         ReleaseResponse(info=ProjectInfo(name=PACKAGE_NAME, version=PACKAGE_VERSION, project_urls=None)),
         "file.whl",
@@ -117,7 +127,7 @@ async def test_unverified_repo_url(monkeypatch):
     repo_client = MagicMock(spec=RepoClient)
     pypi_client = MagicMock(spec=PypiClient)
     pypi_client.get_attestations = AsyncMock(return_value=None)
-    checker = RepoPopularityChecker(repo_client, pypi_client)
+    checker = RepoPopularityChecker(_release_data_provider(repo_client, pypi_client))
     release_info = VerifiedPypiReleaseInfo(
         ReleaseResponse(
             info=ProjectInfo(
@@ -144,7 +154,7 @@ async def test_high_star_count_with_attestation(monkeypatch):
     repo_client = MagicMock(spec=RepoClient)
     pypi_client = MagicMock(spec=PypiClient)
     pypi_client.get_attestations = AsyncMock(return_value=GITHUB_ATTESTATION)
-    checker = RepoPopularityChecker(repo_client, pypi_client)
+    checker = RepoPopularityChecker(_release_data_provider(repo_client, pypi_client))
     release_info = VerifiedPypiReleaseInfo(
         ReleaseResponse(info=ProjectInfo(name=PACKAGE_NAME, version=PACKAGE_VERSION, project_urls=None)),
         "file.whl",
@@ -164,7 +174,7 @@ async def test_medium_star_count_with_attestation(monkeypatch):
     repo_client = MagicMock(spec=RepoClient)
     pypi_client = MagicMock(spec=PypiClient)
     pypi_client.get_attestations = AsyncMock(return_value=GITHUB_ATTESTATION)
-    checker = RepoPopularityChecker(repo_client, pypi_client)
+    checker = RepoPopularityChecker(_release_data_provider(repo_client, pypi_client))
     release_info = VerifiedPypiReleaseInfo(
         ReleaseResponse(info=ProjectInfo(name=PACKAGE_NAME, version=PACKAGE_VERSION, project_urls=None)),
         "file.whl",
@@ -183,7 +193,7 @@ async def test_low_star_count_with_attestation(monkeypatch):
     repo_client = MagicMock(spec=RepoClient)
     pypi_client = MagicMock(spec=PypiClient)
     pypi_client.get_attestations = AsyncMock(return_value=GITHUB_ATTESTATION)
-    checker = RepoPopularityChecker(repo_client, pypi_client)
+    checker = RepoPopularityChecker(_release_data_provider(repo_client, pypi_client))
     release_info = VerifiedPypiReleaseInfo(
         ReleaseResponse(info=ProjectInfo(name=PACKAGE_NAME, version=PACKAGE_VERSION, project_urls=None)),
         "file.whl",
@@ -0,0 +1,91 @@
+from datetime import timedelta
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from pipask.checks.checks_executor import _run_one_check
+from pipask.checks.result_cache import CheckResultCache
+from pipask.checks.types import CheckResult, CheckResultType
+from pipask.infra.pypi import ProjectInfo, ProjectReleaseFile, ReleaseResponse, VerifiedPypiReleaseInfo
+
+release_info = VerifiedPypiReleaseInfo(
+    ReleaseResponse(info=ProjectInfo(name="Requests", version="2.31.0")), "requests-2.31.0-py3-none-any.whl"
+)
+
+
+def _checker(result: CheckResult, ttl: timedelta | None = timedelta(days=1)) -> MagicMock:
+    checker = MagicMock()
+    checker.checker_id = "test-checker"
+    checker.result_ttl = ttl
+    checker.check = AsyncMock(return_value=result)
+    return checker
+
+
+@pytest.mark.asyncio
+async def test_reuses_cached_result(tmp_path: Path):
+    checker = _checker(CheckResult(CheckResultType.SUCCESS, "OK"))
+    result_cache = CheckResultCache(tmp_path)
+
+    first_result = await _run_one_check(checker, release_info, MagicMock(), result_cache)
+    second_result = await _run_one_check(checker, release_info, MagicMock(), result_cache)
+
+    assert checker.check.await_count == 1
+    assert first_result == second_result == CheckResult(CheckResultType.SUCCESS, "OK", checker_id="test-checker")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "result,ttl",
+    [
+        (CheckResult(CheckResultType.FAILURE, "Failed"), timedelta(days=1)),
+        (CheckResult(CheckResultType.SUCCESS, "OK"), None),
+    ],
+)
+async def test_does_not_cache_failures_or_checkers_without_ttl(tmp_path: Path, result, ttl):
+    checker = _checker(result, ttl)
+    result_cache = CheckResultCache(tmp_path)
+
+    await _run_one_check(checker, release_info, MagicMock(), result_cache)
+    await _run_one_check(checker, release_info, MagicMock(), result_cache)
+
+    assert checker.check.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_does_not_cache_check_errors(tmp_path: Path):
+    checker = _checker(CheckResult(CheckResultType.SUCCESS, "OK"))
+    checker.check.side_effect = RuntimeError("network error")
+    result_cache = CheckResultCache(tmp_path)
+
+    result = await _run_one_check(checker, release_info, MagicMock(), result_cache)
+
+    assert result.result_type is CheckResultType.FAILURE
+    assert result_cache.get(checker, release_info) is None
+
+
+def _release_info(filename: str, sha256: str) -> VerifiedPypiReleaseInfo:
+    release_file = ProjectReleaseFile(
+        filename=filename, upload_time_iso_8601="2023-05-22T15:12:44Z", digests={"sha256": sha256}
+    )
+    return VerifiedPypiReleaseInfo(
+        ReleaseResponse(info=ProjectInfo(name="requests", version="2.31.0"), urls=[release_file]), filename
+    )
+
+
+@pytest.mark.parametrize(
+    "other_release_info",
+    [
+        _release_info("requests-2.31.0.tar.gz", "aaa"),  # Another file of the same release
+        _release_info("requests-2.31.0-py3-none-any.whl", "bbb"),  # The same file re-uploaded
+    ],
+)
+def test_does_not_reuse_result_for_another_release_file(tmp_path: Path, other_release_info: VerifiedPypiReleaseInfo):
+    checker = _checker(CheckResult(CheckResultType.SUCCESS, "OK"))
+    result_cache = CheckResultCache(tmp_path)
+    cached_release_info = _release_info("requests-2.31.0-py3-none-any.whl", "aaa")
+
+    result_cache.set(checker, cached_release_info, CheckResult(CheckResultType.SUCCESS, "OK"))
+
+    assert result_cache.get(checker, cached_release_info) is not None
+    assert result_cache.get(checker, other_release_info) is None
@@ -0,0 +1,43 @@
+from datetime import timedelta
+from optparse import Values
+from pathlib import Path
+
+from pipask.infra.cache import JsonFileCache, get_pipask_cache_dir
+from pipask.infra.cassette import start_recording, stop_cassette
+
+
+def test_returns_stored_value(tmp_path: Path):
+    cache = JsonFileCache(tmp_path)
+
+    cache.set("key", {"value": [1, 2]}, timedelta(hours=1))
+
+    assert cache.get("key") == {"value": [1, 2]}
+    assert cache.get("other-key") is None
+
+
+def test_does_not_return_expired_value(tmp_path: Path):
+    cache = JsonFileCache(tmp_path)
+
+    cache.set("key", "value", timedelta(seconds=-1))
+
+    assert cache.get("key") is None
+
+
+def test_ignores_corrupted_entry(tmp_path: Path):
+    cache = JsonFileCache(tmp_path)
+    cache.set("key", "value", timedelta(hours=1))
+    [entry_file] = [p for p in tmp_path.rglob("*") if p.is_file()]
+    entry_file.write_text("{not json")
+
+    assert cache.get("key") is None
+
+
+def test_disables_cache_while_recording_http(tmp_path: Path):
+    options = Values({"cache_dir": str(tmp_path)})
+    start_recording()
+    try:
+        assert get_pipask_cache_dir(options) is None
+    finally:
+        stop_cassette()
+
+    assert get_pipask_cache_dir(options) == tmp_path / "pipask"
@@ -0,0 +1,114 @@
+import asyncio
+import gzip
+import io
+
+import httpx
+import pytest
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+from pipask.exception import PipaskException
+from pipask.infra.cassette import (
+    Cassette,
+    CassetteRecordingAdapter,
+    CassetteRecordingTransport,
+    CassetteReplayAdapter,
+    CassetteReplayTransport,
+    ReplayLatency,
+)
+
+
+def _handler(request: httpx.Request) -> httpx.Response:
+    if request.url.path == "/missing":
+        return httpx.Response(404)
+    return httpx.Response(200, json={"path": request.url.path, "body": request.content.decode()})
+
+
+@pytest.mark.asyncio
+async def test_replays_recorded_httpx_exchanges(tmp_path):
+    cassette = Cassette()
+    async with httpx.AsyncClient(
+        transport=CassetteRecordingTransport(httpx.MockTransport(_handler), cassette)
+    ) as client:
+        recorded = await client.get("https://example.com/a")
+        await client.post("https://example.com/b", json={"q": 1})
+        await client.get("https://example.com/missing")
+    cassette.save(tmp_path / "cassette.gz")
+
+    replay_transport = CassetteReplayTransport(Cassette.load(tmp_path / "cassette.gz"), ReplayLatency())
+    async with httpx.AsyncClient(transport=replay_transport) as client:
+        replayed = await client.get("https://example.com/a")
+        replayed_post = await client.post("https://example.com/b", json={"q": 1})
+        replayed_missing = await client.get("https://example.com/missing")
+        with pytest.raises(httpx.ConnectError, match="No recorded response"):
+            await client.post("https://example.com/b", json={"q": 2})
+
+    assert replayed.status_code == recorded.status_code == 200
+    assert replayed.json() == recorded.json() == {"path": "/a", "body": ""}
+    assert replayed_post.json() == {"path": "/b", "body": '{"q":1}'}
+    assert replayed_missing.status_code == 404
+
+
+def test_replays_repeated_requests_in_recorded_order():
+    cassette = Cassette()
+    responses = iter([b"first", b"second"])
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=next(responses))
+
+    async def record_and_replay() -> list[bytes]:
+        async with httpx.AsyncClient(transport=CassetteRecordingTransport(httpx.MockTransport(handler), cassette)) as c:
+            await c.get("https://example.com/a")
+            await c.get("https://example.com/a")
+        async with httpx.AsyncClient(transport=CassetteReplayTransport(cassette, ReplayLatency())) as client:
+            return [(await client.get("https://example.com/a")).content for _ in range(3)]
+
+    assert asyncio.run(record_and_replay()) == [b"first", b"second", b"second"]
+
+
+class _FakeAdapter(HTTPAdapter):
+    def send(self, request, *args, **kwargs):
+        raw = urllib3.HTTPResponse(
+            body=io.BytesIO(gzip.compress(b"hello")),
+            headers={"Content-Encoding": "gzip"},
+            status=200,
+            preload_content=False,
+        )
+        return self.build_response(request, raw)
+
+
+def test_replays_recorded_requests_exchanges(tmp_path):
+    cassette = Cassette()
+    session = requests.Session()
+    session.mount("https://", CassetteRecordingAdapter(_FakeAdapter(), cassette))
+    recorded = session.get("https://example.com/a")
+    streamed = b"".join(session.get("https://example.com/a", stream=True).raw.stream(decode_content=True))
+    cassette.save(tmp_path / "cassette.gz")
+
+    replay_session = requests.Session()
+    replay_session.mount("https://", CassetteReplayAdapter(Cassette.load(tmp_path / "cassette.gz"), ReplayLatency()))
+    replayed = replay_session.get("https://example.com/a")
+
+    assert recorded.content == streamed == replayed.content == b"hello"
+    assert replayed.status_code == 200
+    with pytest.raises(requests.ConnectionError, match="No recorded response"):
+        replay_session.get("https://example.com/b")
+
+
+def test_samples_latency_within_jitter():
+    latency = ReplayLatency(latency_seconds=0.05, jitter_seconds=0.01)
+    same_seed_latency = ReplayLatency(latency_seconds=0.05, jitter_seconds=0.01)
+
+    samples = [latency.sample() for _ in range(100)]
+
+    assert all(0.04 <= s <= 0.06 for s in samples)
+    assert len(set(samples)) > 1
+    assert samples == [same_seed_latency.sample() for _ in range(100)]
+
+
+def test_rejects_invalid_cassette(tmp_path):
+    (tmp_path / "cassette.gz").write_bytes(b"not a cassette")
+
+    with pytest.raises(PipaskException, match="Could not read HTTP cassette"):
+        Cassette.load(tmp_path / "cassette.gz")
@@ -0,0 +1,201 @@
+from datetime import timedelta
+from pathlib import Path
+
+import httpx
+import pytest
+
+from pipask.infra.cache import JsonFileCache
+from pipask.infra.http_cache import HttpCacheTransport, NotFoundCacheTransport
+from pipask.infra.shared_transport import CACHE_STATUS_EXTENSION
+
+
+def _client(handler, cache_dir: Path) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=HttpCacheTransport(httpx.MockTransport(handler), cache_dir))
+
+
+@pytest.mark.asyncio
+async def test_reuses_fresh_response_across_clients(tmp_path: Path):
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={"n": len(requests)}, headers={"Cache-Control": "max-age=900, public"})
+
+    async with _client(handler, tmp_path) as client:
+        first = await client.get("https://pypi.org/pypi/foo/json")
+    async with _client(handler, tmp_path) as client:
+        second = await client.get("https://pypi.org/pypi/foo/json")
+
+    assert len(requests) == 1
+    assert second.json() == first.json() == {"n": 1}
+    assert first.extensions[CACHE_STATUS_EXTENSION] == "miss"
+    assert second.extensions[CACHE_STATUS_EXTENSION] == "hit"
+
+
+@pytest.mark.asyncio
+async def test_revalidates_stale_response_with_etag(tmp_path: Path):
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v1"', "Cache-Control": "max-age=0"})
+        return httpx.Response(200, json={"version": 1}, headers={"ETag": '"v1"', "Cache-Control": "max-age=0"})
+
+    async with _client(handler, tmp_path) as client:
+        await client.get("https://api.osv.dev/v1/vulns/GHSA-1")
+        response = await client.get("https://api.osv.dev/v1/vulns/GHSA-1")
+
+    assert len(requests) == 2
+    assert "If-None-Match" not in requests[0].headers
+    assert requests[1].headers["If-None-Match"] == '"v1"'
+    assert response.status_code == 200
+    assert response.json() == {"version": 1}
+    assert response.extensions[CACHE_STATUS_EXTENSION] == "revalidated"
+
+
+@pytest.mark.asyncio
+async def test_revalidates_with_last_modified(tmp_path: Path):
+    requests: list[httpx.Request] = []
+    last_modified = "Wed, 21 Oct 2015 07:28:00 GMT"
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.headers.get("If-Modified-Since") == last_modified:
+            return httpx.Response(304)
+        return httpx.Response(200, text="data", headers={"Last-Modified": last_modified})
+
+    async with _client(handler, tmp_path) as client:
+        await client.get("https://pypistats.org/api/packages/foo/recent")
+        response = await client.get("https://pypistats.org/api/packages/foo/recent")
+
+    assert len(requests) == 2
+    assert response.text == "data"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "headers",
+    [{"Cache-Control": "no-store, max-age=900"}, {}, {"Cache-Control": "max-age=900", "Vary": "*"}],
+)
+async def test_does_not_store_uncacheable_responses(tmp_path: Path, headers: dict[str, str]):
+    request_count = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal request_count
+        request_count += 1
+        return httpx.Response(200, text="data", headers=headers)
+
+    async with _client(handler, tmp_path) as client:
+        await client.get("https://example.com/a")
+        await client.get("https://example.com/a")
+
+    assert request_count == 2
+
+
+@pytest.mark.asyncio
+async def test_does_not_cache_errors_and_post_requests(tmp_path: Path):
+    request_count = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal request_count
+        request_count += 1
+        status_code = 503 if request.method == "GET" else 200
+        return httpx.Response(status_code, text="data", headers={"Cache-Control": "max-age=900"})
+
+    async with _client(handler, tmp_path) as client:
+        for _ in range(2):
+            await client.get("https://example.com/a")
+            await client.post("https://example.com/b", json={})
+
+    assert request_count == 4
+
+
+@pytest.mark.asyncio
+async def test_separates_entries_by_accept_header(tmp_path: Path):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, text=request.headers["Accept"], headers={"Cache-Control": "max-age=900"})
+
+    async with _client(handler, tmp_path) as client:
+        html = await client.get("https://pypi.org/simple/foo/", headers={"Accept": "text/html"})
+        json_response = await client.get("https://pypi.org/simple/foo/", headers={"Accept": "application/json"})
+
+    assert html.text == "text/html"
+    assert json_response.text == "application/json"
+
+
+@pytest.mark.asyncio
+async def test_ignores_corrupted_entry(tmp_path: Path):
+    request_count = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal request_count
+        request_count += 1
+        return httpx.Response(200, text="data", headers={"Cache-Control": "max-age=900"})
+
+    async with _client(handler, tmp_path) as client:
+        await client.get("https://example.com/a")
+        [entry_file] = [p for p in tmp_path.rglob("*") if p.is_file()]
+        entry_file.write_bytes(b"{not json")
+        response = await client.get("https://example.com/a")
+
+    assert request_count == 2
+    assert response.text == "data"
+
+
+@pytest.mark.asyncio
+async def test_remembers_not_found_responses_within_and_across_runs(tmp_path: Path):
+    requests: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url.path)
+        return httpx.Response(404 if request.url.path.startswith("/missing") else 200)
+
+    def create_client() -> httpx.AsyncClient:
+        transport = NotFoundCacheTransport(httpx.MockTransport(handler), JsonFileCache(tmp_path))
+        return httpx.AsyncClient(transport=transport)
+
+    async with create_client() as client:
+        for _ in range(2):
+            await client.get("https://example.com/missing")
+            await client.get("https://example.com/found")
+    async with create_client() as client:
+        response = await client.get("https://example.com/missing")
+
+    assert requests == ["/missing", "/found", "/found"]
+    assert response.status_code == 404
+    assert response.extensions[CACHE_STATUS_EXTENSION] == "hit"
+
+
+@pytest.mark.asyncio
+async def test_not_found_responses_expire():
+    request_count = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal request_count
+        request_count += 1
+        return httpx.Response(404)
+
+    transport = NotFoundCacheTransport(httpx.MockTransport(handler), cache=None, ttl=timedelta(0))
+    async with httpx.AsyncClient(transport=transport) as client:
+        await client.get("https://example.com/missing")
+        await client.get("https://example.com/missing")
+
+    assert request_count == 2
+
+
+@pytest.mark.asyncio
+async def test_does_not_remember_not_found_responses_of_pypi_release_lookups(tmp_path: Path):
+    requests: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url.path)
+        return httpx.Response(404)
+
+    transport = NotFoundCacheTransport(httpx.MockTransport(handler), JsonFileCache(tmp_path))
+    async with httpx.AsyncClient(transport=transport) as client:
+        for _ in range(2):
+            await client.get("https://pypi.org/pypi/package/1.0.0/json")
+            await client.get("https://pypi.org/simple/package/")
+
+    assert requests == ["/pypi/package/1.0.0/json", "/simple/package/"] * 2
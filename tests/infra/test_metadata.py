@@ -1,12 +1,19 @@
 import os
+import sys
+import zipfile
+from pathlib import Path
 from unittest.mock import patch
 
 import pytest
 from packaging.requirements import Requirement
+from packaging.specifiers import SpecifierSet
 from packaging.version import Version
 
 from pipask._vendor.pip._internal.index.collector import LinkCollector
 from pipask._vendor.pip._internal.index.package_finder import PackageFinder
+from pipask._vendor.pip._internal.metadata import _should_use_importlib_metadata
+from pipask._vendor.pip._internal.metadata.pkg_resources import Distribution as LegacyDistribution
+from pipask._vendor.pip._internal.metadata.importlib import Environment as ImportlibEnvironment
 from pipask._vendor.pip._internal.models.link import Link
 from pipask._vendor.pip._internal.models.search_scope import SearchScope
 from pipask._vendor.pip._internal.models.target_python import TargetPython
@@ -18,7 +25,7 @@ from pipask.infra.metadata import (
     _get_pypi_metadata_distribution,
     synthesize_release_metadata_file,
 )
-from pipask.infra.pypi import ReleaseResponse
+from pipask.infra.pypi import ProjectInfo, ReleaseResponse
 
 
 @pytest.fixture
@@ -155,11 +162,36 @@ def test_creates_distribution_from_pypi_metadata_importlib(
             assert "Summary: Fluent API wrapper for Python collections" in str(distribution.metadata)
 
 
-def test_get_pypi_metadata_distribution_throws_if_tempdir_not_provided(pip_session: PipSession) -> None:
-    # See pip._internal.metadata.__init__._should_use_importlib_metadata()
-    with patch.dict(os.environ, {"_PIP_USE_IMPORTLIB_METADATA": "1"}):
-        with pytest.raises(RuntimeError):
-            _get_pypi_metadata_distribution("pyfluent-iterables", Version("1.2.0"), pip_session)
+def test_creates_in_memory_distribution_from_pypi_release(pip_session: PipSession) -> None:
+    release_info = ReleaseResponse(
+        info=ProjectInfo(
+            name="Flask",
+            version="3.1.0",
+            summary="A simple framework for building complex web applications.",
+            requires_python=">=3.9",
+            requires_dist=[
+                "Werkzeug>=3.1",
+                'importlib-metadata>=3.6; python_version < "3.10"',
+                'asgiref>=3.2; extra == "async"',
+            ],
+            provides_extra=["async"],
+        )
+    )
+
+    # No tempdir manager needed, nothing is written to disk
+    with patch("pipask.infra.metadata.get_pypi_release_info_sync", return_value=release_info):
+        distribution = _get_pypi_metadata_distribution("flask", Version("3.1.0"), pip_session)
+
+    assert distribution.canonical_name == "flask"
+    assert distribution.raw_name == "Flask"
+    assert distribution.version == Version("3.1.0")
+    assert distribution.location is None
+    assert distribution.requires_python == SpecifierSet(">=3.9")
+    assert [req.name for req in distribution.iter_dependencies()] == ["Werkzeug"]
+    assert [req.name for req in distribution.iter_dependencies(["async"])] == ["Werkzeug", "asgiref"]
+    assert distribution.is_extra_provided("ASYNC")
+    assert distribution.metadata_dict["summary"] == "A simple framework for building complex web applications."
+    assert distribution.metadata.get_all("Requires-Dist") == release_info.info.requires_dist
 
 
 @pytest.mark.integration
@@ -185,3 +217,58 @@ async def test_fetches_metadata_from_pypi_by_hash(pip_session: PipSession) -> No
             assert metadata.version == Version("1.2.0")
             assert metadata.requires_python == "<4.0,>=3.7"
             assert "Summary: Fluent API wrapper for Python collections" in str(metadata.metadata)
+
+
+def _create_dist_info(site_packages: Path, name: str, version: str) -> None:
+    dist_info = site_packages / f"{name}-{version}.dist-info"
+    dist_info.mkdir()
+    (dist_info / "METADATA").write_text(f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n")
+
+
+def test_installed_distributions_lookup_is_indexed_until_paths_change(tmp_path: Path) -> None:
+    _create_dist_info(tmp_path, "Flask", "3.1.0")
+    _create_dist_info(tmp_path, "requests", "2.31.0")
+    environment = ImportlibEnvironment.from_paths([str(tmp_path)])
+
+    flask = environment.get_distribution("flask")
+
+    assert flask is not None and flask.version == Version("3.1.0")
+    assert ImportlibEnvironment.from_paths([str(tmp_path)]).get_distribution("Flask") is flask
+    assert environment.get_distribution("rich") is None
+
+    _create_dist_info(tmp_path, "rich", "13.9.4")
+    os.utime(tmp_path, ns=(0, 0))  # Timestamp granularity of some file systems is too coarse for the test
+
+    assert environment.get_distribution("rich").version == Version("13.9.4")
+    assert sorted(dist.canonical_name for dist in environment.iter_all_distributions()) == ["flask", "requests", "rich"]
+
+
+def test_importlib_metadata_backend_is_used_on_python_3_10() -> None:
+    environ = {key: value for key, value in os.environ.items() if key != "_PIP_USE_IMPORTLIB_METADATA"}
+    with patch.dict(os.environ, environ, clear=True), patch.object(sys, "version_info", (3, 10, 12, "final", 0)):
+        assert _should_use_importlib_metadata()
+
+
+def test_legacy_egg_support_is_not_loaded_without_eggs(tmp_path: Path) -> None:
+    _create_dist_info(tmp_path, "requests", "2.31.0")
+    stdlib_zip = tmp_path / "python310.zip"
+    with zipfile.ZipFile(stdlib_zip, "w") as zf:
+        zf.writestr("json/__init__.py", "")
+
+    # Importing a module that is None in sys.modules fails
+    with patch.dict(sys.modules, {"pipask._vendor.pip._vendor.pkg_resources": None}):
+        distributions = list(ImportlibEnvironment.from_paths([str(tmp_path), str(stdlib_zip)]).iter_all_distributions())
+
+    assert [dist.canonical_name for dist in distributions] == ["requests"]
+
+
+def test_legacy_egg_support_is_loaded_for_zipped_eggs(tmp_path: Path) -> None:
+    egg = tmp_path / "legacy-1.0-py3.10.egg"
+    with zipfile.ZipFile(egg, "w") as zf:
+        zf.writestr("EGG-INFO/PKG-INFO", "Metadata-Version: 1.1\nName: legacy\nVersion: 1.0\n")
+        zf.writestr("legacy/__init__.py", "")
+
+    distributions = list(ImportlibEnvironment.from_paths([str(egg)]).iter_all_distributions())
+
+    egg_distributions = [dist for dist in distributions if isinstance(dist, LegacyDistribution)]
+    assert [(dist.canonical_name, str(dist.version)) for dist in egg_distributions] == [("legacy", "1.0")]
@@ -0,0 +1,157 @@
+import logging
+import os
+import sys
+import textwrap
+import threading
+from pathlib import Path
+
+import pytest
+
+from pipask._vendor.pip._internal.build_env import BuildEnvironment
+from pipask._vendor.pip._internal.utils.subprocess import call_subprocess
+from pipask._vendor.pip._internal.utils.temp_dir import global_tempdir_manager
+from pipask.code_execution_guard import PackageCodeExecutionGuard
+from pipask.infra.parallel_builds import is_capturing_build_output, prepare_concurrently
+from pipask.infra.pip import get_pip_install_report_from_pypi, parse_pip_arguments, parse_pip_install_arguments
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages: list[str] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.messages.append(record.getMessage())
+
+
+@pytest.fixture
+def log_handler():
+    handler = _ListHandler()
+    root_logger = logging.getLogger()
+    # pytest sets the level of the root logger for each test, so the level is set on the test logger
+    test_logger = logging.getLogger("pipask.test_build")
+    original_level = test_logger.level
+    root_logger.addHandler(handler)
+    test_logger.setLevel(logging.INFO)
+    yield handler
+    root_logger.removeHandler(handler)
+    test_logger.setLevel(original_level)
+
+
+def test_prepares_concurrently_with_output_captured_per_item(log_handler: _ListHandler):
+    logger = logging.getLogger("pipask.test_build")
+    # Neither item can finish unless both run at the same time
+    barrier = threading.Barrier(2, timeout=5)
+
+    def prepare(item: str) -> None:
+        assert is_capturing_build_output()
+        logger.info(f"{item}: started")
+        barrier.wait()
+        logger.info(f"{item}: finished")
+
+    prepare_concurrently(["a", "b"], prepare, max_workers=2)
+
+    assert log_handler.messages in (
+        ["a: started", "a: finished", "b: started", "b: finished"],
+        ["b: started", "b: finished", "a: started", "a: finished"],
+    )
+    assert not is_capturing_build_output()
+
+
+def test_raises_first_failure_and_skips_pending_items():
+    prepared = []
+
+    def prepare(item: str) -> None:
+        if item == "broken":
+            raise RuntimeError(f"{item} failed")
+        prepared.append(item)
+
+    with pytest.raises(RuntimeError, match="broken failed"):
+        prepare_concurrently(["broken", "a", "b"], prepare, max_workers=1)
+
+    assert prepared == []
+
+
+@pytest.fixture
+def execution_allowed():
+    token = PackageCodeExecutionGuard._execution_allowed.set(True)
+    yield
+    PackageCodeExecutionGuard._execution_allowed.reset(token)
+
+
+def test_items_see_code_execution_consent(execution_allowed):
+    allowed = []
+
+    prepare_concurrently(["a", "b"], lambda item: allowed.append(PackageCodeExecutionGuard.is_execution_allowed()))
+
+    assert allowed == [True, True]
+
+
+def test_concurrent_builds_see_their_own_build_environment():
+    original_environ = dict(os.environ)
+    # Both builds enter their build environment before either runs a subprocess
+    barrier = threading.Barrier(2, timeout=5)
+    seen_pythonpaths: dict[str, tuple[str, str]] = {}
+
+    def prepare(item: str) -> None:
+        build_env = BuildEnvironment()
+        with build_env:
+            barrier.wait()
+            output = call_subprocess(
+                [sys.executable, "-c", "import os; print(os.environ['PYTHONPATH'])"],
+                command_desc="print PYTHONPATH",
+                stdout_only=True,
+            )
+            seen_pythonpaths[item] = (output.strip(), build_env._site_dir)
+            barrier.wait()
+
+    with global_tempdir_manager():
+        prepare_concurrently(["a", "b"], prepare, max_workers=2)
+
+    assert seen_pythonpaths["a"][0] == seen_pythonpaths["a"][1]
+    assert seen_pythonpaths["b"][0] == seen_pythonpaths["b"][1]
+    assert seen_pythonpaths["a"][0] != seen_pythonpaths["b"][0]
+    assert dict(os.environ) == original_environ
+
+
+def _write_source_tree(path: Path, name: str, output_dir: Path) -> None:
+    path.mkdir()
+    (path / "pyproject.toml").write_text(
+        '[build-system]\nrequires = []\nbuild-backend = "backend"\nbackend-path = ["."]\n'
+    )
+    # The metadata hook records the build environment it runs in
+    backend = f"""
+        import os
+
+        def prepare_metadata_for_build_wheel(metadata_directory, config_settings=None):
+            with open({str(output_dir / name)!r}, "w") as f:
+                f.write(os.environ["PYTHONPATH"])
+            dist_info = os.path.join(metadata_directory, "{name}-1.0.dist-info")
+            os.makedirs(dist_info)
+            with open(os.path.join(dist_info, "METADATA"), "w") as f:
+                f.write("Metadata-Version: 2.1\\nName: {name}\\nVersion: 1.0\\n")
+            return "{name}-1.0.dist-info"
+
+        def build_wheel(wheel_directory, config_settings=None, metadata_directory=None):
+            raise NotImplementedError
+        """
+    (path / "backend.py").write_text(textwrap.dedent(backend))
+
+
+def test_prepares_local_source_trees_concurrently(tmp_path: Path, execution_allowed):
+    original_environ = dict(os.environ)
+    output_dir = tmp_path / "output"
+    output_dir.mkdir()
+    for name in ("alpha", "beta"):
+        _write_source_tree(tmp_path / name, name, output_dir)
+    args = parse_pip_install_arguments(
+        parse_pip_arguments(["install", "--no-index", "--no-deps", str(tmp_path / "alpha"), str(tmp_path / "beta")])
+    )
+
+    report = get_pip_install_report_from_pypi(args)
+
+    assert sorted(item.metadata.name for item in report.install) == ["alpha", "beta"]
+    alpha_pythonpath = (output_dir / "alpha").read_text()
+    beta_pythonpath = (output_dir / "beta").read_text()
+    assert alpha_pythonpath != beta_pythonpath
+    assert dict(os.environ) == original_environ
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from pipask.infra.popularity_snapshot import (
+    POPULARITY_SNAPSHOT_FILE,
+    PopularityEntry,
+    closing_popularity_snapshot,
+    open_popularity_snapshot,
+    serialize_popularity_snapshot,
+    write_popularity_snapshot,
+)
+
+_ENTRIES = [
+    PopularityEntry(
+        project="requests",
+        monthly_downloads=500_000_000,
+        repo_url="https://github.com/psf/requests",
+        star_count=52000,
+        first_upload_time=datetime(2011, 2, 14, 2, 23, 18, tzinfo=timezone.utc),
+    ),
+    PopularityEntry(
+        project="Typing_Extensions",
+        monthly_downloads=600_000_000,
+        repo_url=None,
+        star_count=None,
+        first_upload_time=None,
+    ),
+    PopularityEntry(project="boto3", monthly_downloads=None, repo_url=None, star_count=None, first_upload_time=None),
+]
+
+
+def test_snapshot_round_trip(tmp_path: Path):
+    snapshot_path = tmp_path / POPULARITY_SNAPSHOT_FILE
+    write_popularity_snapshot(snapshot_path, serialize_popularity_snapshot(_ENTRIES, datetime.now(timezone.utc)))
+
+    snapshot = open_popularity_snapshot(snapshot_path)
+
+    assert snapshot is not None and len(snapshot) == 3
+    assert snapshot.get("Requests") == _ENTRIES[0]
+    assert snapshot.get("typing.extensions") == PopularityEntry(
+        project="typing-extensions",
+        monthly_downloads=600_000_000,
+        repo_url=None,
+        star_count=None,
+        first_upload_time=None,
+    )
+    assert snapshot.get("boto3") == _ENTRIES[2]
+    assert snapshot.get("pipask") is None
+    snapshot.close()
+
+
+def test_outdated_snapshot_is_ignored(tmp_path: Path):
+    snapshot_path = tmp_path / POPULARITY_SNAPSHOT_FILE
+    created_at = datetime.now(timezone.utc) - timedelta(days=40)
+    write_popularity_snapshot(snapshot_path, serialize_popularity_snapshot(_ENTRIES, created_at))
+
+    assert open_popularity_snapshot(snapshot_path) is None
+
+
+def test_missing_snapshot_is_ignored(tmp_path: Path):
+    with closing_popularity_snapshot(tmp_path) as snapshot:
+        assert snapshot is None
+
+
+def test_invalid_snapshot_is_rejected(tmp_path: Path):
+    snapshot_path = tmp_path / POPULARITY_SNAPSHOT_FILE
+
+    with pytest.raises(ValueError):
+        write_popularity_snapshot(snapshot_path, b'{"rows": []}')
+
+    assert not snapshot_path.exists()
+    snapshot_path.write_bytes(b"")
+    assert open_popularity_snapshot(snapshot_path) is None
@@ -1,4 +1,5 @@
 from datetime import datetime
+from pathlib import Path
 
 import httpx
 import pytest
@@ -13,6 +14,7 @@ from pipask.infra.pypi import (
     ProjectInfo,
     ProjectReleaseFile,
     PypiClient,
+    PypiReleaseFile,
     ReleaseResponse,
     VerifiedPypiReleaseInfo,
 )
@@ -76,6 +78,92 @@ async def test_pypi_gets_distributions(pypi_client: PypiClient):
     assert oldest_file.upload_time == datetime.fromisoformat("2022-05-19T22:16:51.061667+00:00")
 
 
+@pytest.mark.integration
+async def test_pypi_gets_first_upload_time(pypi_client: PypiClient):
+    first_upload_time = await pypi_client.get_first_upload_time("pyfluent-iterables")
+
+    assert first_upload_time == datetime.fromisoformat("2022-05-19T22:16:51.061667+00:00")
+
+
+@pytest.mark.asyncio
+async def test_first_upload_time_is_cached(tmp_path: Path):
+    request_count = 0
+
+    def mock_handler(_req):
+        nonlocal request_count
+        request_count += 1
+        files = [
+            {"filename": "pkg-2.0.tar.gz", "upload-time": "2024-03-01T10:00:00.000000Z"},
+            {"filename": "pkg-1.0.tar.gz", "upload-time": "2023-05-20T08:30:00.123456Z"},
+            {"filename": "pkg-0.1.tar.gz"},
+        ]
+        return httpx.Response(200, json={"files": files})
+
+    def create_client() -> PypiClient:
+        return PypiClient(httpx.AsyncClient(transport=httpx.MockTransport(mock_handler)), pipask_cache_dir=tmp_path)
+
+    first_upload_time = await create_client().get_first_upload_time("pkg")
+    cached_first_upload_time = await create_client().get_first_upload_time("PKG")
+
+    assert first_upload_time == cached_first_upload_time == datetime.fromisoformat("2023-05-20T08:30:00.123456+00:00")
+    assert request_count == 1
+
+
+@pytest.mark.asyncio
+async def test_attestations_are_cached_by_file_hash(tmp_path: Path):
+    requested_files = []
+
+    def mock_handler(request: httpx.Request):
+        filename = request.url.path.split("/")[-2]
+        requested_files.append(filename)
+        if filename.endswith(".whl"):
+            bundle = {"publisher": {"kind": "GitHub", "repository": "user/repo"}}
+            return httpx.Response(200, json={"attestation_bundles": [bundle], "version": 1})
+        return httpx.Response(404)
+
+    def release_info(filename: str, sha256: str) -> VerifiedPypiReleaseInfo:
+        release_file = ProjectReleaseFile(
+            filename=filename, upload_time_iso_8601=datetime.now(), digests={"sha256": sha256}
+        )
+        return VerifiedPypiReleaseInfo(
+            ReleaseResponse(info=ProjectInfo(name="pkg", version="1.0"), urls=[release_file]), filename
+        )
+
+    def create_client() -> PypiClient:
+        return PypiClient(httpx.AsyncClient(transport=httpx.MockTransport(mock_handler)), pipask_cache_dir=tmp_path)
+
+    for _ in range(2):
+        attestations = await create_client().get_attestations(release_info("pkg-1.0-py3-none-any.whl", "aaa"))
+        no_attestations = await create_client().get_attestations(release_info("pkg-1.0.tar.gz", "bbb"))
+    await create_client().get_attestations(release_info("pkg-1.0.tar.gz", "ccc"))
+
+    assert attestations is not None
+    assert attestations.attestation_bundles[0].publisher.repository == "user/repo"
+    assert no_attestations is None
+    assert requested_files == ["pkg-1.0-py3-none-any.whl", "pkg-1.0.tar.gz", "pkg-1.0.tar.gz"]
+
+
+@pytest.mark.asyncio
+async def test_latest_release_file_prefers_wheel():
+    def mock_handler(request: httpx.Request):
+        assert request.url.path == "/pypi/pkg/json"
+        files = [
+            {"filename": "pkg-2.0.tar.gz", "upload_time_iso_8601": "2024-03-01T10:00:00Z", "digests": {}},
+            {
+                "filename": "pkg-2.0-py3-none-any.whl",
+                "upload_time_iso_8601": "2024-03-01T10:00:00Z",
+                "digests": {"sha256": "aaa"},
+            },
+        ]
+        return httpx.Response(200, json={"info": {"name": "pkg", "version": "2.0"}, "urls": files})
+
+    release_file = await PypiClient(
+        httpx.AsyncClient(transport=httpx.MockTransport(mock_handler))
+    ).get_latest_release_file("pkg")
+
+    assert release_file == PypiReleaseFile(name="pkg", version="2.0", filename="pkg-2.0-py3-none-any.whl", sha256="aaa")
+
+
 @pytest.mark.integration
 async def test_pypi_matching_release_info_gets_pypi_file_info(pypi_client: PypiClient):
     result = await pypi_client.get_matching_release_info(pyfluent_iterables_1_2_0_item)
@@ -192,3 +280,12 @@ async def test_pypi_matching_release_info_handles_release_without_attestation(py
 
     attestation = await pypi_client.get_attestations(release_info)
     assert attestation is None
+
+
+@pytest.mark.asyncio
+async def test_first_upload_time_of_project_without_files_is_none():
+    pypi_client = PypiClient(
+        httpx.AsyncClient(transport=httpx.MockTransport(lambda _req: httpx.Response(200, json={})))
+    )
+
+    assert await pypi_client.get_first_upload_time("pkg") is None
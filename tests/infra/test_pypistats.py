@@ -1,8 +1,19 @@
+import json
 from contextlib import aclosing
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
 
-from pipask.infra.pypistats import PypiStatsClient
+import httpx
 import pytest
 
+from pipask.exception import PipaskException
+from pipask.infra.pypistats import (
+    DownloadStats,
+    PypiStatsClient,
+    get_time_to_daily_refresh,
+    import_download_stats_snapshot,
+)
+
 
 @pytest.mark.integration
 async def test_pypi_stats_download_stats():
@@ -19,3 +30,49 @@ async def test_pypi_stats_downloads_stats_for_repo_with_non_normalized_name(pack
         pypi_stats = await pypi_stats_client.get_download_stats(package_name)
         assert pypi_stats is not None
         assert pypi_stats.last_month > 1
+
+
+@pytest.mark.asyncio
+async def test_caches_download_stats_until_daily_refresh(tmp_path: Path):
+    request_count = 0
+
+    def mock_handler(request: httpx.Request) -> httpx.Response:
+        nonlocal request_count
+        request_count += 1
+        data = {"last_day": 10, "last_week": 70, "last_month": 300}
+        return httpx.Response(200, json={"data": data, "package": "flask", "type": "recent_downloads"})
+
+    def create_client() -> PypiStatsClient:
+        return PypiStatsClient(httpx.AsyncClient(transport=httpx.MockTransport(mock_handler)), tmp_path)
+
+    first = await create_client().get_download_stats("Flask")
+    second = await create_client().get_download_stats("flask")
+
+    assert first == second == DownloadStats(last_day=10, last_week=70, last_month=300)
+    assert request_count == 1
+    assert timedelta(0) < get_time_to_daily_refresh() <= timedelta(days=1)
+
+
+@pytest.mark.asyncio
+async def test_imported_snapshot_is_used_instead_of_requests(tmp_path: Path):
+    snapshot_file = tmp_path / "top-pypi-packages.json"
+    last_update = (datetime.now(timezone.utc) - timedelta(days=2)).strftime("%Y-%m-%d %H:%M:%S")
+    rows = [{"project": "boto3", "download_count": 1_500_000_000}, {"project": "Flask", "download_count": 90_000_000}]
+    snapshot_file.write_text(json.dumps({"last_update": last_update, "rows": rows}))
+
+    imported_count = import_download_stats_snapshot(snapshot_file, tmp_path / "cache")
+
+    def mock_handler(request: httpx.Request) -> httpx.Response:
+        raise AssertionError(f"Unexpected request to {request.url}")
+
+    client = PypiStatsClient(httpx.AsyncClient(transport=httpx.MockTransport(mock_handler)), tmp_path / "cache")
+    assert imported_count == 2
+    assert await client.get_download_stats("flask") == DownloadStats(last_month=90_000_000)
+
+
+def test_rejects_outdated_snapshot(tmp_path: Path):
+    snapshot_file = tmp_path / "top-pypi-packages.json"
+    snapshot_file.write_text(json.dumps({"last_update": "2020-01-01 00:00:00", "rows": []}))
+
+    with pytest.raises(PipaskException, match="outdated"):
+        import_download_stats_snapshot(snapshot_file, tmp_path / "cache")
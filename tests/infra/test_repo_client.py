@@ -1,6 +1,11 @@
+import asyncio
+import json
+import sys
 from contextlib import aclosing
 
-from pipask.infra.repo_client import RepoClient
+import httpx
+
+from pipask.infra.repo_client import RepoClient, RepoInfo, lookup_access_token
 import pytest
 
 
@@ -17,3 +22,146 @@ async def test_repo_info(repo_url: str):
         repo_info = await repo_client.get_repo_info(repo_url)
         assert repo_info is not None
         assert repo_info.star_count > 1
+
+
+@pytest.fixture
+def no_tokens(monkeypatch):
+    for env_var in ["PIPASK_GITHUB_TOKEN", "GITHUB_TOKEN", "GH_TOKEN", "PIPASK_GITLAB_TOKEN", "GITLAB_TOKEN"]:
+        monkeypatch.delenv(env_var, raising=False)
+    monkeypatch.setitem(sys.modules, "keyring", None)  # Make sure a real keyring is not used
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "repo_url,env_var,response",
+    [
+        ("https://github.com/org/repo", "GITHUB_TOKEN", {"stargazers_count": 10}),
+        ("https://gitlab.com/org/repo", "GITLAB_TOKEN", {"star_count": 10}),
+    ],
+)
+async def test_sends_token_from_environment(no_tokens, monkeypatch, repo_url: str, env_var: str, response: dict):
+    monkeypatch.setenv(env_var, "secret")
+    authorization_headers = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        authorization_headers.append(request.headers.get("Authorization"))
+        return httpx.Response(200, json=response)
+
+    async with aclosing(RepoClient(httpx.AsyncClient(transport=httpx.MockTransport(handler)))) as repo_client:
+        repo_info = await repo_client.get_repo_info(repo_url)
+
+    assert repo_info == RepoInfo(star_count=10)
+    assert authorization_headers and set(authorization_headers) == {"Bearer secret"}
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_unauthenticated_requests_when_token_is_rejected(no_tokens, monkeypatch):
+    monkeypatch.setenv("GH_TOKEN", "expired")
+    authorization_headers = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        authorization_headers.append(request.headers.get("Authorization"))
+        if "Authorization" in request.headers:
+            return httpx.Response(401, json={"message": "Bad credentials"})
+        return httpx.Response(200, json={"stargazers_count": 10})
+
+    async with aclosing(RepoClient(httpx.AsyncClient(transport=httpx.MockTransport(handler)))) as repo_client:
+        first = await repo_client.get_repo_info("https://github.com/org/repo1")
+        second = await repo_client.get_repo_info("https://github.com/org/repo2")
+
+    assert first == second == RepoInfo(star_count=10)
+    assert authorization_headers == ["Bearer expired", None, None]
+
+
+def test_no_token_without_environment_variables_or_keyring(no_tokens):
+    assert lookup_access_token("github") is None
+
+
+@pytest.mark.asyncio
+async def test_batches_github_lookups_into_graphql_query(no_tokens, monkeypatch):
+    monkeypatch.setenv("GITHUB_TOKEN", "secret")
+    graphql_requests = []
+    rest_paths = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/graphql":
+            body = json.loads(request.content)
+            graphql_requests.append(body)
+            variables = body["variables"]
+            data = {
+                f"r{i}": {"stargazerCount": 100 + i} if variables[f"name{i}"] != "moved" else None
+                for i in range(len(variables) // 2)
+            }
+            return httpx.Response(200, json={"data": data})
+        rest_paths.append(request.url.path)
+        return httpx.Response(200, json={"stargazers_count": 5})
+
+    async with aclosing(RepoClient(httpx.AsyncClient(transport=httpx.MockTransport(handler)))) as repo_client:
+        results = await asyncio.gather(
+            repo_client.get_repo_info("https://github.com/org/a"),
+            repo_client.get_repo_info("https://github.com/org/b"),
+            repo_client.get_repo_info("https://github.com/org/a"),
+            repo_client.get_repo_info("https://github.com/org/moved"),
+        )
+
+    assert results == [RepoInfo(100), RepoInfo(101), RepoInfo(100), RepoInfo(5)]
+    assert len(graphql_requests) == 1
+    assert graphql_requests[0]["variables"] == {
+        "owner0": "org",
+        "name0": "a",
+        "owner1": "org",
+        "name1": "b",
+        "owner2": "org",
+        "name2": "moved",
+    }
+    assert rest_paths == ["/repos/org/moved"]  # Not found in the batch -> REST API follows redirects
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_rest_when_graphql_query_fails(no_tokens, monkeypatch):
+    monkeypatch.setenv("GITHUB_TOKEN", "secret")
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/graphql":
+            return httpx.Response(502)
+        return httpx.Response(200, json={"stargazers_count": 5})
+
+    async with aclosing(RepoClient(httpx.AsyncClient(transport=httpx.MockTransport(handler)))) as repo_client:
+        repo_info = await repo_client.get_repo_info("https://github.com/org/a")
+
+    assert repo_info == RepoInfo(star_count=5)
+
+
+@pytest.mark.asyncio
+async def test_uses_rest_api_without_github_token(no_tokens):
+    paths = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        paths.append(request.url.path)
+        return httpx.Response(200, json={"stargazers_count": 5})
+
+    async with aclosing(RepoClient(httpx.AsyncClient(transport=httpx.MockTransport(handler)))) as repo_client:
+        await repo_client.get_repo_info("https://github.com/org/a")
+
+    assert paths == ["/repos/org/a"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("has_cache_dir", [False, True])
+async def test_revalidates_repeated_lookups_in_memory_without_cache_dir(no_tokens, tmp_path, has_cache_dir: bool):
+    conditional_headers = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        conditional_headers.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v1"'})
+        return httpx.Response(200, json={"stargazers_count": 5}, headers={"ETag": '"v1"'})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    async with aclosing(RepoClient(client, tmp_path if has_cache_dir else None)) as repo_client:
+        first_repo_info = await repo_client.get_repo_info("https://github.com/org/a")
+        second_repo_info = await repo_client.get_repo_info("https://github.com/org/a")
+
+    assert first_repo_info == second_repo_info == RepoInfo(star_count=5)
+    # With a cache directory, revalidation is left to the HTTP cache of the client
+    assert conditional_headers == ([None, None] if has_cache_dir else [None, '"v1"'])
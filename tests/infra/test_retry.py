@@ -0,0 +1,107 @@
+import time
+
+import httpx
+import pytest
+
+from pipask.infra.retry import RetryTransport
+
+
+def _client(handler, **kwargs) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=RetryTransport(httpx.MockTransport(handler), backoff_seconds=0, **kwargs))
+
+
+@pytest.mark.asyncio
+async def test_retries_transient_errors():
+    status_codes = [502, 503, 200]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(status_codes.pop(0))
+
+    async with _client(handler) as client:
+        response = await client.get("https://pypi.org/pypi/foo/json")
+
+    assert response.status_code == 200
+    assert status_codes == []
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_retries():
+    request_count = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal request_count
+        request_count += 1
+        return httpx.Response(502)
+
+    async with _client(handler, max_retries=2) as client:
+        response = await client.get("https://pypi.org/pypi/foo/json")
+
+    assert response.status_code == 502
+    assert request_count == 3
+
+
+@pytest.mark.asyncio
+async def test_does_not_retry_post_or_client_errors():
+    request_count = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal request_count
+        request_count += 1
+        return httpx.Response(503 if request.method == "POST" else 404)
+
+    async with _client(handler) as client:
+        await client.post("https://api.osv.dev/v1/querybatch", json={})
+        await client.get("https://pypi.org/pypi/foo/json")
+
+    assert request_count == 2
+
+
+@pytest.mark.asyncio
+async def test_waits_for_short_retry_after():
+    responses = [httpx.Response(429, headers={"Retry-After": "0"}), httpx.Response(200)]
+
+    async with _client(lambda request: responses.pop(0)) as client:
+        response = await client.get("https://pypistats.org/api/packages/foo/recent")
+
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_fails_fast_when_rate_limit_is_exhausted():
+    requested_hosts = []
+    reset = str(int(time.time()) + 3600)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested_hosts.append(request.url.host)
+        if request.url.host == "api.github.com":
+            return httpx.Response(403, headers={"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": reset})
+        return httpx.Response(200)
+
+    async with _client(handler) as client:
+        first = await client.get("https://api.github.com/repos/a/b")
+        second = await client.get("https://api.github.com/repos/c/d")
+        other_host = await client.get("https://pypi.org/pypi/foo/json")
+
+    assert requested_hosts == ["api.github.com", "pypi.org"]
+    assert first.status_code == 403
+    assert second.status_code == 429
+    assert other_host.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_stops_before_exceeding_announced_rate_limit():
+    request_count = 0
+    reset = str(int(time.time()) + 3600)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal request_count
+        request_count += 1
+        return httpx.Response(200, headers={"RateLimit-Remaining": "0", "RateLimit-Reset": reset})
+
+    async with _client(handler) as client:
+        first = await client.get("https://gitlab.com/api/v4/projects/a%2Fb")
+        second = await client.get("https://gitlab.com/api/v4/projects/c%2Fd")
+
+    assert request_count == 1
+    assert first.status_code == 200
+    assert second.status_code == 429
@@ -0,0 +1,80 @@
+import asyncio
+
+import httpx
+import pytest
+
+from pipask.infra.shared_transport import HostConcurrencyLimitingTransport, SharedResponseTransport
+
+
+@pytest.mark.asyncio
+async def test_shares_response_between_concurrent_requests():
+    request_count = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal request_count
+        request_count += 1
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"url": str(request.url)})
+
+    async with httpx.AsyncClient(transport=SharedResponseTransport(httpx.MockTransport(handler), 60)) as client:
+        responses = await asyncio.gather(*[client.get("https://example.com/a") for _ in range(5)])
+        await client.get("https://example.com/a")
+
+    assert request_count == 1
+    assert all(r.json() == {"url": "https://example.com/a"} for r in responses)
+
+
+@pytest.mark.asyncio
+async def test_does_not_share_error_responses():
+    request_count = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal request_count
+        request_count += 1
+        return httpx.Response(503)
+
+    async with httpx.AsyncClient(transport=SharedResponseTransport(httpx.MockTransport(handler), 60)) as client:
+        await client.get("https://example.com/a")
+        response = await client.get("https://example.com/a")
+
+    assert request_count == 2
+    assert response.status_code == 503
+
+
+@pytest.mark.asyncio
+async def test_shared_responses_expire():
+    request_count = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal request_count
+        request_count += 1
+        return httpx.Response(404)
+
+    async with httpx.AsyncClient(transport=SharedResponseTransport(httpx.MockTransport(handler), 0)) as client:
+        await client.get("https://example.com/a")
+        await client.get("https://example.com/a")
+
+    assert request_count == 2
+
+
+@pytest.mark.asyncio
+async def test_limits_concurrent_requests_per_host():
+    in_flight_by_host: dict[str, int] = {}
+    max_in_flight_by_host: dict[str, int] = {}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        in_flight_by_host[host] = in_flight_by_host.get(host, 0) + 1
+        max_in_flight_by_host[host] = max(max_in_flight_by_host.get(host, 0), in_flight_by_host[host])
+        await asyncio.sleep(0.01)
+        in_flight_by_host[host] -= 1
+        return httpx.Response(200)
+
+    transport = HostConcurrencyLimitingTransport(httpx.MockTransport(handler), max_concurrent_requests_per_host=2)
+    async with httpx.AsyncClient(transport=transport) as client:
+        await asyncio.gather(
+            *[client.get(f"https://a.example.com/{i}") for i in range(6)],
+            *[client.get(f"https://b.example.com/{i}") for i in range(6)],
+        )
+
+    assert max_in_flight_by_host == {"a.example.com": 2, "b.example.com": 2}
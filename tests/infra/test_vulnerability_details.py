@@ -1,3 +1,7 @@
+import json
+from datetime import datetime, timezone
+
+import httpx
 import pytest
 from pipask.infra.vulnerability_details import (
     VulnerabilitySeverity,
@@ -105,3 +109,53 @@ async def test_osv_vulnerability_details_uses_latest_cvss_version():
             severity=VulnerabilitySeverity.HIGH,  # This has None in V3 but High in V4
             link="https://osv.dev/vulnerability/GHSA-f96h-pmfr-66vw",
         )
+
+
+@pytest.mark.asyncio
+async def test_osv_finds_vulnerabilities_modified_after():
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.url == "https://api.osv.dev/v1/querybatch"
+        queries = json.loads(request.content)["queries"]
+        assert [q["package"]["name"] for q in queries] == ["old", "updated", "safe", "paged"]
+        return httpx.Response(
+            200,
+            json={
+                "results": [
+                    {"vulns": [{"id": "GHSA-1", "modified": "2024-06-01T00:00:00Z"}]},
+                    {"vulns": [{"id": "GHSA-2", "modified": "2025-06-01T00:00:00Z"}]},
+                    {},
+                    {"vulns": [], "next_page_token": "token"},
+                ]
+            },
+        )
+
+    async with aclosing(
+        OsvVulnerabilityDetailsService(httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    ) as details_service:
+        result = await details_service.get_vulnerabilities_modified_after(
+            [("old", "1.0"), ("updated", "1.0"), ("safe", "1.0"), ("paged", "1.0")],
+            datetime(2025, 1, 1, tzinfo=timezone.utc),
+        )
+
+    assert result == {("updated", "1.0"), ("paged", "1.0")}
+
+
+@pytest.mark.asyncio
+async def test_osv_returns_all_releases_of_failed_batch(monkeypatch):
+    monkeypatch.setattr("pipask.infra.vulnerability_details._OSV_MAX_BATCH_SIZE", 2)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        queries = json.loads(request.content)["queries"]
+        if queries[0]["package"]["name"] == "failed-a":
+            return httpx.Response(503)
+        return httpx.Response(200, json={"results": [{}, {}]})
+
+    async with aclosing(
+        OsvVulnerabilityDetailsService(httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    ) as details_service:
+        result = await details_service.get_vulnerabilities_modified_after(
+            [("safe-a", "1.0"), ("safe-b", "1.0"), ("failed-a", "1.0"), ("failed-b", "1.0")],
+            datetime(2025, 1, 1, tzinfo=timezone.utc),
+        )
+
+    assert result == {("failed-a", "1.0"), ("failed-b", "1.0")}
@@ -0,0 +1,130 @@
+from datetime import datetime, timezone
+from optparse import Values
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from pipask.audit import (
+    AuditState,
+    _AuditedDistribution,
+    audit_installed_distributions,
+    find_distributions_to_check,
+    load_audit_state,
+    save_audit_state,
+)
+from pipask.checks.types import CheckResult, CheckResultType
+from pipask.infra.installed_distributions import InstalledDistribution
+from pipask.infra.pypi import VulnerabilityPypi
+
+LAST_RUN = datetime(2025, 1, 1, tzinfo=timezone.utc)
+NO_VULNERABILITIES = [CheckResult(result_type=CheckResultType.SUCCESS, message="No known vulnerabilities found")]
+
+
+def _audited(version: str, fingerprint: str) -> _AuditedDistribution:
+    return _AuditedDistribution(version=version, fingerprint=fingerprint, results=NO_VULNERABILITIES)
+
+
+def test_finds_new_and_changed_distributions():
+    installed = [
+        InstalledDistribution(name="unchanged", version="1.0", fingerprint="a"),
+        InstalledDistribution(name="upgraded", version="2.0", fingerprint="b"),
+        InstalledDistribution(name="modified", version="1.0", fingerprint="c2"),
+        InstalledDistribution(name="new", version="1.0", fingerprint="d"),
+    ]
+    state = AuditState(
+        last_run=LAST_RUN,
+        distributions={
+            "unchanged": _audited("1.0", "a"),
+            "upgraded": _audited("1.0", "b"),
+            "modified": _audited("1.0", "c1"),
+            "removed": _audited("1.0", "e"),
+        },
+    )
+
+    to_check = find_distributions_to_check(installed, state)
+
+    assert [d.name for d in to_check] == ["upgraded", "modified", "new"]
+
+
+def test_saves_and_loads_audit_state(tmp_path: Path):
+    state_file = tmp_path / "audit" / "env.json"
+    state = AuditState(last_run=LAST_RUN, distributions={"package": _audited("1.0", "a")})
+
+    save_audit_state(state_file, state)
+
+    assert load_audit_state(state_file) == state
+
+
+def test_ignores_corrupted_audit_state(tmp_path: Path):
+    state_file = tmp_path / "env.json"
+    state_file.write_text("{not json")
+
+    assert load_audit_state(state_file) == AuditState()
+
+
+@pytest.mark.asyncio
+async def test_rechecks_only_changed_distributions_and_new_vulnerabilities():
+    installed = [
+        InstalledDistribution(name="unchanged", version="1.0", fingerprint="a"),
+        InstalledDistribution(name="newly-vulnerable", version="1.0", fingerprint="b"),
+        InstalledDistribution(name="upgraded", version="2.0", fingerprint="c"),
+    ]
+    state = AuditState(
+        last_run=LAST_RUN,
+        distributions={
+            "unchanged": _audited("1.0", "a"),
+            "newly-vulnerable": _audited("1.0", "b"),
+            "upgraded": _audited("1.0", "c"),
+        },
+    )
+    pypi_client = MagicMock()
+    pypi_client.get_release_vulnerabilities = AsyncMock(return_value=[])
+    pypi_client.aclose = AsyncMock()
+    vulnerability_service = MagicMock()
+    vulnerability_service.get_vulnerabilities_modified_after = AsyncMock(return_value={("newly-vulnerable", "1.0")})
+    vulnerability_service.aclose = AsyncMock()
+
+    with (
+        patch("pipask.audit.PypiClient", return_value=pypi_client),
+        patch("pipask.audit.OsvVulnerabilityDetailsService", return_value=vulnerability_service),
+    ):
+        results, new_state = await audit_installed_distributions(installed, state, Values({"proxy": None}), MagicMock())
+
+    vulnerability_service.get_vulnerabilities_modified_after.assert_awaited_once_with(
+        [("unchanged", "1.0"), ("newly-vulnerable", "1.0")], LAST_RUN
+    )
+    assert sorted(r.name for r in results) == ["newly-vulnerable", "upgraded"]
+    assert new_state.last_run is not None and new_state.last_run > LAST_RUN
+    assert set(new_state.distributions.keys()) == {"unchanged", "newly-vulnerable", "upgraded"}
+    assert new_state.distributions["upgraded"].version == "2.0"
+
+
+@pytest.mark.asyncio
+async def test_failed_check_is_retried_on_next_run():
+    installed = [InstalledDistribution(name="package", version="1.0", fingerprint="a")]
+    pypi_client = MagicMock()
+    pypi_client.get_release_vulnerabilities = AsyncMock(side_effect=RuntimeError("network error"))
+    pypi_client.aclose = AsyncMock()
+
+    with patch("pipask.audit.PypiClient", return_value=pypi_client):
+        results, new_state = await audit_installed_distributions(
+            installed, AuditState(), Values({"proxy": None}), MagicMock()
+        )
+
+    assert results[0].results[0].result_type is CheckResultType.FAILURE
+    assert "package" not in new_state.distributions
+
+
+@pytest.mark.asyncio
+async def test_reports_vulnerable_distribution():
+    installed = [InstalledDistribution(name="package", version="1.0", fingerprint="a")]
+    vulnerability = VulnerabilityPypi(id="PYSEC-1", aliases=[])
+    pypi_client = MagicMock()
+    pypi_client.get_release_vulnerabilities = AsyncMock(return_value=[vulnerability])
+    pypi_client.aclose = AsyncMock()
+
+    with patch("pipask.audit.PypiClient", return_value=pypi_client):
+        results, _ = await audit_installed_distributions(installed, AuditState(), Values({"proxy": None}), MagicMock())
+
+    assert results[0].results[0].result_type is CheckResultType.WARNING  # severity unknown without OSV response
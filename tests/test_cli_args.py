@@ -0,0 +1,66 @@
+import pytest
+
+from pipask.cli_args import PipaskOptions, parse_pipask_options
+from pipask.exception import PipaskException
+from pipask.report import ReportFormat
+
+
+@pytest.mark.parametrize(
+    "args,expected_options,expected_remaining_args",
+    [
+        (["install", "requests"], PipaskOptions(), ["install", "requests"]),
+        (["install", "--pipask-report=jsonl", "requests"], PipaskOptions(ReportFormat.JSONL), ["install", "requests"]),
+        (
+            ["--pipask-report", "sarif", "install", "requests"],
+            PipaskOptions(ReportFormat.SARIF),
+            ["install", "requests"],
+        ),
+        (["install", "--", "--pipask-report=json"], PipaskOptions(), ["install", "--", "--pipask-report=json"]),
+        (
+            ["install", "--pipask-trace", "trace.json", "requests"],
+            PipaskOptions(trace_file="trace.json"),
+            ["install", "requests"],
+        ),
+        (
+            ["install", "--pipask-replay-http=c.gz", "--pipask-replay-latency", "50", "--pipask-replay-jitter=10", "x"],
+            PipaskOptions(replay_http_file="c.gz", replay_latency_ms=50, replay_jitter_ms=10),
+            ["install", "x"],
+        ),
+        (
+            ["--pipask-metrics", "install", "--pipask-metrics-json", "metrics.json", "x"],
+            PipaskOptions(print_metrics=True, metrics_json_file="metrics.json"),
+            ["install", "x"],
+        ),
+        (
+            ["install", "--pipask-check-deadline=5", "--pipask-background-refresh", "x"],
+            PipaskOptions(check_deadline_seconds=5, background_refresh=True),
+            ["install", "x"],
+        ),
+    ],
+)
+def test_parses_pipask_options(args, expected_options, expected_remaining_args):
+    options, remaining_args = parse_pipask_options(args)
+
+    assert options == expected_options
+    assert remaining_args == expected_remaining_args
+
+
+@pytest.mark.parametrize("args", [["install", "--pipask-report=xml"], ["install", "--pipask-report"]])
+def test_rejects_invalid_report_format(args):
+    with pytest.raises(PipaskException, match="json, jsonl, sarif"):
+        parse_pipask_options(args)
+
+
+@pytest.mark.parametrize(
+    "args,expected_error",
+    [
+        (["install", "requests", "--pipask-trace"], "--pipask-trace requires a file path"),
+        (["install", "--pipask-replay-latency=-1"], "--pipask-replay-latency must be a non-negative number"),
+        (["install", "--pipask-replay-jitter", "fast"], "--pipask-replay-jitter must be a non-negative number"),
+        (["install", "--pipask-record-http=a.gz", "--pipask-replay-http=b.gz"], "cannot be combined"),
+        (["install", "--pipask-check-deadline", "soon"], "non-negative number of seconds"),
+    ],
+)
+def test_rejects_invalid_options(args, expected_error):
+    with pytest.raises(PipaskException, match=expected_error):
+        parse_pipask_options(args)
@@ -0,0 +1,66 @@
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from pipask.daemon import is_daemon_supported, run_in_daemon
+
+pytestmark = pytest.mark.skipif(not is_daemon_supported(), reason="daemon is not supported on this platform")
+
+
+@pytest.fixture
+def daemon_socket(tmp_path: Path, monkeypatch):
+    socket_path = tmp_path / "daemon.sock"
+    process = subprocess.Popen(
+        [sys.executable, "-c", f"from pipask.daemon import run_daemon; run_daemon(['--socket', {str(socket_path)!r}])"]
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while not socket_path.exists():
+            assert process.poll() is None, "daemon exited prematurely"
+            assert time.monotonic() < deadline, "daemon did not start in time"
+            time.sleep(0.05)
+        monkeypatch.setenv("PIPASK_DAEMON_SOCKET", str(socket_path))
+        monkeypatch.delenv("PIPASK_NO_DAEMON", raising=False)
+        yield socket_path
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def test_runs_command_in_daemon(daemon_socket: Path, capfd):
+    exit_code = run_in_daemon(["audit", "--help"])
+
+    assert exit_code == 0
+    assert "pipask audit --installed" in capfd.readouterr().out
+
+
+def test_returns_exit_code_from_daemon(daemon_socket: Path, capfd):
+    exit_code = run_in_daemon(["audit"])
+
+    assert exit_code == 2
+    assert "use --installed" in capfd.readouterr().err
+
+
+def test_falls_back_to_in_process_without_daemon(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("PIPASK_DAEMON_SOCKET", str(tmp_path / "missing.sock"))
+    monkeypatch.delenv("PIPASK_NO_DAEMON", raising=False)
+
+    assert run_in_daemon(["--version"]) is None
+
+
+def test_falls_back_to_in_process_with_stale_socket(tmp_path: Path, monkeypatch):
+    stale_socket = tmp_path / "stale.sock"
+    stale_socket.touch()
+    monkeypatch.setenv("PIPASK_DAEMON_SOCKET", str(stale_socket))
+    monkeypatch.delenv("PIPASK_NO_DAEMON", raising=False)
+
+    assert run_in_daemon(["--version"]) is None
+
+
+def test_falls_back_to_in_process_for_different_target_environment(daemon_socket: Path, tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("PYTHONUSERBASE", str(tmp_path / "other-user-base"))
+
+    assert run_in_daemon(["audit", "--help"]) is None
@@ -0,0 +1,119 @@
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+import httpx
+import pytest
+from pydantic import BaseModel
+
+from pipask.infra.shared_transport import SharedResponseTransport
+from pipask.metrics import (
+    MetricsCollector,
+    measure_subprocess,
+    record_requests_response,
+    start_metrics,
+    stop_metrics,
+)
+from pipask.utils import simple_get_request
+
+
+class _Model(BaseModel):
+    value: int
+
+
+@pytest.fixture
+def collector():
+    collector = start_metrics()
+    yield collector
+    stop_metrics()
+
+
+def test_summarizes_requests_per_client_and_host():
+    collector = MetricsCollector()
+    for latency in [0.01, 0.02, 0.03, 0.04, 0.5]:
+        collector.record_request(
+            "async", "pypi.org", status_code=200, byte_count=100, latency_seconds=latency, cache_status="miss"
+        )
+    collector.record_request("async", "pypi.org", status_code=404, byte_count=0, latency_seconds=0.01)
+    collector.record_request("pip", "pypi.org", status_code=200, byte_count=10, latency_seconds=0.1, cache_status="hit")
+    collector.record_retry("async", "pypi.org")
+    collector.record_subprocess("pip", 1.5)
+    collector.record_subprocess("pip", 0.5)
+
+    metrics = collector.to_json()
+
+    assert metrics["http"] == [
+        {
+            "client": "async",
+            "host": "pypi.org",
+            "requests": 6,
+            "bytes": 500,
+            "latency_p50_ms": 20.0,
+            "latency_p95_ms": 500.0,
+            "retries": 1,
+            "not_found": 1,
+            "cache_hits": 0,
+            "cache_misses": 5,
+        },
+        {
+            "client": "pip",
+            "host": "pypi.org",
+            "requests": 1,
+            "bytes": 10,
+            "latency_p50_ms": 100.0,
+            "latency_p95_ms": 100.0,
+            "retries": 0,
+            "not_found": 0,
+            "cache_hits": 1,
+            "cache_misses": 0,
+        },
+    ]
+    assert metrics["cache"] == {"async": {"hits": 0, "misses": 5}, "pip": {"hits": 1, "misses": 0}}
+    assert metrics["subprocesses"] == [{"name": "pip", "count": 2, "total_seconds": 2.0}]
+
+
+@pytest.mark.asyncio
+async def test_records_async_requests_with_cache_status(collector):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"value": 1})
+
+    transport = SharedResponseTransport(httpx.MockTransport(handler), 60)
+    async with httpx.AsyncClient(transport=transport) as client:
+        await simple_get_request("https://pypi.org/a", client, _Model)
+        await simple_get_request("https://pypi.org/a", client, _Model)
+
+    [host_metrics] = collector.to_json()["http"]
+    assert host_metrics["client"] == "async"
+    assert host_metrics["requests"] == 2
+    assert host_metrics["bytes"] == 2 * len(b'{"value":1}')
+    assert (host_metrics["cache_hits"], host_metrics["cache_misses"]) == (1, 1)
+
+
+def test_records_pip_session_responses(collector):
+    response = MagicMock()
+    response.request.url = "https://files.pythonhosted.org/packages/a.whl"
+    response.status_code = 200
+    response.headers = {"Content-Length": "1234"}
+    response.elapsed = timedelta(milliseconds=50)
+    response.from_cache = False
+    response.raw.retries.history = [MagicMock()]
+
+    record_requests_response(response)
+
+    [host_metrics] = collector.to_json()["http"]
+    assert host_metrics["host"] == "files.pythonhosted.org"
+    assert (host_metrics["bytes"], host_metrics["retries"], host_metrics["cache_misses"]) == (1234, 1, 1)
+    assert host_metrics["latency_p50_ms"] == 50.0
+
+
+def test_does_not_record_when_disabled():
+    with measure_subprocess("pip"):
+        pass
+
+    assert stop_metrics() is None
+
+
+def test_measures_subprocesses(collector):
+    with measure_subprocess("pip"):
+        pass
+
+    assert collector.to_json()["subprocesses"][0]["count"] == 1
@@ -0,0 +1,109 @@
+import io
+import json
+
+from pipask.checks.types import CheckResult, CheckResultType, PackageCheckResults
+from pipask.report import (
+    MachineReadableReportWriter,
+    ReportFormat,
+    check_results_to_json,
+    check_results_to_sarif,
+    has_policy_violations,
+)
+
+SAFE_PACKAGE = PackageCheckResults(
+    name="safe",
+    version="1.0",
+    results=[CheckResult(CheckResultType.SUCCESS, "No known vulnerabilities found", checker_id="vulnerabilities")],
+    is_transitive_dependency=False,
+    pypi_url="https://pypi.org/project/safe/1.0/",
+)
+VULNERABLE_PACKAGE = PackageCheckResults(
+    name="vulnerable",
+    version="2.0",
+    results=[
+        CheckResult(
+            CheckResultType.FAILURE,
+            "Found the following vulnerabilities: [red][link=https://osv.dev/CVE-1]CVE-1[/link] (HIGH)[/red]",
+            checker_id="vulnerabilities",
+        ),
+        CheckResult(CheckResultType.WARNING, "A newly published package", checker_id="package-age"),
+    ],
+    is_transitive_dependency=True,
+)
+
+
+def test_converts_results_to_json_without_markup():
+    report = check_results_to_json([SAFE_PACKAGE, VULNERABLE_PACKAGE])
+
+    assert report["result_type"] == "failure"
+    assert report["packages"][1] == {
+        "name": "vulnerable",
+        "version": "2.0",
+        "pypi_url": None,
+        "is_transitive_dependency": True,
+        "result_type": "failure",
+        "results": [
+            {
+                "checker_id": "vulnerabilities",
+                "result_type": "failure",
+                "message": "Found the following vulnerabilities: CVE-1 (HIGH)",
+            },
+            {"checker_id": "package-age", "result_type": "warning", "message": "A newly published package"},
+        ],
+    }
+
+
+def test_converts_results_to_sarif():
+    sarif = check_results_to_sarif([SAFE_PACKAGE, VULNERABLE_PACKAGE])
+
+    run = sarif["runs"][0]
+    assert sarif["version"] == "2.1.0"
+    assert run["tool"]["driver"]["rules"] == [{"id": "package-age"}, {"id": "vulnerabilities"}]
+    assert [(r["ruleId"], r["level"], r["message"]["text"]) for r in run["results"]] == [
+        ("vulnerabilities", "error", "vulnerable==2.0: Found the following vulnerabilities: CVE-1 (HIGH)"),
+        ("package-age", "warning", "vulnerable==2.0: A newly published package"),
+    ]
+
+
+def test_jsonl_writer_writes_results_incrementally():
+    output = io.StringIO()
+    writer = MachineReadableReportWriter(ReportFormat.JSONL, output)
+
+    writer.on_package_checked(VULNERABLE_PACKAGE)
+    written_before_end = output.getvalue()
+    writer.on_package_checked(SAFE_PACKAGE)
+    writer.write_report([SAFE_PACKAGE, VULNERABLE_PACKAGE])
+
+    assert json.loads(written_before_end)["name"] == "vulnerable"
+    assert [json.loads(line)["name"] for line in output.getvalue().splitlines()] == ["vulnerable", "safe"]
+
+
+def test_json_writer_writes_report_at_the_end():
+    output = io.StringIO()
+    writer = MachineReadableReportWriter(ReportFormat.JSON, output)
+
+    writer.on_package_checked(SAFE_PACKAGE)
+    assert output.getvalue() == ""
+    writer.write_report([SAFE_PACKAGE])
+
+    assert json.loads(output.getvalue()) == check_results_to_json([SAFE_PACKAGE])
+
+
+def test_detects_policy_violations():
+    assert has_policy_violations([SAFE_PACKAGE, VULNERABLE_PACKAGE])
+    assert not has_policy_violations([SAFE_PACKAGE])
+
+
+def test_only_timed_out_vulnerabilities_and_release_info_are_policy_violations():
+    def timed_out_package(checker_id: str | None) -> PackageCheckResults:
+        return PackageCheckResults(
+            name="slow",
+            version="1.0",
+            results=[CheckResult(CheckResultType.TIMED_OUT, "Check timed out", checker_id=checker_id)],
+            is_transitive_dependency=False,
+        )
+
+    assert not has_policy_violations([SAFE_PACKAGE, timed_out_package("package-downloads")])
+    assert has_policy_violations([SAFE_PACKAGE, timed_out_package("vulnerabilities")])
+    assert has_policy_violations([SAFE_PACKAGE, timed_out_package(None)])
+    assert check_results_to_json([timed_out_package("package-downloads")])["result_type"] == "timed-out"
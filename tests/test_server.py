@@ -0,0 +1,122 @@
+import asyncio
+from contextlib import aclosing
+
+import httpx
+import pytest
+
+from pipask.checks.types import CheckResultType
+from pipask.infra.shared_transport import SharedResponseTransport
+from pipask.server import CheckService, PinnedRequirement, parse_pinned_requirements, start_check_server
+
+FILE_SHA256 = "a" * 64
+FILE_URL = "https://files.pythonhosted.org/packages/aa/bb/pyfluent_iterables-1.2.0-py3-none-any.whl"
+
+
+def test_parses_lockfile_with_hashes():
+    lockfile = """
+# A comment
+pyfluent-iterables==1.2.0 \\
+    --hash=sha256:aaaa \\
+    --hash=sha256:bbbb
+    # via my-project
+Requests===2.31.0 --hash=sha256:cccc ; python_version >= "3.8"  # inline comment
+"""
+
+    requirements = parse_pinned_requirements(lockfile.splitlines())
+
+    assert requirements == [
+        PinnedRequirement(name="pyfluent-iterables", version="1.2.0", hashes=[("sha256", "aaaa"), ("sha256", "bbbb")]),
+        PinnedRequirement(name="requests", version="2.31.0", hashes=[("sha256", "cccc")]),
+    ]
+
+
+@pytest.mark.parametrize(
+    "line,error",
+    [
+        ("requests>=2.31.0 --hash=sha256:aaaa", "not pinned to an exact version"),
+        ("requests==2.* --hash=sha256:aaaa", "not pinned to an exact version"),
+        ("requests==2.31.0", "not pinned with hashes"),
+        ("-r other-requirements.txt", "Unsupported option"),
+    ],
+)
+def test_rejects_requirements_not_pinned_with_hashes(line: str, error: str):
+    with pytest.raises(ValueError, match=error):
+        parse_pinned_requirements([line])
+
+
+def _stub_pypi_handler(requested_urls: list[str]):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requested_urls.append(str(request.url))
+        await asyncio.sleep(0.01)  # let concurrent requests from both clients overlap
+        if str(request.url) == "https://pypi.org/pypi/pyfluent-iterables/1.2.0/json":
+            return httpx.Response(
+                200,
+                json={
+                    "info": {"name": "pyfluent-iterables", "version": "1.2.0", "license": "MIT"},
+                    "urls": [
+                        {
+                            "filename": "pyfluent_iterables-1.2.0-py3-none-any.whl",
+                            "url": FILE_URL,
+                            "upload_time_iso_8601": "2022-05-19T22:16:51.061667Z",
+                            "digests": {"sha256": FILE_SHA256, "md5": "b" * 32},
+                        }
+                    ],
+                    "vulnerabilities": [],
+                },
+            )
+        return httpx.Response(404)
+
+    return handler
+
+
+@pytest.mark.asyncio
+async def test_serves_check_results_and_shares_upstream_requests():
+    requested_urls: list[str] = []
+    upstream_client = httpx.AsyncClient(
+        transport=SharedResponseTransport(httpx.MockTransport(_stub_pypi_handler(requested_urls)), 60)
+    )
+    async with aclosing(CheckService(upstream_client)) as check_service:
+        server = await start_check_server(check_service, "127.0.0.1", 0)
+        async with server, httpx.AsyncClient() as client:
+            port = server.sockets[0].getsockname()[1]
+            check_request = {"requirements": [f"pyfluent-iterables==1.2.0 --hash=sha256:{FILE_SHA256}"]}
+            responses = await asyncio.gather(
+                client.post(f"http://127.0.0.1:{port}/v1/check", json=check_request),
+                client.post(f"http://127.0.0.1:{port}/v1/check", json=check_request),
+            )
+
+    assert [r.status_code for r in responses] == [200, 200]
+    packages = responses[0].json()["packages"]
+    assert [(p["name"], p["version"]) for p in packages] == [("pyfluent-iterables", "1.2.0")]
+    assert packages[0]["pypi_url"] == "https://pypi.org/project/pyfluent-iterables/1.2.0/"
+    assert {
+        "checker_id": "vulnerabilities",
+        "result_type": "success",
+        "message": "No known vulnerabilities found",
+    } in packages[0]["results"]
+    assert responses[1].json() == responses[0].json()
+    assert requested_urls.count("https://pypi.org/pypi/pyfluent-iterables/1.2.0/json") == 1
+
+
+@pytest.mark.asyncio
+async def test_cannot_check_requirement_with_hash_not_matching_pypi():
+    upstream_client = httpx.AsyncClient(transport=httpx.MockTransport(_stub_pypi_handler([])))
+    async with aclosing(CheckService(upstream_client)) as check_service:
+        requirements = parse_pinned_requirements(["pyfluent-iterables==1.2.0 --hash=sha256:0000"])
+
+        results = await check_service.check_requirements(requirements)
+
+    assert [r.result_type for r in results[0].results] == [CheckResultType.FAILURE]
+
+
+@pytest.mark.asyncio
+async def test_responds_with_bad_request_for_invalid_input():
+    upstream_client = httpx.AsyncClient(transport=httpx.MockTransport(_stub_pypi_handler([])))
+    async with aclosing(CheckService(upstream_client)) as check_service:
+        server = await start_check_server(check_service, "127.0.0.1", 0)
+        async with server, httpx.AsyncClient() as client:
+            port = server.sockets[0].getsockname()[1]
+            response = await client.post(f"http://127.0.0.1:{port}/v1/check", json={"lockfile": "requests==2.31.0"})
+
+    assert response.status_code == 400
+    assert "not pinned with hashes" in response.json()["error"]